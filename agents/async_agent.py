@@ -0,0 +1,236 @@
+import asyncio
+import os
+import threading
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from agents.base_agent import (
+    RUN_STOP_STATUSES,
+    AssistantTurns,
+    RunPoll,
+    reply_from_messages,
+    resolve_assistant_id,
+    run_context,
+    stream_event,
+)
+from services import metrics
+
+# Connection pool shared by every conversation in the process
+MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_async_client():
+    """
+    Returns the process-wide AsyncOpenAI client, backed by one pooled httpx client.
+    Returns:
+        AsyncOpenAI: Shared client.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AsyncOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=MAX_CONNECTIONS,
+                            max_keepalive_connections=MAX_CONNECTIONS // 4 or 1,
+                        ),
+                        timeout=httpx.Timeout(60.0, connect=10.0),
+                    ),
+                )
+    return _client
+
+
+async def close_async_client():
+    """Closes the shared client's connection pool (call on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+class AsyncCreditCardAssistant(AssistantTurns):
+    """
+    asyncio counterpart of CreditCardAssistant: same assistant, tools, session
+    state and turn logic (AssistantTurns), but OpenAI I/O never blocks a worker,
+    so one process can hold many conversations in flight. Tool handlers are
+    CPU-bound and run in a thread.
+    """
+
+    def __init__(self, assistant_id=None, client=None):
+        super().__init__()
+        self.client = client or get_async_client()
+        self._assistant_id = assistant_id
+        self._assistant_lock = asyncio.Lock()
+
+    async def get_assistant_id(self):
+        """ID of the shared Assistant, resolved once (see resolve_assistant_id)."""
+        if self._assistant_id is None:
+            async with self._assistant_lock:
+                if self._assistant_id is None:
+                    sync_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+                    self._assistant_id = await asyncio.to_thread(resolve_assistant_id, sync_client)
+        return self._assistant_id
+
+    async def process_message(self, message, session=None):
+        """
+        Process a user message and return the assistant's response.
+        Args:
+            message (str): User's input message.
+            session (ChatSession): Conversation to continue; defaults to default_session.
+        Returns:
+            str: Assistant's response.
+        """
+        with metrics.chat_turn("async") as turn:
+            session = session or self.default_session
+            async with session.async_lock:
+                reply, opener_key = self._local_reply(message, session, turn)
+                if reply is not None:
+                    await self._record_turn(message, reply, session)
+                    return reply
+
+                with metrics.stage("start_turn"):
+                    thread_id = await self._start_turn(message, session)
+
+                with metrics.stage("run_create"):
+                    metrics.api_call("runs.create")
+                    run = await self.client.beta.threads.runs.create(
+                        thread_id=thread_id,
+                        assistant_id=await self.get_assistant_id(),
+                        **run_context(session)
+                    )
+                run = await self._wait_for_run(thread_id, run)
+
+                rounds = 0
+                while run.status == "requires_action":
+                    rounds += 1
+                    await self._check_tool_rounds(thread_id, run, rounds)
+                    with metrics.stage("tools"):
+                        tool_outputs = await self._run_tools(run, session)
+                    with metrics.stage("submit_tool_outputs"):
+                        metrics.api_call("runs.submit_tool_outputs")
+                        run = await self.client.beta.threads.runs.submit_tool_outputs(
+                            run_id=run.id,
+                            thread_id=thread_id,
+                            tool_outputs=tool_outputs
+                        )
+                    run = await self._wait_for_run(thread_id, run)
+
+                with metrics.stage("messages_list"):
+                    metrics.api_call("messages.list")
+                    messages = await self.client.beta.threads.messages.list(
+                        thread_id=thread_id, run_id=run.id, order="desc", limit=1
+                    )
+                return self._finish_turn(reply_from_messages(messages.data, run), run, opener_key, session)
+
+    async def stream_message(self, message, session=None):
+        """
+        Process a user message, yielding the assistant's reply as it is generated.
+        Args:
+            message (str): User's input message.
+            session (ChatSession): Conversation to continue; defaults to default_session.
+        Yields:
+            str: Chunks of the assistant's response text.
+        """
+        with metrics.chat_turn("async_stream") as turn:
+            session = session or self.default_session
+            async with session.async_lock:
+                reply, opener_key = self._local_reply(message, session, turn)
+                if reply is not None:
+                    await self._record_turn(message, reply, session)
+                    yield reply
+                    return
+
+                with metrics.stage("start_turn"):
+                    thread_id = await self._start_turn(message, session)
+                chunks = []
+
+                metrics.api_call("runs.stream")
+                stream_manager = self.client.beta.threads.runs.stream(
+                    thread_id=thread_id,
+                    assistant_id=await self.get_assistant_id(),
+                    **run_context(session)
+                )
+                rounds = 0
+                while stream_manager is not None:
+                    run = None
+                    async with stream_manager as stream:
+                        async for event in stream:
+                            texts, event_run = stream_event(event)
+                            for text in texts:
+                                chunks.append(text)
+                                yield text
+                            if event_run is not None:
+                                run = event_run
+
+                    stream_manager = None
+                    if run is not None and run.status == "requires_action":
+                        rounds += 1
+                        await self._check_tool_rounds(thread_id, run, rounds)
+                        with metrics.stage("tools"):
+                            tool_outputs = await self._run_tools(run, session)
+                        metrics.api_call("runs.submit_tool_outputs_stream")
+                        stream_manager = self.client.beta.threads.runs.submit_tool_outputs_stream(
+                            run_id=run.id,
+                            thread_id=thread_id,
+                            tool_outputs=tool_outputs
+                        )
+
+                reply = self._finish_turn("".join(chunks) or None, run, opener_key, session)
+                if not chunks:
+                    yield reply
+
+    async def _start_turn(self, message, session):
+        if session.thread_id is None:
+            metrics.api_call("threads.create")
+            thread = await self.client.beta.threads.create(messages=self._new_thread_messages(message, session))
+            session.thread_id = thread.id
+            session.pending_messages = []
+        else:
+            metrics.api_call("messages.create")
+            await self.client.beta.threads.messages.create(
+                thread_id=session.thread_id,
+                role="user",
+                content=message
+            )
+        return session.thread_id
+
+    async def _record_turn(self, message, reply, session):
+        for role, content in self._unrecorded_messages(message, reply, session):
+            metrics.api_call("messages.create")
+            await self.client.beta.threads.messages.create(thread_id=session.thread_id, role=role, content=content)
+
+    async def _wait_for_run(self, thread_id, run):
+        poll = RunPoll(run)
+        try:
+            with metrics.stage("run_wait"):
+                while run.status not in RUN_STOP_STATUSES:
+                    try:
+                        delay = poll.next_delay()
+                    except TimeoutError:
+                        metrics.api_call("runs.cancel")
+                        await self.client.beta.threads.runs.cancel(run_id=run.id, thread_id=thread_id)
+                        raise
+                    await asyncio.sleep(delay)
+                    metrics.api_call("runs.retrieve")
+                    run = await self.client.beta.threads.runs.retrieve(run_id=run.id, thread_id=thread_id)
+            return run
+        finally:
+            metrics.RUN_POLL_ITERATIONS.observe(poll.polls)
+
+    async def _run_tools(self, run, session):
+        return await asyncio.to_thread(
+            self.tools.dispatch, run.required_action.submit_tool_outputs.tool_calls, session
+        )
+
+    async def _check_tool_rounds(self, thread_id, run, rounds):
+        error = self._tool_round_error(run, rounds)
+        if error is not None:
+            metrics.api_call("runs.cancel")
+            await self.client.beta.threads.runs.cancel(run_id=run.id, thread_id=thread_id)
+            raise error
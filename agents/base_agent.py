@@ -1,22 +1,53 @@
-from openai import OpenAI
+from openai import NotFoundError, OpenAI
+import hashlib
 import json
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from services import metrics
 from services.card_logic import CardLogic
+from services.result_cache import ResultCache
+from agents.intents import IntentRouter
+from agents.session import ChatSession
+from agents.tools.dispatcher import ToolDispatcher
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the cache still works
+    fcntl = None
 
 # Load environment variables
 load_dotenv()
 
-class CreditCardAssistant:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.card_logic = CardLogic()
-        self.user_data = {}  # Store user inputs (e.g., income, spending habits)
-        
-        # Create the Assistant
-        self.assistant = self.client.beta.assistants.create(
-            name="Credit Card Recommender",
-            instructions="""
+logger = logging.getLogger(__name__)
+
+ASSISTANT_NAME = "Credit Card Recommender"
+ASSISTANT_MODEL = "gpt-4o-mini"
+ASSISTANT_CACHE_PATH = os.getenv("ASSISTANT_CACHE_PATH", ".assistant_cache.json")
+
+# Run polling: back off from RUN_POLL_INITIAL to RUN_POLL_MAX seconds, give up after RUN_TIMEOUT
+RUN_POLL_INITIAL = 0.1
+RUN_POLL_MAX = 1.0
+RUN_TIMEOUT = float(os.getenv("RUN_TIMEOUT", "120"))
+RUN_STOP_STATUSES = ("requires_action", "completed", "failed", "cancelled", "expired", "incomplete")
+
+# Most requires_action rounds served in one turn before the run is cancelled
+MAX_TOOL_ROUNDS = 8
+
+# Runs see only the last CONTEXT_LAST_MESSAGES thread messages (0: whole thread) and,
+# if set, at most CONTEXT_MAX_PROMPT_TOKENS prompt tokens (the API minimum is 256);
+# the collected profile is passed with every run, so truncation never loses it
+CONTEXT_LAST_MESSAGES = int(os.getenv("CONTEXT_LAST_MESSAGES", "20"))
+CONTEXT_MAX_PROMPT_TOKENS = int(os.getenv("CONTEXT_MAX_PROMPT_TOKENS", "0"))
+
+# Only short messages can be cached conversation openers ("hi", "what cards do you have")
+OPENER_MAX_LENGTH = 200
+
+FALLBACK_REPLY = "Sorry, something went wrong. Please try again."
+
+INSTRUCTIONS = """
 You are a credit card recommendation assistant for users in India. Your goal is to collect user information through a dynamic, conversational dialogue and provide personalized credit card recommendations or perform related tasks (e.g., card lookup, comparison, reward simulation). Follow these steps:
 
 1. **Collect User Inputs**:
@@ -36,8 +67,9 @@ You are a credit card recommendation assistant for users in India. Your goal is
    - If the user asks about a specific card, use the 'lookup' tool.
    - If the user wants to compare cards, use the 'compare' tool.
    - If the user asks for reward simulation, use the 'simulate' tool.
+   - If the user asks which of their cards to use for each kind of spending, or whether adding a card is worth it, use the 'wallet' tool.
    - If the user asks how many cards are available, use the 'count' tool.
-   - Store user inputs using the 'profile' tool for context.
+   - Store each user input with the 'profile' tool as soon as it is given; older messages may be dropped from context, and the stored profile is passed with every turn.
 
 3. **Response Formatting**:
    - For recommendations, present 3–5 cards with:
@@ -62,210 +94,641 @@ You are a credit card recommendation assistant for users in India. Your goal is
 - Do not store user data outside the conversation context.
 - Maintain a conversational, engaging tone.
 - Assume a database of Indian credit cards is accessible via tools.
-""",
-            model="gpt-4o-mini",
-            tools=[
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "recommend",
-                        "description": "Recommends 3–5 credit cards based on user inputs.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "monthly_income": {"type": "integer", "description": "Monthly income in INR"},
-                                "spending_habits": {
-                                    "type": "object",
-                                    "properties": {
-                                        "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
-                                        "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
-                                        "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
-                                        "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
-                                    },
-                                    "required": ["fuel", "travel", "groceries", "dining"],
-                                },
-                                "preferred_benefits": {
-                                    "type": "array",
-                                    "items": {"type": "string", "enum": ["cashback", "travel_points", "lounge_access"]},
-                                    "description": "Preferred card benefits",
-                                },
-                                "existing_cards": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "description": "List of existing credit card names or 'none'"
-                                },
-                                "credit_score": {
-                                    "type": "string",
-                                    "description": "Approximate credit score (e.g., '700–800') or 'unknown'"
-                                },
-                            },
-                            "required": ["monthly_income", "spending_habits", "preferred_benefits"],
+"""
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "recommend",
+            "description": "Recommends 3–5 credit cards based on user inputs.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "monthly_income": {"type": "integer", "description": "Monthly income in INR"},
+                    "spending_habits": {
+                        "type": "object",
+                        "properties": {
+                            "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
+                            "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
+                            "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
+                            "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
                         },
+                        "required": ["fuel", "travel", "groceries", "dining"],
                     },
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "lookup",
-                        "description": "Looks up details for a specific credit card.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "card_name": {"type": "string", "description": "Name of the card to look up"}
-                            },
-                            "required": ["card_name"],
-                        },
+                    "preferred_benefits": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["cashback", "travel_points", "lounge_access"]},
+                        "description": "Preferred card benefits",
                     },
-                },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "count",
-                        "description": "Returns the total number of cards in the database.",
-                        "parameters": {"type": "object", "properties": {}},
+                    "existing_cards": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "List of existing credit card names or 'none'"
+                    },
+                    "credit_score": {
+                        "type": "string",
+                        "description": "Approximate credit score (e.g., '700–800') or 'unknown'"
                     },
                 },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "profile",
-                        "description": "Stores user profile data from the conversation.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "monthly_income": {"type": "integer", "description": "Monthly income in INR"},
-                                "spending_habits": {
-                                    "type": "object",
-                                    "properties": {
-                                        "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
-                                        "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
-                                        "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
-                                        "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
-                                    },
-                                },
-                                "preferred_benefits": {
-                                    "type": "array",
-                                    "items": {"type": "string", "enum": ["cashback", "travel_points", "lounge_access"]},
-                                },
-                                "existing_cards": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                },
-                                "credit_score": {"type": "string"},
-                            },
+                "required": ["monthly_income", "spending_habits", "preferred_benefits"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "lookup",
+            "description": "Looks up details for a specific credit card.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "card_name": {"type": "string", "description": "Name of the card to look up"}
+                },
+                "required": ["card_name"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "count",
+            "description": "Returns the total number of cards in the database.",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "profile",
+            "description": "Stores user profile data from the conversation.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "monthly_income": {"type": "integer", "description": "Monthly income in INR"},
+                    "spending_habits": {
+                        "type": "object",
+                        "properties": {
+                            "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
+                            "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
+                            "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
+                            "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
                         },
                     },
+                    "preferred_benefits": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["cashback", "travel_points", "lounge_access"]},
+                    },
+                    "existing_cards": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                    },
+                    "credit_score": {"type": "string"},
                 },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "compare",
-                        "description": "Compares two credit cards by benefits, rewards, and fees.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "card_name1": {"type": "string", "description": "First card name"},
-                                "card_name2": {"type": "string", "description": "Second card name"},
-                            },
-                            "required": ["card_name1", "card_name2"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "compare",
+            "description": "Compares two credit cards by benefits, rewards, and fees.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "card_name1": {"type": "string", "description": "First card name"},
+                    "card_name2": {"type": "string", "description": "Second card name"},
+                },
+                "required": ["card_name1", "card_name2"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "simulate",
+            "description": "Simulates annual rewards for a card based on spending habits.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "card_name": {"type": "string", "description": "Name of the card"},
+                    "spending_habits": {
+                        "type": "object",
+                        "properties": {
+                            "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
+                            "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
+                            "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
+                            "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
                         },
+                        "required": ["fuel", "travel", "groceries", "dining"],
                     },
                 },
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "simulate",
-                        "description": "Simulates annual rewards for a card based on spending habits.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "card_name": {"type": "string", "description": "Name of the card"},
-                                "spending_habits": {
-                                    "type": "object",
-                                    "properties": {
-                                        "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
-                                        "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
-                                        "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
-                                        "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
-                                    },
-                                    "required": ["fuel", "travel", "groceries", "dining"],
-                                },
-                            },
-                            "required": ["card_name", "spending_habits"],
+                "required": ["card_name", "spending_habits"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "wallet",
+            "description": "Chooses which of the user's cards (plus an optional candidate card) to use for each spending category, accounting for caps, milestones and fee waivers.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "spending_habits": {
+                        "type": "object",
+                        "properties": {
+                            "fuel": {"type": "integer", "description": "Monthly fuel spending in INR"},
+                            "travel": {"type": "integer", "description": "Monthly travel spending in INR"},
+                            "groceries": {"type": "integer", "description": "Monthly groceries spending in INR"},
+                            "dining": {"type": "integer", "description": "Monthly dining spending in INR"},
                         },
                     },
+                    "existing_cards": {"type": "array", "items": {"type": "string"}, "description": "Names of the user's current cards"},
+                    "candidate": {"type": "string", "description": "Name of a card the user is considering adding"},
                 },
-            ],
-        )
-        self.thread = self.client.beta.threads.create()
+            },
+        },
+    },
+]
+
+
+def assistant_spec_hash():
+    """
+    Hash of everything that defines the assistant; a change means a new assistant.
+    Returns:
+        str: Short hex digest.
+    """
+    spec = {"name": ASSISTANT_NAME, "model": ASSISTANT_MODEL, "instructions": INSTRUCTIONS, "tools": TOOLS}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def resolve_assistant_id(client):
+    """
+    Returns the ID of an assistant matching the current spec, creating one only if needed.
+    Order: OPENAI_ASSISTANT_ID env var, then the local cache file keyed by spec hash,
+    then a new assistant (recorded in the cache). The cache file is locked so
+    workers booting together create at most one assistant. A pinned
+    OPENAI_ASSISTANT_ID is used as is, with a warning if it was built from another spec.
+    Args:
+        client (OpenAI): API client.
+    Returns:
+        str: Assistant ID.
+    """
+    spec_hash = assistant_spec_hash()
+    env_id = os.getenv("OPENAI_ASSISTANT_ID")
+    if env_id:
+        # Runs use the pinned assistant's own instructions and tools, not INSTRUCTIONS/TOOLS
+        pinned_hash = (client.beta.assistants.retrieve(env_id).metadata or {}).get("spec_hash")
+        if pinned_hash != spec_hash:
+            logger.warning(
+                "OPENAI_ASSISTANT_ID %s has spec hash %s but the current instructions and tools hash to %s; "
+                "its instructions or tools may be out of date. Unset OPENAI_ASSISTANT_ID to use a matching "
+                "assistant, or update the pinned one and its spec_hash metadata.",
+                env_id, pinned_hash, spec_hash,
+            )
+        return env_id
+
+    with open(ASSISTANT_CACHE_PATH, "a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            try:
+                cache = json.loads(f.read() or "{}")
+            except ValueError:
+                cache = {}
+
+            assistant_id = cache.get(spec_hash)
+            if assistant_id:
+                try:
+                    client.beta.assistants.retrieve(assistant_id)
+                    return assistant_id
+                except NotFoundError:
+                    pass  # Deleted on the OpenAI side; create a replacement
+
+            assistant = client.beta.assistants.create(
+                name=ASSISTANT_NAME,
+                instructions=INSTRUCTIONS,
+                model=ASSISTANT_MODEL,
+                tools=TOOLS,
+                metadata={"spec_hash": spec_hash},
+            )
+            cache[spec_hash] = assistant.id
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(cache, indent=2))
+            return assistant.id
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def opener_cache_key(cache, message, session, spec_hash, catalog_version):
+    """
+    Response-cache key for a stateless opening turn, or None if the turn isn't cacheable.
+    A turn is an opener only while the session has no thread, no recorded turns
+    and no profile, so the reply can't depend on earlier conversation.
+    Args:
+        cache (ResultCache): Response cache (None disables caching).
+        message (str): User's input message.
+        session (ChatSession): Conversation the message belongs to.
+        spec_hash (str): assistant_spec_hash() of the assistant answering.
+        catalog_version (str): Current catalog version.
+    Returns:
+        str: Cache key, or None.
+    """
+    if cache is None or len(message) > OPENER_MAX_LENGTH:
+        return None
+    if session.thread_id is not None or session.pending_messages or session.user_data:
+        return None
+    text = " ".join(message.lower().split()).strip(" ?!.")
+    return cache.make_key("opener", text, spec_hash, catalog_version)
+
+
+def profile_summary(user_data):
+    """
+    Compact instructions carrying the profile collected so far.
+    Args:
+        user_data (dict): Profile stored by the 'profile' tool.
+    Returns:
+        str: Instruction text, or None if nothing has been collected.
+    """
+    if not user_data:
+        return None
+    profile = json.dumps(user_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return (
+        "User profile collected so far (earlier messages may be truncated; "
+        f"do not ask for these again, update them with the 'profile' tool): {profile}"
+    )
+
+
+def run_context(session):
+    """
+    Context arguments for runs.create / runs.stream that keep the prompt bounded.
+    Args:
+        session (ChatSession): Conversation the run belongs to.
+    Returns:
+        dict: additional_instructions, truncation_strategy and max_prompt_tokens, as configured.
+    """
+    options = {}
+    summary = profile_summary(session.user_data)
+    if summary is not None:
+        options["additional_instructions"] = summary
+    if CONTEXT_LAST_MESSAGES > 0:
+        options["truncation_strategy"] = {"type": "last_messages", "last_messages": CONTEXT_LAST_MESSAGES}
+    if CONTEXT_MAX_PROMPT_TOKENS > 0:
+        options["max_prompt_tokens"] = max(CONTEXT_MAX_PROMPT_TOKENS, 256)
+    return options
+
+
+def reply_from_messages(messages, run):
+    """
+    Text of the assistant message a run produced.
+    Args:
+        messages (list): messages.list data filtered to the run (newest first).
+        run: The finished run.
+    Returns:
+        str: Reply text, or None if the run produced no assistant message.
+    """
+    for msg in messages:
+        if msg.role == "assistant" and msg.run_id == run.id:
+            for part in msg.content:
+                if part.type == "text":
+                    return part.text.value
+    return None
+
+
+def stream_event(event):
+    """
+    What one event of a run stream carries.
+    Returns:
+        tuple: (text deltas, the run if the event reports its state, else None).
+    """
+    if event.event == "thread.message.delta":
+        texts = [
+            part.text.value
+            for part in event.data.delta.content or []
+            if part.type == "text" and part.text and part.text.value
+        ]
+        return texts, None
+    if event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step"):
+        return [], event.data
+    return [], None
+
+
+class RunPoll:
+    """
+    Polling schedule of one run: waits back off from RUN_POLL_INITIAL to
+    RUN_POLL_MAX seconds, until RUN_TIMEOUT has passed.
+    Args:
+        run: The run being polled.
+    """
+
+    def __init__(self, run):
+        self.run_id = run.id
+        self.deadline = time.monotonic() + RUN_TIMEOUT
+        self.delay = RUN_POLL_INITIAL
+        self.polls = 0
+
+    def next_delay(self):
+        """
+        Seconds to wait before the next poll.
+        Raises:
+            TimeoutError: The run is out of time (cancel it).
+        """
+        if time.monotonic() >= self.deadline:
+            raise TimeoutError(f"Run {self.run_id} did not finish within {RUN_TIMEOUT:g}s")
+        delay = self.delay
+        self.delay = min(delay * 1.5, RUN_POLL_MAX)
+        self.polls += 1
+        return delay
+
 
-    def process_message(self, message):
+class AssistantTurns:
+    """
+    Turn logic shared by CreditCardAssistant and its asyncio counterpart
+    (agents.async_agent.AsyncCreditCardAssistant): local replies, the opener
+    cache, conversation bookkeeping and tool rounds. None of it calls OpenAI,
+    so the two classes differ only in how they make the client calls.
+    Args:
+        card_logic (CardLogic): Card logic for the intents (default: a new one).
+    """
+
+    def __init__(self, card_logic=None):
+        self.card_logic = card_logic or CardLogic()
+        self.tools = ToolDispatcher()
+        self.intents = IntentRouter(self.card_logic)
+        # Exact-match replies to common opening messages (RESPONSE_CACHE_* env vars)
+        self.responses = ResultCache.from_env("RESPONSE_CACHE", max_entries=500, ttl=86400)
+        self._spec_hash = assistant_spec_hash()
+        # Conversation used when no session is passed (single-user / CLI use)
+        self.default_session = ChatSession("default")
+
+    def _local_reply(self, message, session, turn):
+        """
+        Answer a message without a run: a simple catalog question (see IntentRouter)
+        or a cached reply to a conversation opener.
+        Returns:
+            tuple: (reply, None) if answered; else (None, the response-cache key
+                for the run's reply, or None if it is not cacheable).
+        """
+        reply = self.intents.route(message)
+        if reply is not None:
+            turn.path = "intent"
+            return reply, None
+        opener_key = opener_cache_key(self.responses, message, session, self._spec_hash, self.card_logic.catalog.version)
+        if opener_key is not None:
+            cached = self.responses.get(opener_key)
+            if cached is not None:
+                turn.path = "cache"
+                return cached, None
+        return None, opener_key
+
+    def _finish_turn(self, reply, run, opener_key, session):
+        """
+        The reply to a turn that ran the assistant, recording the run on the session.
+        Returns:
+            str: reply, or FALLBACK_REPLY if the run produced none; a completed
+                opener's reply is also stored in the response cache.
+        """
+        if run is not None:
+            session.last_run_id = run.id
+        if reply is None:
+            return FALLBACK_REPLY
+        if opener_key is not None and run is not None and run.status == "completed" and not session.user_data:
+            self.responses.set(opener_key, reply)
+        return reply
+
+    @staticmethod
+    def _new_thread_messages(message, session):
+        """Opening messages of a session's thread: the turns answered before it existed, then message."""
+        messages = [{"role": role, "content": content} for role, content in session.pending_messages]
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    @staticmethod
+    def _unrecorded_messages(message, reply, session):
+        """
+        A turn answered without a run, so later runs see it: kept on the session
+        until the thread is created (returns nothing), else returned as
+        (role, content) messages to add to the thread.
+        """
+        if session.thread_id is None:
+            session.pending_messages += [("user", message), ("assistant", reply)]
+            return []
+        return [("user", message), ("assistant", reply)]
+
+    @staticmethod
+    def _tool_round_error(run, rounds):
+        """The error to cancel a run with once it keeps asking for tools instead of answering, else None."""
+        if rounds > MAX_TOOL_ROUNDS:
+            return RuntimeError(f"Run {run.id} exceeded {MAX_TOOL_ROUNDS} tool rounds")
+        return None
+
+
+class CreditCardAssistant(AssistantTurns):
+    def __init__(self, assistant_id=None):
+        super().__init__()
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+        # Look up (or create) the Assistant in the background so startup doesn't block
+        self._assistant_id = assistant_id
+        self._assistant_lock = threading.Lock()
+        if self._assistant_id is None:
+            threading.Thread(target=self._resolve_in_background, name="assistant-resolver", daemon=True).start()
+
+    @property
+    def assistant_id(self):
+        """ID of the shared Assistant; waits for the background lookup if still running."""
+        if self._assistant_id is None:
+            self._resolve_assistant()
+        return self._assistant_id
+
+    def _resolve_in_background(self):
+        try:
+            self._resolve_assistant()
+        except Exception:
+            # Retried on first use by the assistant_id property
+            logger.exception("Could not resolve the OpenAI assistant at startup")
+
+    def _resolve_assistant(self):
+        with self._assistant_lock:
+            if self._assistant_id is None:
+                self._assistant_id = resolve_assistant_id(self.client)
+
+    def process_message(self, message, session=None):
         """
         Process a user message and return the assistant's response.
         Args:
             message (str): User's input message.
+            session (ChatSession): Conversation to continue; defaults to default_session.
         Returns:
             str: Assistant's response.
         """
-        # Add user message to the thread
-        self.client.beta.threads.messages.create(
-            thread_id=self.thread.id,
-            role="user",
-            content=message
-        )
-
-        # Create a run
-        run = self.client.beta.threads.runs.create(
-            thread_id=self.thread.id,
-            assistant_id=self.assistant.id
-        )
-
-        # Poll for run completion
-        while run.status not in ["completed", "failed", "requires_action"]:
-            run = self.client.beta.threads.runs.retrieve(run_id=run.id, thread_id=self.thread.id)
-
-        if run.status == "requires_action":
-            tool_outputs = []
-            for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-                function_name = tool_call.function.name
-                arguments = json.loads(tool_call.function.arguments)
-
-                # Call appropriate function from CardLogic
-                if function_name == "recommend":
-                    result = self.card_logic.recommend_cards(arguments)
-                elif function_name == "lookup":
-                    result = self.card_logic.lookup_card(arguments["card_name"])
-                elif function_name == "count":
-                    result = self.card_logic.count_cards()
-                elif function_name == "profile":
-                    self.user_data.update(arguments)
-                    result = {"status": "Profile updated"}
-                elif function_name == "compare":
-                    result = self.card_logic.compare_cards(arguments["card_name1"], arguments["card_name2"])
-                elif function_name == "simulate":
-                    result = self.card_logic.simulate_rewards(arguments["card_name"], arguments["spending_habits"])
-                else:
-                    result = {"error": "Unknown function"}
-
-                tool_outputs.append({
-                    "tool_call_id": tool_call.id,
-                    "output": json.dumps(result)
-                })
-
-            # Submit tool outputs
-            run = self.client.beta.threads.runs.submit_tool_outputs(
-                run_id=run.id,
-                thread_id=self.thread.id,
-                tool_outputs=tool_outputs
+        with metrics.chat_turn() as turn:
+            session = session or self.default_session
+            with session.lock:
+                # Simple catalog questions and cached openers are answered without an Assistants run
+                reply, opener_key = self._local_reply(message, session, turn)
+                if reply is not None:
+                    self._record_turn(message, reply, session)
+                    return reply
+
+                with metrics.stage("start_turn"):
+                    thread_id = self._start_turn(message, session)
+
+                # Create a run
+                with metrics.stage("run_create"):
+                    metrics.api_call("runs.create")
+                    run = self.client.beta.threads.runs.create(
+                        thread_id=thread_id,
+                        assistant_id=self.assistant_id,
+                        **run_context(session)
+                    )
+                run = self._wait_for_run(thread_id, run)
+
+                # Service tool calls until the run finishes; the model may chain several rounds
+                rounds = 0
+                while run.status == "requires_action":
+                    rounds += 1
+                    self._check_tool_rounds(thread_id, run, rounds)
+                    with metrics.stage("tools"):
+                        tool_outputs = self._run_tools(run, session)
+                    with metrics.stage("submit_tool_outputs"):
+                        metrics.api_call("runs.submit_tool_outputs")
+                        run = self.client.beta.threads.runs.submit_tool_outputs(
+                            run_id=run.id,
+                            thread_id=thread_id,
+                            tool_outputs=tool_outputs
+                        )
+                    run = self._wait_for_run(thread_id, run)
+
+                # Fetch only this run's newest message, whatever the thread's length
+                with metrics.stage("messages_list"):
+                    metrics.api_call("messages.list")
+                    messages = self.client.beta.threads.messages.list(
+                        thread_id=thread_id, run_id=run.id, order="desc", limit=1
+                    )
+                return self._finish_turn(reply_from_messages(messages.data, run), run, opener_key, session)
+
+    def stream_message(self, message, session=None):
+        """
+        Process a user message, yielding the assistant's reply as it is generated.
+        Uses the streaming runs API, so no polling is needed.
+        Args:
+            message (str): User's input message.
+            session (ChatSession): Conversation to continue; defaults to default_session.
+        Yields:
+            str: Chunks of the assistant's response text.
+        """
+        with metrics.chat_turn("stream") as turn:
+            session = session or self.default_session
+            with session.lock:
+                reply, opener_key = self._local_reply(message, session, turn)
+                if reply is not None:
+                    self._record_turn(message, reply, session)
+                    yield reply
+                    return
+
+                with metrics.stage("start_turn"):
+                    thread_id = self._start_turn(message, session)
+                chunks = []
+
+                metrics.api_call("runs.stream")
+                with self.client.beta.threads.runs.stream(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id,
+                    **run_context(session)
+                ) as stream:
+                    run = yield from self._relay_stream(stream, chunks)
+
+                rounds = 0
+                while run is not None and run.status == "requires_action":
+                    rounds += 1
+                    self._check_tool_rounds(thread_id, run, rounds)
+                    with metrics.stage("tools"):
+                        tool_outputs = self._run_tools(run, session)
+                    metrics.api_call("runs.submit_tool_outputs_stream")
+                    with self.client.beta.threads.runs.submit_tool_outputs_stream(
+                        run_id=run.id,
+                        thread_id=thread_id,
+                        tool_outputs=tool_outputs
+                    ) as stream:
+                        run = yield from self._relay_stream(stream, chunks)
+
+                reply = self._finish_turn("".join(chunks) or None, run, opener_key, session)
+                if not chunks:
+                    yield reply
+
+    def _start_turn(self, message, session):
+        """Ensure the session has a thread and add the user's message to it."""
+        if session.thread_id is None:
+            # New thread: include any turns answered locally or from the response cache
+            metrics.api_call("threads.create")
+            session.thread_id = self.client.beta.threads.create(messages=self._new_thread_messages(message, session)).id
+            session.pending_messages = []
+        else:
+            metrics.api_call("messages.create")
+            self.client.beta.threads.messages.create(
+                thread_id=session.thread_id,
+                role="user",
+                content=message
             )
+        return session.thread_id
+
+    def _record_turn(self, message, reply, session):
+        """Add a turn answered without a run to the conversation (see _unrecorded_messages)."""
+        for role, content in self._unrecorded_messages(message, reply, session):
+            metrics.api_call("messages.create")
+            self.client.beta.threads.messages.create(thread_id=session.thread_id, role=role, content=content)
+
+    def _wait_for_run(self, thread_id, run):
+        """
+        Poll a run with bounded exponential backoff until it needs tool outputs or finishes.
+        Cancels the run and raises TimeoutError after RUN_TIMEOUT seconds.
+        """
+        poll = RunPoll(run)
+        try:
+            with metrics.stage("run_wait"):
+                while run.status not in RUN_STOP_STATUSES:
+                    try:
+                        delay = poll.next_delay()
+                    except TimeoutError:
+                        metrics.api_call("runs.cancel")
+                        self.client.beta.threads.runs.cancel(run_id=run.id, thread_id=thread_id)
+                        raise
+                    time.sleep(delay)
+                    metrics.api_call("runs.retrieve")
+                    run = self.client.beta.threads.runs.retrieve(run_id=run.id, thread_id=thread_id)
+            return run
+        finally:
+            metrics.RUN_POLL_ITERATIONS.observe(poll.polls)
+
+    def _relay_stream(self, stream, chunks):
+        """
+        Yield text deltas from a run event stream, also appending them to chunks.
+        Returns:
+            The last run object seen, or None.
+        """
+        run = None
+        for event in stream:
+            texts, event_run = stream_event(event)
+            for text in texts:
+                chunks.append(text)
+                yield text
+            if event_run is not None:
+                run = event_run
+        return run
 
-            # Wait for completion
-            while run.status not in ["completed", "failed"]:
-                run = self.client.beta.threads.runs.retrieve(run_id=run.id, thread_id=self.thread.id)
+    def _run_tools(self, run, session):
+        """Execute the tool calls a run is waiting on and build its tool outputs."""
+        return self.tools.dispatch(run.required_action.submit_tool_outputs.tool_calls, session)
 
-        # Retrieve and return the latest assistant message
-        messages = self.client.beta.threads.messages.list(thread_id=self.thread.id)
-        for msg in messages.data:
-            if msg.role == "assistant":
-                return msg.content[0].text.value
-        return "Sorry, something went wrong. Please try again."
\ No newline at end of file
+    def _check_tool_rounds(self, thread_id, run, rounds):
+        """Cancel a run that keeps asking for tools instead of answering."""
+        error = self._tool_round_error(run, rounds)
+        if error is not None:
+            metrics.api_call("runs.cancel")
+            self.client.beta.threads.runs.cancel(run_id=run.id, thread_id=thread_id)
+            raise error
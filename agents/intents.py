@@ -0,0 +1,148 @@
+import re
+
+from services.card_logic import CardLogic
+
+# Cue phrases for the intents answered locally; anything else goes to the LLM
+COUNT_PATTERN = re.compile(
+    r"^(?:how many|number of|count(?: of)?)(?: the)?(?P<subject>(?: [a-z&.' ]+?)?) (?:credit )?cards?"
+    r"(?: (?:do you have|do you offer|are there|are available|are listed|(?:are )?in (?:the|your) database|you have))?"
+    r"(?: in total| total)?$"
+)
+# Any comparison wording keeps a message away from the count and lookup intents
+COMPARE_CUE_PATTERN = re.compile(r"\b(compare|comparison|vs|versus|difference between)\b")
+# A comparison is the cue followed by nothing but two card names and a connector
+# ("compare hdfc regalia and axis magnus"), or just the names around "vs"
+COMPARE_PATTERN = re.compile(r"^(?:compare|comparison (?:of|between)|differences? between)(?: the)? (?P<subject>.+)$")
+COMPARE_CONNECTOR_PATTERN = re.compile(r"(?: credit)?(?: card)? (?:and|with|to|vs\.?|versus) (?:the )?")
+VERSUS_CONNECTOR_PATTERN = re.compile(r"(?: credit)?(?: card)? (?:vs\.?|versus) (?:the )?")
+# A lookup is the cue followed by nothing but one card's name ("tell me about hdfc regalia");
+# any other words make it a question for the assistant
+LOOKUP_PATTERN = re.compile(
+    r"^(?:tell me about|details (?:of|for|on|about)|what is|what's|info(?:rmation)? (?:on|about)|describe|show me)"
+    r"(?: the)? (?P<subject>.+)$"
+)
+CARD_SUFFIX_PATTERN = re.compile(r"(?: credit)? card$")
+
+
+class IntentRouter:
+    """
+    Answers simple catalog questions (count, lookup, compare) directly from CardLogic,
+    skipping the Assistants run. Only fires when the intent and the cards involved
+    are unambiguous; returns None otherwise so the LLM handles the message.
+    """
+
+    def __init__(self, card_logic=None):
+        self.card_logic = card_logic or CardLogic()
+
+    def route(self, message):
+        """
+        Try to answer a message locally.
+        Args:
+            message (str): User's input message.
+        Returns:
+            str: Markdown reply, or None to fall back to the assistant.
+        """
+        text = " ".join(message.lower().split()).strip(" ?!.")
+
+        if COMPARE_CUE_PATTERN.search(text):
+            compare = COMPARE_PATTERN.match(text)
+            if compare:
+                pair = self._card_pair(compare.group("subject"), COMPARE_CONNECTOR_PATTERN)
+            else:
+                pair = self._card_pair(text, VERSUS_CONNECTOR_PATTERN)
+            return self._compare(*pair) if pair else None
+        count = COUNT_PATTERN.match(text)
+        if count:
+            # The words before "cards" must be nothing, or exactly one issuer ("how many SBI cards")
+            subject = count.group("subject").strip()
+            if subject in ("", "total", "available"):
+                return self._count(None)
+            matches = self.card_logic.catalog.name_matcher.find_words(subject)
+            if len(matches) == 1 and matches[0][:2] == (0, len(subject)) and matches[0][2][0] == "issuer":
+                return self._count(matches[0][2][1])
+            return None
+        lookup = LOOKUP_PATTERN.match(text)
+        if lookup:
+            subject = lookup.group("subject")
+            # "... regalia credit card": try with and without the suffix, as some names end in "card"
+            for name in dict.fromkeys((subject, CARD_SUFFIX_PATTERN.sub("", subject))):
+                matches = self.card_logic.catalog.name_matcher.find_words(name)
+                if len(matches) == 1 and matches[0][:2] == (0, len(name)) and matches[0][2][0] == "card":
+                    return self._lookup(self.card_logic.catalog.cards[matches[0][2][1]])
+        return None
+
+    def _card_pair(self, subject, connector):
+        """
+        The two cards a comparison subject names, or None unless it is exactly
+        card name, connector, card name (each optionally followed by "credit card").
+        """
+        matches = self.card_logic.catalog.name_matcher.find_words(subject)
+        if len(matches) != 2 or matches[0][0] != 0:
+            return None
+        (_, end1, (kind1, row1)), (start2, end2, (kind2, row2)) = matches
+        if kind1 != "card" or kind2 != "card" or row1 == row2:
+            return None
+        if not connector.fullmatch(subject[end1:start2]) or CARD_SUFFIX_PATTERN.sub("", subject[end2:]):
+            return None
+        cards = self.card_logic.catalog.cards
+        return cards[row1], cards[row2]
+
+    def _count(self, issuer):
+        if issuer is None:
+            return f"We currently have **{self.card_logic.count_cards()}** credit cards in our database. Would you like a personalized recommendation?"
+        cards = self.card_logic.catalog.cards_by_issuer(issuer)
+        return (
+            f"We have **{len(cards)}** {cards[0]['issuer']} cards: {', '.join(card['name'] for card in cards)}.\n\n"
+            "Would you like details on any of them?"
+        )
+
+    def _lookup(self, card):
+        card = self.card_logic.lookup_card(card["name"])
+        lines = [
+            f"**{card['name']}** ({card['issuer']})",
+            "",
+            f"![{card['name']}]({card['image']})",
+            "",
+            f"- **Annual fee:** {_inr(card['annual_fee'])} (joining fee {_inr(card['joining_fee'])})",
+            f"- **Benefits:** {_benefits(card['benefits'])}",
+            f"- **Reward rates:** {_rewards(card['rewards'])}",
+            f"- **Minimum credit score:** {card['min_credit_score']}",
+        ]
+        if card.get("perks"):
+            lines.append(f"- **Perks:** {'; '.join(card['perks'])}")
+        if card.get("affiliate_link"):
+            lines += ["", f"[Apply for {card['name']}]({card['affiliate_link']})"]
+        lines += ["", "Would you like to compare it with another card or simulate your rewards?"]
+        return "\n".join(lines)
+
+    def _compare(self, card1, card2):
+        comparison = self.card_logic.compare_cards(card1["name"], card2["name"])
+        if "error" in comparison:
+            return None
+        name1, name2 = comparison["card1"], comparison["card2"]
+        rows = [
+            ("Annual fee", _inr(comparison["annual_fees"][name1]), _inr(comparison["annual_fees"][name2])),
+            ("Benefits", _benefits(comparison["benefits"][name1]), _benefits(comparison["benefits"][name2])),
+        ]
+        for category in comparison["rewards"][name1]:
+            rows.append((
+                f"{category.capitalize()} rewards",
+                f"{comparison['rewards'][name1][category]}%",
+                f"{comparison['rewards'][name2].get(category, 0)}%",
+            ))
+        lines = [f"| | {name1} | {name2} |", "|---|---|---|"]
+        lines += [f"| {label} | {value1} | {value2} |" for label, value1, value2 in rows]
+        lines += ["", "Would you like me to simulate annual rewards on either card based on your spending?"]
+        return f"**{name1} vs {name2}**\n\n" + "\n".join(lines)
+
+
+def _inr(amount):
+    return f"Rs. {amount:,}"
+
+
+def _benefits(benefits):
+    return ", ".join(benefit.replace("_", " ") for benefit in benefits)
+
+
+def _rewards(rewards):
+    return ", ".join(f"{category} {rate}%" for category, rate in rewards.items())
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from agents.session_store import MemoryStore
+
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def new_session_id():
+    """
+    Returns a fresh random session ID.
+    """
+    return secrets.token_urlsafe(24)
+
+
+def is_valid_session_id(session_id):
+    """
+    Checks that a client-supplied session ID looks like one we issued.
+    """
+    return bool(session_id) and bool(_SESSION_ID_PATTERN.match(session_id))
+
+
+class ChatSession:
+    """
+    Conversation state for one user: their OpenAI thread and collected profile.
+    The thread is created lazily on the first message.
+    to_record()/restore() convert the state to and from the compact record kept
+    in the session store; locks and timestamps stay per process.
+    """
+
+    def __init__(self, session_id, thread_id=None, user_data=None):
+        self.session_id = session_id
+        self.thread_id = thread_id
+        self.user_data = user_data if user_data is not None else {}
+        # Turns answered without a run (intents, response cache), written to the thread when it is created
+        self.pending_messages = []
+        # Latest run on the thread (replies are fetched by run)
+        self.last_run_id = None
+        self.created_at = self.last_seen = time.time()
+        # Times this session was saved to the store; a higher stored revision (or
+        # another created_at, after a reset) means another worker moved it on
+        self.revision = 0
+        # Runs on one thread must not overlap, so turns within a session are serialized
+        self.lock = threading.Lock()
+        self.async_lock = asyncio.Lock()  # Same, for the asyncio chat path
+
+    def to_record(self):
+        """
+        Serializes the conversation state.
+        Returns:
+            bytes: Compact JSON record.
+        """
+        return json.dumps({
+            "revision": self.revision,
+            "thread_id": self.thread_id,
+            "user_data": self.user_data,
+            "pending_messages": self.pending_messages,
+            "last_run_id": self.last_run_id,
+            "created_at": self.created_at,
+        }, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def restore(self, data):
+        """
+        Replaces the conversation state with a decoded to_record() record.
+        """
+        self.revision = data["revision"]
+        self.thread_id = data["thread_id"]
+        self.user_data = data["user_data"]
+        self.pending_messages = [tuple(message) for message in data["pending_messages"]]
+        self.last_run_id = data.get("last_run_id")
+        self.created_at = data["created_at"]
+
+
+class SessionManager:
+    """
+    Chat sessions backed by a session store (agents.session_store), so any
+    worker or instance sharing the store can continue a conversation.
+    Live ChatSession objects (with their locks) are kept in a per-process LRU
+    with idle expiry and refreshed from the store when another worker saved a
+    newer revision. Turns of one session are serialized within a process only;
+    concurrent turns on different workers are last-writer-wins.
+    Args:
+        max_sessions (int): Most live sessions kept; the least recently used is evicted first.
+        ttl (float): Seconds of inactivity after which a session is dropped.
+        store: Session store (default: MemoryStore, this process only).
+    """
+
+    def __init__(self, max_sessions=1000, ttl=3600, store=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.store = store if store is not None else MemoryStore(max_sessions)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Returns the session for an ID, creating it if unknown or expired.
+        Args:
+            session_id (str): Session ID from the client.
+        Returns:
+            ChatSession: Live session (most recently used).
+        """
+        record = self.store.load(session_id)
+        data = json.loads(record) if record is not None else None
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_seen > self.ttl:
+                session = None
+            # Saved before but gone from the store: reset or expired elsewhere
+            if session is not None and data is None and session.revision:
+                session = None
+            if session is None:
+                session = ChatSession(session_id)
+                self._sessions[session_id] = session
+            if data is not None and (data["created_at"] != session.created_at or data["revision"] > session.revision):
+                session.restore(data)
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return session
+
+    def save(self, session):
+        """
+        Writes a session's state to the store after a turn.
+        """
+        session.revision += 1
+        self.store.save(session.session_id, session.to_record(), self.ttl)
+
+    def reset(self, session_id):
+        """
+        Replaces a session with a fresh one (new thread, empty profile) on every worker.
+        Returns:
+            ChatSession: The new session.
+        """
+        self.store.delete(session_id)
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        return self.get(session_id)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self, now):
+        # Oldest entries are at the front: drop expired ones, then trim to capacity
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen > self.ttl or len(self._sessions) > self.max_sessions:
+                del self._sessions[session_id]
+            else:
+                break
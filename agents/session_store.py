@@ -0,0 +1,147 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from services.sqlite_util import SqliteConnections
+
+
+class MemoryStore:
+    """
+    Session records in this process only (the default; one worker, or sticky sessions).
+    Least recently used records beyond max_entries are dropped.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            entry = self._records.get(session_id)
+            if entry is None:
+                return None
+            record, expires_at = entry
+            if expires_at <= time.time():
+                del self._records[session_id]
+                return None
+            self._records.move_to_end(session_id)
+            return record
+
+    def save(self, session_id, record, ttl):
+        with self._lock:
+            self._records[session_id] = (record, time.time() + ttl)
+            self._records.move_to_end(session_id)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._records.pop(session_id, None)
+
+
+class SqliteStore:
+    """
+    Session records in a SQLite file shared by every worker on the host
+    (WAL mode, one connection per thread). Expired records are purged on write.
+    """
+
+    def __init__(self, path):
+        self.db = SqliteConnections(path)
+        self.db.connect().execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, record BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def load(self, session_id):
+        row = self.db.connect().execute(
+            "SELECT record FROM sessions WHERE id = ? AND expires_at > ?", (session_id, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, session_id, record, ttl):
+        conn = self.db.connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, record, expires_at) VALUES (?, ?, ?)", (session_id, record, now + ttl)
+        )
+        if self.db.purge_due():
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def delete(self, session_id):
+        self.db.connect().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+class RedisStore:
+    """
+    Session records in Redis (or anything speaking its get/set/delete API),
+    shared by every worker and instance; Redis expires them.
+    Args:
+        client: redis.Redis-compatible client (e.g. redis.Redis.from_url(...) or LocalRedis).
+        prefix (str): Key prefix.
+    """
+
+    def __init__(self, client, prefix="session:"):
+        self.client = client
+        self.prefix = prefix
+
+    def load(self, session_id):
+        return self.client.get(self.prefix + session_id)
+
+    def save(self, session_id, record, ttl):
+        self.client.set(self.prefix + session_id, record, ex=max(1, math.ceil(ttl)))
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the subset of the redis.Redis API RedisStore uses
+    (get, set with ex, delete), for tests and local runs without a Redis server.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, None))
+            if expires_at is not None and expires_at <= time.time():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._values[key] = (value if isinstance(value, bytes) else str(value).encode(), time.time() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._values.pop(key, None) is not None for key in keys)
+
+
+def store_from_env(max_sessions=1000):
+    """
+    Builds the session store from SESSION_STORE ('memory', 'sqlite' or 'redis'),
+    SESSION_STORE_PATH (sqlite file) and REDIS_URL.
+    Args:
+        max_sessions (int): Size bound of the memory store.
+    Returns:
+        MemoryStore | SqliteStore | RedisStore: Configured store.
+    """
+    backend = os.getenv("SESSION_STORE", "memory")
+    if backend == "sqlite":
+        return SqliteStore(os.getenv("SESSION_STORE_PATH", ".sessions.sqlite3"))
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("SESSION_STORE=redis needs the redis package (pip install redis)") from None
+        return RedisStore(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_STORE {backend!r} (expected memory, sqlite or redis)")
+    return MemoryStore(max_sessions)
@@ -0,0 +1,134 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.tools.recommend import recommend_tool
+from cards.compare import compare_tool
+from cards.count import count_tool
+from cards.lookup import lookup_tool
+from cards.profile import profile_tool
+from cards.simulate import simulate_tool
+from cards.wallet import wallet_tool
+from services.metrics import TOOL_CALL_ERRORS, TOOL_CALL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _profile(arguments, session):
+    # The profile lives on the session and is sent with every run, so partial
+    # updates (e.g. one spending category) merge into what was collected before
+    for key, value in arguments.items():
+        if isinstance(value, dict) and isinstance(session.user_data.get(key), dict):
+            session.user_data[key] = {**session.user_data[key], **value}
+        else:
+            session.user_data[key] = value
+    return profile_tool(session.user_data)
+
+
+def _wallet(arguments, session):
+    # Falls back to the spending and cards stored by the profile tool
+    user_data = {**session.user_data, **{key: value for key, value in arguments.items() if key != "candidate"}}
+    return wallet_tool(user_data, arguments.get("candidate"))
+
+
+# Tool name (as declared to the Assistant) -> handler(arguments, session)
+TOOL_HANDLERS = {
+    "recommend": lambda arguments, session: recommend_tool(arguments),
+    "lookup": lambda arguments, session: lookup_tool(arguments["card_name"]),
+    "count": lambda arguments, session: count_tool(),
+    "profile": _profile,
+    "compare": lambda arguments, session: compare_tool(arguments["card_name1"], arguments["card_name2"]),
+    "simulate": lambda arguments, session: simulate_tool(arguments["card_name"], arguments["spending_habits"]),
+    "wallet": _wallet,
+}
+
+# Tools that write the session; run one after another, before the rest of the round
+SESSION_WRITING_TOOLS = frozenset({"profile"})
+
+
+class ToolDispatcher:
+    """
+    Runs the tool calls of a requires_action round through TOOL_HANDLERS.
+    Calls in one round are independent, so they run concurrently on a thread pool,
+    except SESSION_WRITING_TOOLS, which run first and in call order so their
+    read-merge-write updates of the session never interleave. Per-tool call
+    counts and latencies are kept for diagnostics.
+    Args:
+        max_workers (int): Thread pool size shared by all rounds.
+    """
+
+    def __init__(self, max_workers=4, handlers=None):
+        self.handlers = handlers if handlers is not None else TOOL_HANDLERS
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def dispatch(self, tool_calls, session):
+        """
+        Execute a round of tool calls.
+        Args:
+            tool_calls (list): Tool calls from run.required_action.submit_tool_outputs.
+            session (ChatSession): Conversation the calls belong to.
+        Returns:
+            list: Tool outputs, in call order, ready for submit_tool_outputs.
+        """
+        outputs = [None] * len(tool_calls)
+        parallel = []
+        for i, tool_call in enumerate(tool_calls):
+            if tool_call.function.name in SESSION_WRITING_TOOLS:
+                outputs[i] = self._call(tool_call, session)
+            else:
+                parallel.append(i)
+        if len(parallel) == 1:
+            outputs[parallel[0]] = self._call(tool_calls[parallel[0]], session)
+        elif parallel:
+            results = self._executor.map(lambda i: self._call(tool_calls[i], session), parallel)
+            for i, output in zip(parallel, results):
+                outputs[i] = output
+        return [
+            {"tool_call_id": tool_call.id, "output": json.dumps(output)}
+            for tool_call, output in zip(tool_calls, outputs)
+        ]
+
+    def stats(self):
+        """
+        Per-tool call counts and latencies.
+        Returns:
+            dict: {tool: {"calls", "errors", "total_seconds", "max_seconds"}}.
+        """
+        with self._stats_lock:
+            return {name: dict(stat) for name, stat in self._stats.items()}
+
+    def _call(self, tool_call, session):
+        function_name = tool_call.function.name
+        handler = self.handlers.get(function_name)
+        if handler is None:
+            return {"error": "Unknown function"}
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            return handler(json.loads(tool_call.function.arguments), session)
+        except Exception as e:
+            # Report to the model so it can tell the user, instead of failing the turn
+            failed = True
+            logger.exception("Tool %s failed", function_name)
+            return {"error": f"Tool '{function_name}' failed: {e}"}
+        finally:
+            self._record(function_name, time.perf_counter() - started, failed)
+
+    def _record(self, function_name, elapsed, failed):
+        with self._stats_lock:
+            stat = self._stats.setdefault(
+                function_name, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            )
+            stat["calls"] += 1
+            stat["errors"] += failed
+            stat["total_seconds"] += elapsed
+            stat["max_seconds"] = max(stat["max_seconds"], elapsed)
+        TOOL_CALL_SECONDS.observe(elapsed, tool=function_name)
+        if failed:
+            TOOL_CALL_ERRORS.inc(tool=function_name)
+        logger.debug("Tool %s took %.1f ms", function_name, elapsed * 1000)
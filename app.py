@@ -1,43 +1,192 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from agents.base_agent import CreditCardAssistant
+from agents.session import SessionManager, is_valid_session_id, new_session_id
+from agents.session_store import store_from_env
+from services.card_logic import CardLogic
+from services.catalog import CatalogWatcher, get_catalog, reload_catalog
+from services.metrics import REGISTRY, dump_profile, new_profile
+import hmac
+import json
 import os
 
-def create_app():
+SESSION_COOKIE = "chat_session"
+SESSION_HEADER = "X-Session-ID"
+PROFILE_HEADER = "X-Profile"
+
+def create_app(sync_chat=True):
+    """
+    Builds the Flask app.
+    Args:
+        sync_chat (bool): Serve /chat and /chat/stream with the sync assistant;
+            asgi.py passes False, as it serves those routes asynchronously.
+    Returns:
+        Flask: The app; its sessions (and assistant, if any) are in app.extensions.
+    """
     app = Flask(__name__)
-    assistant = None
 
-    def initialize_assistant():
-        nonlocal assistant
-        assistant = CreditCardAssistant()
+    # Poll data/cards.json in the background and hot-swap the catalog on change
+    # (CATALOG_RELOAD_INTERVAL seconds; 0 disables)
+    reload_interval = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+    if reload_interval > 0:
+        CatalogWatcher(interval=reload_interval).start()
+
+    # One assistant per process; each browser session gets its own thread and profile,
+    # kept in the SESSION_STORE backend so any worker can continue the conversation
+    assistant = CreditCardAssistant() if sync_chat else None
+    max_sessions = int(os.getenv("MAX_SESSIONS", "1000"))
+    sessions = SessionManager(
+        max_sessions=max_sessions,
+        ttl=float(os.getenv("SESSION_TTL", "3600")),
+        store=store_from_env(max_sessions),
+    )
+    card_logic = CardLogic()
+    # Shared with the ASGI entry point (asgi.py), which serves chat turns asynchronously
+    app.extensions["sessions"] = sessions
+    if assistant is not None:
+        app.extensions["assistant"] = assistant
+
+    # Opt-in cProfile dumps: with PROFILE_REQUESTS=1, requests sending "X-Profile: 1"
+    # are profiled and written to PROFILE_DIR (streamed bodies only up to the first chunk)
+    profile_requests = os.getenv("PROFILE_REQUESTS", "0") == "1"
+    profile_dir = os.getenv("PROFILE_DIR", "profiles")
+
+    def current_session_id():
+        """Session ID from the X-Session-ID header or cookie, issuing a new one if missing."""
+        session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        if not is_valid_session_id(session_id):
+            session_id = new_session_id()
+            g.new_session_id = session_id
+        return session_id
+
+    @app.before_request
+    def start_profile():
+        if profile_requests and request.headers.get(PROFILE_HEADER) == "1":
+            g.profile = new_profile()
+
+    @app.teardown_request
+    def finish_profile(exc):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+            dump_profile(profile, f"{request.method}-{request.path}", profile_dir)
 
-    initialize_assistant()
+    @app.after_request
+    def set_session_cookie(response):
+        new_id = g.pop("new_session_id", None)
+        if new_id:
+            response.set_cookie(SESSION_COOKIE, new_id, httponly=True, samesite="Lax", secure=request.is_secure)
+            response.headers[SESSION_HEADER] = new_id
+        return response
 
     @app.route("/")
     def index():
         """Render the chat UI."""
         return render_template("index.html")
 
-    @app.route("/chat", methods=["POST"])
-    def chat():
-        """Handle user messages and return assistant responses."""
-        try:
-            user_message = request.json.get("message")
+    if sync_chat:
+        @app.route("/chat", methods=["POST"])
+        def chat():
+            """Handle user messages and return assistant responses."""
+            try:
+                user_message = request.json.get("message")
+                if not user_message:
+                    return jsonify({"error": "No message provided"}), 400
+
+                # Process the message through the assistant
+                session = sessions.get(current_session_id())
+                try:
+                    response = assistant.process_message(user_message, session)
+                finally:
+                    sessions.save(session)
+                return jsonify({"response": response})
+            except Exception as e:
+                return jsonify({"error": str(e)}), 500
+
+        @app.route("/chat/stream", methods=["POST"])
+        def chat_stream():
+            """Stream the assistant's response as Server-Sent Events, one text delta per event."""
+            user_message = (request.get_json(silent=True) or {}).get("message")
             if not user_message:
                 return jsonify({"error": "No message provided"}), 400
+            session = sessions.get(current_session_id())
 
-            # Process the message through the assistant
-            response = assistant.process_message(user_message)
-            return jsonify({"response": response})
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
+            def generate():
+                try:
+                    for delta in assistant.stream_message(user_message, session):
+                        yield f"data: {json.dumps({'delta': delta})}\n\n"
+                    yield "event: done\ndata: {}\n\n"
+                except Exception as e:
+                    yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                finally:
+                    sessions.save(session)
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
 
     @app.route("/reset", methods=["POST"])
     def reset():
-        """Reset the assistant for a new conversation."""
+        """Start a new conversation for this session only."""
         try:
-            initialize_assistant()
+            sessions.reset(current_session_id())
             return jsonify({"status": "Conversation reset"}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    @app.route("/recommend/batch", methods=["POST"])
+    def recommend_batch():
+        """
+        Score many profiles without the LLM, streamed back as JSON Lines.
+        Accepts a JSON array (or {"profiles": [...]}) or an application/x-ndjson body
+        with one profile per line. Each output line is {"index": i, "recommendations": [...]}
+        or {"index": i, "error": "..."}.
+        """
+        if request.mimetype == "application/x-ndjson":
+            def parse_lines(stream):
+                for line in stream:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None  # Reported as an invalid profile
+
+            profiles = parse_lines(request.stream)
+        else:
+            payload = request.get_json(silent=True)
+            if isinstance(payload, dict):
+                payload = payload.get("profiles")
+            if not isinstance(payload, list):
+                return jsonify({"error": "Expected a JSON array of profiles"}), 400
+            profiles = payload
+
+        def generate():
+            for index, result in enumerate(card_logic.recommend_batch(profiles)):
+                if isinstance(result, dict):
+                    yield json.dumps({"index": index, **result}) + "\n"
+                else:
+                    yield json.dumps({"index": index, "recommendations": result}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    @app.route("/metrics")
+    def metrics():
+        """Prometheus metrics of this worker process (chat turns, OpenAI calls, caches, tools)."""
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/admin/reload-catalog", methods=["POST"])
+    def reload_cards():
+        """Force a catalog reload in this worker (requires ADMIN_TOKEN)."""
+        admin_token = os.getenv("ADMIN_TOKEN")
+        if not admin_token or not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), admin_token):
+            return jsonify({"error": "Forbidden"}), 403
+        try:
+            reloaded = reload_catalog(force=True)
+            catalog = get_catalog()
+            return jsonify({"reloaded": reloaded, "version": catalog.version, "count": len(catalog)}), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
     return app
\ No newline at end of file
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+from http.cookies import SimpleCookie
+
+from asgiref.wsgi import WsgiToAsgi
+from dotenv import load_dotenv
+
+from agents.async_agent import AsyncCreditCardAssistant, close_async_client
+from agents.session import is_valid_session_id, new_session_id
+from app import SESSION_COOKIE, SESSION_HEADER, create_app
+
+# Load environment variables from .env
+load_dotenv()
+
+# Chat turns are served by the asyncio assistant; every other route is the
+# regular Flask app, built without its sync assistant. Run with e.g.
+#   gunicorn -k uvicorn.workers.UvicornWorker -w 2 asgi:app
+flask_app = create_app(sync_chat=False)
+wsgi_app = WsgiToAsgi(flask_app)
+sessions = flask_app.extensions["sessions"]
+assistant = AsyncCreditCardAssistant()
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/chat":
+        await _chat(scope, receive, send)
+    elif scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/chat/stream":
+        await _chat_stream(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
+
+
+async def _chat(scope, receive, send):
+    """Async equivalent of the Flask /chat route."""
+    session_id, new_id = _session_id(scope)
+    session_headers = _session_headers(scope, new_id)
+    try:
+        user_message = (await _read_json(receive)).get("message")
+        if not user_message:
+            return await _send_json(send, 400, {"error": "No message provided"}, session_headers)
+        # Store I/O (SQLite, Redis) runs off the event loop
+        session = await asyncio.to_thread(sessions.get, session_id)
+        try:
+            response = await assistant.process_message(user_message, session)
+        finally:
+            await asyncio.to_thread(sessions.save, session)
+        await _send_json(send, 200, {"response": response}, session_headers)
+    except Exception as e:
+        await _send_json(send, 500, {"error": str(e)}, session_headers)
+
+
+async def _chat_stream(scope, receive, send):
+    """Async equivalent of the Flask /chat/stream route (Server-Sent Events)."""
+    session_id, new_id = _session_id(scope)
+    session_headers = _session_headers(scope, new_id)
+    try:
+        user_message = (await _read_json(receive)).get("message")
+    except ValueError:
+        user_message = None
+    if not user_message:
+        return await _send_json(send, 400, {"error": "No message provided"}, session_headers)
+    # Before the response starts, so a store failure still gets a proper status
+    try:
+        session = await asyncio.to_thread(sessions.get, session_id)
+    except Exception as e:
+        return await _send_json(send, 500, {"error": str(e)}, session_headers)
+
+    headers = [
+        (b"content-type", b"text/event-stream"),
+        (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"),
+    ]
+    await send({"type": "http.response.start", "status": 200, "headers": headers + session_headers})
+    try:
+        async for delta in assistant.stream_message(user_message, session):
+            await send({"type": "http.response.body", "body": f"data: {json.dumps({'delta': delta})}\n\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b"event: done\ndata: {}\n\n", "more_body": True})
+    except Exception as e:
+        await send({"type": "http.response.body", "body": f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n".encode(), "more_body": True})
+    finally:
+        await asyncio.to_thread(sessions.save, session)
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _session_id(scope):
+    """Same rules as the Flask app: X-Session-ID header, then cookie, else a new ID."""
+    headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+    session_id = headers.get(SESSION_HEADER.lower())
+    if not session_id and "cookie" in headers:
+        morsel = SimpleCookie(headers["cookie"]).get(SESSION_COOKIE)
+        session_id = morsel.value if morsel else None
+    if is_valid_session_id(session_id):
+        return session_id, None
+    session_id = new_session_id()
+    return session_id, session_id
+
+
+def _session_headers(scope, new_id):
+    """Cookie and header for a newly issued ID; Secure over HTTPS, like the Flask app."""
+    if not new_id:
+        return []
+    secure = "; Secure" if scope.get("scheme") == "https" else ""
+    return [
+        (b"set-cookie", f"{SESSION_COOKIE}={new_id}; HttpOnly; Path=/; SameSite=Lax{secure}".encode()),
+        (SESSION_HEADER.lower().encode(), new_id.encode()),
+    ]
+
+
+async def _read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not message.get("more_body"):
+            break
+    payload = json.loads(body or b"{}")
+    return payload if isinstance(payload, dict) else {}
+
+
+async def _send_json(send, status, payload, session_headers=()):
+    body = json.dumps(payload).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers + list(session_headers)})
+    await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("asgi:app", host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
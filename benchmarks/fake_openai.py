@@ -0,0 +1,149 @@
+"""
+In-process stand-in for the parts of the OpenAI Assistants API the agent uses.
+Every API call sleeps for a configurable latency, so the chat path can be
+load-tested without network access or cost.
+"""
+import itertools
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from agents.base_agent import assistant_spec_hash
+
+
+class FakeAssistantsClient:
+    """
+    Drop-in for OpenAI().beta (assistant, thread, message and run calls).
+    A run stays in progress for `polls` retrieves, then asks for `tool_rounds`
+    rounds of the recommend tool, then completes with a short reply.
+    Args:
+        latency (float): Seconds each API call takes.
+        polls (int): Retrieves before a run changes state.
+        tool_rounds (int): requires_action rounds per run.
+    """
+
+    def __init__(self, latency=0.05, polls=2, tool_rounds=1):
+        self.latency = latency
+        self.polls = polls
+        self.tool_rounds = tool_rounds
+        self.calls = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._assistants = {}
+        self._threads = {}
+        self._runs = {}
+
+        runs = SimpleNamespace(
+            create=self._api(self._create_run),
+            retrieve=self._api(self._retrieve_run),
+            submit_tool_outputs=self._api(self._submit_tool_outputs),
+            cancel=self._api(self._cancel_run),
+        )
+        messages = SimpleNamespace(create=self._api(self._create_message), list=self._api(self._list_messages))
+        self.beta = SimpleNamespace(
+            assistants=SimpleNamespace(
+                create=self._api(self._create_assistant),
+                retrieve=self._api(self._retrieve_assistant),
+            ),
+            threads=SimpleNamespace(create=self._api(self._create_thread), messages=messages, runs=runs),
+        )
+
+    def _api(self, handler):
+        name = handler.__name__.lstrip("_")
+
+        def call(*args, **kwargs):
+            time.sleep(self.latency)
+            with self._lock:
+                self.calls[name] = self.calls.get(name, 0) + 1
+                return handler(*args, **kwargs)
+
+        return call
+
+    def _new_id(self, prefix):
+        return f"{prefix}_{next(self._ids)}"
+
+    def _message(self, role, text, run_id=None):
+        return SimpleNamespace(
+            id=self._new_id("msg"),
+            role=role,
+            run_id=run_id,
+            content=[SimpleNamespace(type="text", text=SimpleNamespace(value=text))],
+        )
+
+    def _create_assistant(self, metadata=None, **kwargs):
+        assistant_id = self._new_id("asst")
+        self._assistants[assistant_id] = metadata or {}
+        return SimpleNamespace(id=assistant_id, metadata=metadata or {})
+
+    def _retrieve_assistant(self, assistant_id, **kwargs):
+        # A pinned ID (OPENAI_ASSISTANT_ID) stands for an assistant built from the current spec
+        metadata = self._assistants.get(assistant_id, {"spec_hash": assistant_spec_hash()})
+        return SimpleNamespace(id=assistant_id, metadata=metadata)
+
+    def _create_thread(self, messages=(), **kwargs):
+        thread_id = self._new_id("thread")
+        # Newest first, as messages.list returns them
+        self._threads[thread_id] = [self._message(m["role"], m["content"]) for m in reversed(messages)]
+        return SimpleNamespace(id=thread_id)
+
+    def _create_message(self, thread_id, role, content, **kwargs):
+        message = self._message(role, content)
+        self._threads[thread_id].insert(0, message)
+        return message
+
+    def _list_messages(self, thread_id, run_id=None, limit=20, **kwargs):
+        data = [m for m in self._threads[thread_id] if run_id is None or m.run_id == run_id]
+        return SimpleNamespace(data=data[:limit])
+
+    def _create_run(self, thread_id, assistant_id, **kwargs):
+        run = SimpleNamespace(
+            id=self._new_id("run"), thread_id=thread_id, status="queued",
+            required_action=None, polls=0, rounds=0,
+        )
+        self._runs[run.id] = run
+        return self._snapshot(run)
+
+    def _retrieve_run(self, run_id, thread_id, **kwargs):
+        run = self._runs[run_id]
+        run.polls += 1
+        if run.status in ("queued", "in_progress") and run.polls > self.polls:
+            if run.rounds < self.tool_rounds:
+                run.rounds += 1
+                run.status = "requires_action"
+                run.required_action = SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=[
+                    SimpleNamespace(
+                        id=self._new_id("call"),
+                        function=SimpleNamespace(name="recommend", arguments=json.dumps(_TOOL_PROFILE)),
+                    )
+                ]))
+            else:
+                run.status = "completed"
+                self._threads[thread_id].insert(0, self._message("assistant", "Here are your cards.", run_id))
+        elif run.status == "queued":
+            run.status = "in_progress"
+        return self._snapshot(run)
+
+    def _submit_tool_outputs(self, run_id, thread_id, tool_outputs, **kwargs):
+        run = self._runs[run_id]
+        run.status = "in_progress"
+        run.required_action = None
+        run.polls = 0
+        return self._snapshot(run)
+
+    def _cancel_run(self, run_id, thread_id, **kwargs):
+        self._runs[run_id].status = "cancelled"
+        return self._snapshot(self._runs[run_id])
+
+    def _snapshot(self, run):
+        return SimpleNamespace(**vars(run))
+
+
+# Arguments of the scripted recommend tool call
+_TOOL_PROFILE = {
+    "monthly_income": 80000,
+    "spending_habits": {"fuel": 3000, "travel": 8000, "groceries": 10000, "dining": 6000},
+    "preferred_benefits": ["cashback"],
+    "existing_cards": ["none"],
+    "credit_score": "750",
+}
@@ -0,0 +1,263 @@
+"""
+Benchmarks CardLogic over synthetic catalogs and load-tests the Flask /chat route
+against FakeAssistantsClient. Prints p50/p95/p99 latencies and throughput and
+writes them to a JSON file; pass an earlier file as --baseline to compare.
+
+    python -m benchmarks.run --sizes 10,1000,100000 --output bench.json
+    python -m benchmarks.run --baseline bench.json --output bench-new.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.fake_openai import FakeAssistantsClient
+from benchmarks.synthetic import make_cards, make_profiles, write_cards
+from services import catalog_binary
+from services.card_logic import CardLogic
+from services.catalog import CardCatalog, reload_catalog
+
+# Benchmarks measure uncached work on a fixed catalog without real OpenAI calls;
+# explicitly set environment variables still win
+BENCHMARK_ENV = {
+    "RESULT_CACHE_BACKEND": "off",
+    "RESPONSE_CACHE_BACKEND": "off",
+    "CATALOG_RELOAD_INTERVAL": "0",
+    "OPENAI_API_KEY": "benchmark",
+    "OPENAI_ASSISTANT_ID": "asst_benchmark",
+}
+
+DEFAULT_SIZES = "10,100,1000,10000,100000"
+
+
+def summarize(latencies, elapsed=None):
+    """
+    Latency percentiles (ms) and throughput for one measured operation.
+    Args:
+        latencies (list): Seconds per call.
+        elapsed (float): Wall time of the whole run (default: sum of latencies).
+    Returns:
+        dict: n, mean/p50/p95/p99/max in ms, and ops_per_second.
+    """
+    ms = np.asarray(latencies) * 1000
+    elapsed = elapsed if elapsed is not None else float(np.sum(latencies))
+    return {
+        "n": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "ops_per_second": len(ms) / elapsed if elapsed else 0.0,
+    }
+
+
+def timed(function, inputs):
+    latencies = []
+    for args in inputs:
+        start = time.perf_counter()
+        function(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_card_logic(size, iterations, batch_profiles, seed, workdir):
+    """
+    Times catalog loading and every CardLogic operation on a catalog of `size` cards.
+    Returns:
+        list: One result dict per operation.
+    """
+    cards = make_cards(size, seed)
+    path = os.path.join(workdir, f"cards-{size}.json")
+    write_cards(cards, path)
+    results = []
+
+    def record(operation, stats):
+        results.append({"cards": size, "operation": operation, **stats})
+
+    start = time.perf_counter()
+    CardCatalog.from_file(path)
+    record("load_json", summarize([time.perf_counter() - start]))
+    catalog_binary.compile_catalog(path, os.path.splitext(path)[0] + ".bin")
+    start = time.perf_counter()
+    CardCatalog.from_binary(os.path.splitext(path)[0] + ".bin")
+    record("load_binary", summarize([time.perf_counter() - start]))
+
+    # Publish the synthetic catalog, with its indexes built, as the process-wide one
+    reload_catalog(force=True, path=path)
+    card_logic = CardLogic()
+    profiles = make_profiles(cards, iterations, seed)
+    names = [card["name"] for card in cards]
+    rng = np.random.default_rng(seed)
+    picks = [names[i] for i in rng.integers(0, size, iterations * 2)]
+    misspelt = [name.lower().replace("a", "e", 1) for name in picks]
+
+    record("recommend_cards", summarize(timed(card_logic.recommend_cards, [(p,) for p in profiles])))
+    record("lookup_card", summarize(timed(card_logic.lookup_card, [(name,) for name in picks[:iterations]])))
+    record("lookup_card_fuzzy", summarize(timed(card_logic.lookup_card, [(name,) for name in misspelt[:iterations]])))
+    record("compare_cards", summarize(timed(card_logic.compare_cards, list(zip(picks[:iterations], picks[iterations:])))))
+    record("simulate_rewards", summarize(timed(
+        card_logic.simulate_rewards, [(name, p["spending_habits"]) for name, p in zip(picks, profiles)]
+    )))
+
+    batch = make_profiles(cards, batch_profiles, seed + 1)
+    start = time.perf_counter()
+    batch_results = list(card_logic.recommend_batch(batch))
+    elapsed = time.perf_counter() - start
+    stats = summarize([elapsed / len(batch)] * len(batch), elapsed)
+    # The batch path must agree with one-by-one recommendations
+    stats["mismatches"] = sum(
+        result != card_logic.recommend_cards(profile) for result, profile in zip(batch_results[:100], batch[:100])
+    )
+    record("recommend_batch", stats)
+    return results
+
+
+def bench_chat(requests, concurrency, latency, polls, tool_rounds, size, seed, workdir):
+    """
+    Load-tests POST /chat: `concurrency` clients, each with its own session,
+    send `requests` messages in total to an app backed by FakeAssistantsClient.
+    Returns:
+        dict: Latency/throughput summary plus API calls per turn.
+    """
+    from app import create_app
+
+    path = os.path.join(workdir, f"chat-cards-{size}.json")
+    write_cards(make_cards(size, seed), path)
+    reload_catalog(force=True, path=path)
+
+    app = create_app()
+    fake = FakeAssistantsClient(latency=latency, polls=polls, tool_rounds=tool_rounds)
+    app.extensions["assistant"].client = fake
+
+    def client_loop(client_id, count):
+        client = app.test_client()
+        headers = {"X-Session-ID": f"benchmark-session-{client_id:06d}"}
+        latencies = []
+        errors = 0
+        for i in range(count):
+            # Distinct wording keeps every turn off the local intent and opener shortcuts
+            message = f"Which card suits my spending? Request {client_id}-{i}"
+            start = time.perf_counter()
+            response = client.post("/chat", json={"message": message}, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+        return latencies, errors
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(client_loop, range(concurrency), shares))
+    elapsed = time.perf_counter() - start
+
+    latencies = [value for client_latencies, _ in outcomes for value in client_latencies]
+    stats = summarize(latencies, elapsed)
+    stats.update({
+        "cards": size,
+        "concurrency": concurrency,
+        "api_latency_ms": latency * 1000,
+        "errors": sum(errors for _, errors in outcomes),
+        "api_calls_per_turn": sum(fake.calls.values()) / max(len(latencies), 1),
+        "api_calls": dict(sorted(fake.calls.items())),
+    })
+    return stats
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline):
+    """
+    Prints p50/p95 changes against a previous results file.
+    """
+    previous = {(r["cards"], r["operation"]): r for r in baseline.get("card_logic", [])}
+    print(f"\nAgainst {baseline.get('environment', {}).get('commit') or 'baseline'} (ratio new/old, >1 is slower):")
+    for result in results["card_logic"]:
+        old = previous.get((result["cards"], result["operation"]))
+        if old and old["p50_ms"] and old["p95_ms"]:
+            print(
+                f"  {result['cards']:>7} {result['operation']:<18} "
+                f"p50 x{result['p50_ms'] / old['p50_ms']:.2f}  p95 x{result['p95_ms'] / old['p95_ms']:.2f}"
+            )
+    if results.get("chat") and baseline.get("chat"):
+        old, new = baseline["chat"], results["chat"]
+        print(
+            f"  chat p50 x{new['p50_ms'] / old['p50_ms']:.2f}  p95 x{new['p95_ms'] / old['p95_ms']:.2f}  "
+            f"throughput x{new['ops_per_second'] / old['ops_per_second']:.2f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated catalog sizes")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per CardLogic operation")
+    parser.add_argument("--batch-profiles", type=int, default=1000, help="Profiles for recommend_batch")
+    parser.add_argument("--chat-requests", type=int, default=200, help="/chat requests (0 skips the load test)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent /chat clients")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake OpenAI API call")
+    parser.add_argument("--polls", type=int, default=2, help="Run polls before each state change")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="Tool-call rounds per run")
+    parser.add_argument("--chat-cards", type=int, default=1000, help="Catalog size for the /chat load test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    for name, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(name, value)
+
+    results = {"environment": environment(), "settings": vars(args), "card_logic": [], "chat": None}
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'cards':>7} {'operation':<18} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+        for size in (int(value) for value in args.sizes.split(",")):
+            for result in bench_card_logic(size, args.iterations, args.batch_profiles, args.seed, workdir):
+                results["card_logic"].append(result)
+                print(
+                    f"{size:>7} {result['operation']:<18} {result['n']:>6} {result['p50_ms']:>9.3f} "
+                    f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['ops_per_second']:>10.1f}"
+                )
+
+        if args.chat_requests > 0:
+            chat = bench_chat(
+                args.chat_requests, args.concurrency, args.latency, args.polls,
+                args.tool_rounds, args.chat_cards, args.seed, workdir,
+            )
+            results["chat"] = chat
+            print(
+                f"\n/chat x{chat['n']} ({chat['concurrency']} clients, {chat['api_latency_ms']:.0f} ms per API call): "
+                f"p50 {chat['p50_ms']:.1f} ms, p95 {chat['p95_ms']:.1f} ms, p99 {chat['p99_ms']:.1f} ms, "
+                f"{chat['ops_per_second']:.1f} turns/s, {chat['api_calls_per_turn']:.1f} API calls/turn, "
+                f"{chat['errors']} errors"
+            )
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Synthetic card catalogs and user profiles in the cards.json / recommend schema.
+Output is deterministic for a given seed, so runs on different commits compare.
+"""
+import json
+import random
+
+from services.scoring import REWARD_CATEGORIES
+
+ISSUERS = (
+    ("HDFC", "HDFC Bank"),
+    ("SBI", "State Bank of India"),
+    ("Axis", "Axis Bank"),
+    ("ICICI", "ICICI Bank"),
+    ("Amex", "American Express"),
+    ("Standard Chartered", "Standard Chartered"),
+    ("Kotak", "Kotak Mahindra Bank"),
+    ("Yes", "Yes Bank"),
+)
+SERIES = (
+    "Regalia", "Millennia", "Infinia", "Magnus", "Sapphire", "Coral", "Elite", "Prime",
+    "Pulse", "Platinum", "Gold", "Neo", "Privilege", "Freedom", "Vistara", "Smart",
+)
+VARIANTS = ("", "Select", "Plus", "Signature", "Metal", "Lite", "Pro", "World")
+BENEFITS = ("cashback", "travel_points", "lounge_access")
+CREDIT_SCORES = (650, 700, 750, 800)
+PERKS = (
+    "5% cashback on online shopping",
+    "Complimentary lounge visits",
+    "1% fuel surcharge waiver",
+    "Welcome vouchers",
+    "Movie ticket offers",
+)
+
+
+def make_cards(count, seed=0):
+    """
+    Builds a synthetic card list with unique names.
+    Args:
+        count (int): Number of cards.
+        seed (int): Random seed.
+    Returns:
+        list: Card dicts in the cards.json schema.
+    """
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        prefix, issuer = ISSUERS[i % len(ISSUERS)]
+        name = " ".join(part for part in (prefix, rng.choice(SERIES), rng.choice(VARIANTS), str(i)) if part)
+        fee = rng.choice((0, 499, 999, 2500, 5000, 10000))
+        cards.append({
+            "name": name,
+            "issuer": issuer,
+            "image": f"https://example.com/cards/{i}.png",
+            "joining_fee": fee,
+            "annual_fee": fee,
+            "benefits": rng.sample(BENEFITS, rng.randint(1, len(BENEFITS))),
+            "rewards": {category: rng.randint(1, 10) for category in REWARD_CATEGORIES},
+            "min_credit_score": rng.choice(CREDIT_SCORES),
+            "perks": rng.sample(PERKS, 2),
+            "affiliate_link": f"https://example.com/apply/{i}",
+        })
+    return cards
+
+
+def make_profiles(cards, count, seed=0):
+    """
+    Builds synthetic user profiles as the recommend tool receives them.
+    Some name existing cards, a few with a typo, to exercise name resolution.
+    Args:
+        cards (list): Catalog the profiles refer to.
+        count (int): Number of profiles.
+        seed (int): Random seed.
+    Returns:
+        list: user_data dicts.
+    """
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        existing = [rng.choice(cards)["name"] for _ in range(rng.choice((0, 0, 1, 2)))]
+        if existing and rng.random() < 0.2:
+            existing[0] = existing[0].lower().replace("a", "e", 1)
+        low = rng.choice(CREDIT_SCORES)
+        profiles.append({
+            "monthly_income": rng.choice((30000, 50000, 100000, 250000)),
+            "spending_habits": {category: rng.randrange(0, 40000, 500) for category in REWARD_CATEGORIES},
+            "preferred_benefits": rng.sample(BENEFITS, rng.randint(0, 2)),
+            "existing_cards": existing or ["none"],
+            "credit_score": rng.choice(("unknown", str(low), f"{low}–{low + 100}")),
+        })
+    return profiles
+
+
+def write_cards(cards, path):
+    with open(path, "w") as f:
+        json.dump(cards, f)
@@ -0,0 +1,14 @@
+from services.card_logic import CardLogic
+
+def wallet_tool(user_data, candidate=None):
+    """
+    Chooses which card to use for each spending category.
+    Args:
+        user_data (dict): Contains spending_habits and existing_cards.
+        candidate (str): Optional card the user is considering adding.
+    Returns:
+        dict: Card per category, annual rewards and fees, or error message.
+    """
+    card_logic = CardLogic()
+    result = card_logic.optimize_wallet(user_data, candidate)
+    return result
\ No newline at end of file
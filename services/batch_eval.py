@@ -0,0 +1,335 @@
+"""
+Re-scores logged profiles through CardLogic without the LLM, e.g. after a
+catalog or scoring change. Reads JSON Lines input lazily, scores chunks on a
+process pool (each chunk as one CardLogic.recommend_batch call) and writes
+results in input order; latency percentiles come from a fixed-size sample,
+so memory stays bounded for inputs of any length.
+
+    python -m services.batch_eval profiles.jsonl --output scored.jsonl
+    python -m services.batch_eval requests.jsonl.gz --output scored.parquet --format parquet
+
+Each input line is a profile as the recommend tool receives it, or an object
+holding one under "profile", "user_data" or "arguments" (with an optional
+"id" or "request_id"). Each output record holds the recommendations, the
+simulated rewards of every recommended card and per-record timings in ms.
+Parquet output needs pyarrow.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from services.card_logic import CardLogic
+from services.catalog import get_catalog, reload_catalog
+
+logger = logging.getLogger(__name__)
+
+# Every record is scored afresh (historical traffic rarely repeats within a
+# worker's cache); explicitly set environment variables still win
+BATCH_ENV = {
+    "RESULT_CACHE_BACKEND": "off",
+}
+
+# Keys a log record may nest the profile under (the recommend tool's arguments,
+# a session's user_data, ...)
+PROFILE_KEYS = ("profile", "user_data", "arguments")
+
+_card_logic = None
+
+
+def _init_worker(cards_path):
+    """
+    Loads the catalog and its indexes once per worker process.
+    """
+    global _card_logic
+    for name, value in BATCH_ENV.items():
+        os.environ.setdefault(name, value)
+    if cards_path:
+        reload_catalog(force=True, path=cards_path)
+    get_catalog().warm()
+    _card_logic = CardLogic()
+
+
+def _profile(record):
+    """
+    The profile in a log record, with its ID.
+    Raises:
+        ValueError: No profile with spending_habits.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Record must be a JSON object")
+    record_id = record.get("id", record.get("request_id"))
+    profile = next((record[key] for key in PROFILE_KEYS if isinstance(record.get(key), dict)), record)
+    if not isinstance(profile.get("spending_habits"), dict):
+        raise ValueError("Record has no profile with spending_habits")
+    return record_id, profile
+
+
+def score_chunk(start, lines):
+    """
+    Scores consecutive input lines in a worker process: every valid profile of
+    the chunk goes through one CardLogic.recommend_batch call, then each
+    record's recommended cards are simulated.
+    Args:
+        start (int): Input index of the first line.
+        lines (list): Raw lines.
+    Returns:
+        list: Output records ("error" instead of results for invalid input);
+            recommend_ms is the record's share of the chunk's batch scoring.
+    """
+    outputs = []
+    valid = []
+    for offset, line in enumerate(lines):
+        parse_started = time.perf_counter()
+        output = {"index": start + offset}
+        try:
+            record_id, profile = _profile(json.loads(line))
+            if record_id is not None:
+                output["id"] = record_id
+            valid.append((output, profile))
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            output["error"] = str(e)
+        output["elapsed_ms"] = (time.perf_counter() - parse_started) * 1000
+        outputs.append(output)
+    if not valid:
+        return outputs
+
+    batch_started = time.perf_counter()
+    results = _recommend_chunk([profile for _, profile in valid])
+    recommend_ms = (time.perf_counter() - batch_started) * 1000 / len(valid)
+
+    for (output, profile), recommendations in zip(valid, results):
+        output["elapsed_ms"] += recommend_ms
+        if isinstance(recommendations, dict):
+            output["error"] = recommendations["error"]
+            continue
+        simulate_started = time.perf_counter()
+        try:
+            simulations = [
+                _card_logic.simulate_rewards(card["name"], profile["spending_habits"]) for card in recommendations
+            ]
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            output["error"] = str(e)
+            output["elapsed_ms"] += (time.perf_counter() - simulate_started) * 1000
+            continue
+        simulate_ms = (time.perf_counter() - simulate_started) * 1000
+        output.update({
+            "recommendations": recommendations,
+            "simulations": simulations,
+            "recommend_ms": recommend_ms,
+            "simulate_ms": simulate_ms,
+        })
+        output["elapsed_ms"] += simulate_ms
+    return outputs
+
+
+def _recommend_chunk(profiles):
+    """
+    recommend_batch output for a chunk of profiles. Should the batch fail as a
+    whole, its profiles are re-scored one at a time, so one bad record only
+    fails itself.
+    """
+    try:
+        return list(_card_logic.recommend_batch(profiles, chunk_size=len(profiles)))
+    except (ValueError, TypeError, AttributeError, KeyError):
+        logger.exception("Batch scoring failed; re-scoring %d records one by one", len(profiles))
+    results = []
+    for profile in profiles:
+        try:
+            results.append(_card_logic.recommend_cards(profile))
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            results.append({"error": str(e)})
+    return results
+
+
+class Reservoir:
+    """
+    Fixed-size uniform sample of a stream of numbers (reservoir sampling), so
+    percentiles of any number of records take constant memory. Exact while
+    fewer than size values have been added.
+    Args:
+        size (int): Values kept.
+        seed (int): Seed of the replacement choices, for repeatable summaries.
+    """
+
+    def __init__(self, size=100_000, seed=0):
+        self.count = 0
+        self._sample = array("d")
+        self._size = size
+        self._random = random.Random(seed)
+
+    def extend(self, values):
+        for value in values:
+            self.count += 1
+            if len(self._sample) < self._size:
+                self._sample.append(value)
+            else:
+                slot = self._random.randrange(self.count)
+                if slot < self._size:
+                    self._sample[slot] = value
+
+    def percentile(self, q):
+        return float(np.percentile(np.frombuffer(self._sample, dtype=np.float64), q))
+
+
+def read_chunks(path, chunk_size):
+    """
+    Yields (start index, lines) chunks of non-blank lines; "-" reads stdin, .gz is decompressed.
+    """
+    if path == "-":
+        f = sys.stdin
+    elif path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        f = open(path, encoding="utf-8")
+    try:
+        lines = (line for line in f if line.strip())
+        start = 0
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield start, chunk
+            start += len(chunk)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def score_chunks(chunks, workers, cards_path):
+    """
+    Scores chunks on a process pool (in this process if workers is 0), keeping
+    at most two chunks per worker in flight.
+    Yields:
+        list: Output records per chunk, in input order.
+    """
+    if workers == 0:
+        _init_worker(cards_path)
+        for start, lines in chunks:
+            yield score_chunk(start, lines)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cards_path,)) as executor:
+        pending = deque()
+        for start, lines in chunks:
+            pending.append(executor.submit(score_chunk, start, lines))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, records):
+        self._file.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetWriter:
+    """
+    Columnar output, one row group per chunk: index, id, error, recommended card
+    names, their simulated annual rewards (INR), the full result as JSON, and timings.
+    """
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs the pyarrow package (pip install pyarrow)") from None
+        self._pa = pa
+        self.schema = pa.schema([
+            ("index", pa.int64()),
+            ("id", pa.string()),
+            ("error", pa.string()),
+            ("cards", pa.list_(pa.string())),
+            ("annual_rewards", pa.list_(pa.int64())),
+            ("result", pa.string()),
+            ("recommend_ms", pa.float64()),
+            ("simulate_ms", pa.float64()),
+            ("elapsed_ms", pa.float64()),
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, records):
+        rows = [{
+            "index": record["index"],
+            "id": None if record.get("id") is None else str(record["id"]),
+            "error": record.get("error"),
+            "cards": [card["name"] for card in record.get("recommendations", [])],
+            "annual_rewards": [_rupees(simulation) for simulation in record.get("simulations", [])],
+            "result": json.dumps(
+                {key: record[key] for key in ("recommendations", "simulations") if key in record}, ensure_ascii=False
+            ),
+            "recommend_ms": record.get("recommend_ms"),
+            "simulate_ms": record.get("simulate_ms"),
+            "elapsed_ms": record["elapsed_ms"],
+        } for record in records]
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _rupees(simulation):
+    # simulate_rewards reports "Rs. 1234"
+    value = simulation.get("annual_rewards")
+    return int(value.split()[-1]) if value else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSON Lines file of profiles ('-' for stdin, .gz accepted)")
+    parser.add_argument("--output", default="-", help="Output file ('-' for stdout)")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), help="Output format (default: from the extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (0: this process)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Lines per task")
+    parser.add_argument("--cards", help="cards.json to score against (default: data/cards.json)")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ("parquet" if args.output.endswith(".parquet") else "jsonl")
+    if output_format == "parquet" and args.output == "-":
+        parser.error("Parquet output needs an --output file")
+    writer = ParquetWriter(args.output) if output_format == "parquet" else JsonlWriter(args.output)
+
+    started = time.perf_counter()
+    timings = Reservoir()
+    errors = 0
+    try:
+        chunks = read_chunks(args.input, args.chunk_size)
+        for records in score_chunks(chunks, args.workers, args.cards):
+            writer.write(records)
+            timings.extend(record["elapsed_ms"] for record in records)
+            errors += sum("error" in record for record in records)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    summary = f"Scored {timings.count} records ({errors} errors) in {elapsed:.1f}s"
+    if timings.count:
+        summary += (
+            f", {timings.count / elapsed:.0f} records/s; per record p50 {timings.percentile(50):.2f} ms, "
+            f"p95 {timings.percentile(95):.2f} ms, p99 {timings.percentile(99):.2f} ms"
+        )
+    print(summary, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
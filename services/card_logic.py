@@ -1,12 +1,82 @@
-import json
-import os
+from itertools import islice
+
+import numpy as np
+
+from services.catalog import get_catalog
+from services.metrics import CACHE_REQUESTS, timed_method
+from services.result_cache import get_result_cache
+from services.rewards import optimize_wallet
+from services.scoring import REWARD_CATEGORIES, spend_matrix, top_k, top_k_batch
+
+
+def _profile_terms(user_data):
+    """
+    Normalizes the fields of a user profile that drive recommendations.
+    Returns:
+        tuple: (spending_habits, preferred_benefits, existing_cards, credit_score, min_score).
+    Raises:
+        ValueError: A list field of the wrong type.
+    """
+    spending_habits = user_data.get("spending_habits", {})
+    preferred_benefits = user_data.get("preferred_benefits") or []
+    existing_cards = user_data.get("existing_cards") or []
+    credit_score = user_data.get("credit_score", "unknown")
+    if isinstance(existing_cards, str):
+        existing_cards = [existing_cards]
+    # Checked here so one malformed profile fails on its own, not its whole batch
+    if not isinstance(preferred_benefits, list) or not all(isinstance(benefit, str) for benefit in preferred_benefits):
+        raise ValueError("preferred_benefits must be a list of benefit names")
+    if not isinstance(existing_cards, list):
+        raise ValueError("existing_cards must be a list of card names")
+
+    # Filter cards based on credit score
+    if credit_score != "unknown":
+        min_score = int(credit_score.split("–")[0]) if "–" in credit_score else int(credit_score)
+    else:
+        # Assume moderate score range (650–750)
+        min_score = 750
+    return spending_habits, preferred_benefits, existing_cards, credit_score, min_score
+
+
+def _cache_spend(spending_habits):
+    """
+    Spend series for a cache key, or None if it is invalid or has a non-numeric
+    value (those inputs are computed directly, errors included).
+    """
+    try:
+        series = spend_matrix(spending_habits)
+    except (ValueError, TypeError):
+        return None
+    if any(isinstance(value, bool) for value in spending_habits.values()):
+        return None
+    return series.tolist()
+
+
+def _existing_names(catalog, existing_cards):
+    """
+    Exact catalog names for the cards a user says they hold, so misspelt or
+    partial names are still excluded from recommendations.
+    """
+    rows = (catalog.resolve(name) for name in existing_cards if isinstance(name, str))
+    return [catalog.cards[row]["name"] for row in rows if row is not None]
+
 
 class CardLogic:
-    def __init__(self):
-        # Load card database (temporary; will use data/cards.json later)
-        with open(os.path.join("data", "cards.json")) as f:
-            self.card_db = json.load(f)
+    def __init__(self, cache=None):
+        # Memoizes recommend/simulate results; shared process-wide by default
+        self.cache = cache if cache is not None else get_result_cache()
 
+    @property
+    def catalog(self):
+        # Shared, already-indexed card database; may be swapped by a hot reload,
+        # so each method takes one snapshot and uses it throughout
+        return get_catalog()
+
+    @property
+    def card_db(self):
+        return self.catalog.cards
+
+    @timed_method
     def recommend_cards(self, user_data):
         """
         Recommends top 3–5 credit cards based on user inputs.
@@ -16,53 +86,140 @@ class CardLogic:
         Returns:
             list: Top 3–5 recommended cards with name, image, reasons, and reward simulation.
         """
-        monthly_income = user_data.get("monthly_income", 0)
-        spending_habits = user_data.get("spending_habits", {})
-        preferred_benefits = user_data.get("preferred_benefits", [])
-        existing_cards = user_data.get("existing_cards", [])
-        credit_score = user_data.get("credit_score", "unknown")
-
-        # Filter cards based on credit score
-        filtered_cards = self.card_db
-        if credit_score != "unknown":
-            min_score = int(credit_score.split("–")[0]) if "–" in credit_score else int(credit_score)
-            filtered_cards = [card for card in self.card_db if card["min_credit_score"] <= min_score]
-        else:
-            # Assume moderate score range (650–750)
-            filtered_cards = [card for card in self.card_db if card["min_credit_score"] <= 750]
-
-        # Exclude existing cards
-        filtered_cards = [card for card in filtered_cards if card["name"] not in existing_cards]
-
-        # Calculate reward scores
-        recommendations = []
-        for card in filtered_cards:
-            total_rewards = (
-                spending_habits.get("fuel", 0) * card["rewards"]["fuel"] +
-                spending_habits.get("travel", 0) * card["rewards"]["travel"] +
-                spending_habits.get("groceries", 0) * card["rewards"]["groceries"] +
-                spending_habits.get("dining", 0) * card["rewards"]["dining"]
-            ) * 12  # Annual rewards in points
-            benefit_match = len(set(card["benefits"]) & set(preferred_benefits))
-            # Adjust for income (avoid high-fee cards for low income)
-            fee_score = 0 if card["annual_fee"] <= (monthly_income * 0.1) else -1000
-            score = total_rewards + (benefit_match * 1000) - card["annual_fee"]
-
-            recommendations.append({
-                "card": card,
-                "score": score,
-                "total_rewards": total_rewards / 100  # Convert points to INR (simplified)
-            })
+        spending_habits, preferred_benefits, existing_cards, credit_score, min_score = _profile_terms(user_data)
+        catalog = self.catalog
+        existing_cards = _existing_names(catalog, existing_cards)
+
+        # Results depend only on these normalized terms (income is not scored), so
+        # near-identical profiles share an entry; the catalog version scopes it
+        spend = _cache_spend(spending_habits) if self.cache is not None else None
+        if spend is None:
+            return self._recommend(catalog, spending_habits, preferred_benefits, existing_cards, credit_score, min_score)
+        key = self.cache.make_key(
+            "recommend", catalog.version, spend, sorted(set(preferred_benefits)),
+            sorted(set(existing_cards)), min_score, credit_score == "unknown",
+        )
+        return self.cache.get_or_compute(
+            key,
+            lambda: self._recommend(catalog, spending_habits, preferred_benefits, existing_cards, credit_score, min_score),
+        )
+
+    @timed_method
+    def _recommend(self, catalog, spending_habits, preferred_benefits, existing_cards, credit_score, min_score):
+        columns = catalog.columns
+        series = spend_matrix(spending_habits)
 
-        # Sort and select top 3–5
-        recommendations = sorted(recommendations, key=lambda x: x["score"], reverse=True)[:3]
+        # A precomputed table narrows the catalog to a few candidates for most profiles
+        table = catalog.recommend_table
+        if table is not None:
+            result = self._recommend_from_table(
+                catalog, table, series, preferred_benefits, existing_cards, credit_score, min_score
+            )
+            CACHE_REQUESTS.inc(cache="recommend_table", outcome="miss" if result is None else "hit")
+            if result is not None:
+                return result
+
+        # Exclude existing cards and cards above the user's credit score
+        eligible = columns.eligible(min_score, existing_cards)
+
+        # Calculate reward scores for every card at once (caps, tiers, milestones and fee waivers included)
+        total_rewards, annual_fees = columns.simulate(series)  # Annual rewards in points
+        benefit_match = columns.benefit_matches(preferred_benefits)
+        scores = total_rewards + (benefit_match * 1000) - annual_fees
+
+        # Select top 3–5 without sorting the whole catalog
+        rows = top_k(scores, eligible, 3)
+        return self._format_recommendations(catalog, rows, total_rewards, preferred_benefits, credit_score)
+
+    def _recommend_from_table(self, catalog, table, series, preferred_benefits, existing_cards, credit_score, min_score):
+        """
+        Scores only the table's candidates for the profile's bucket; same output as
+        full scoring. Returns None when the profile is outside the table.
+        """
+        columns = catalog.columns
+        excluded = [row for name in existing_cards for row in columns.rows_by_name.get(name, ())]
+        if len(excluded) + 3 > table.depth:
+            return None
+        candidates = table.candidates(series, preferred_benefits, min_score)
+        if candidates is None:
+            return None
 
-        # Format output
+        total_rewards, annual_fees = columns.simulate(series, rows=candidates)
+        benefit_match = columns.benefit_matches(preferred_benefits, rows=candidates)
+        scores = total_rewards + (benefit_match * 1000) - annual_fees
+        # Candidates are in catalog order, so ties break exactly as in full scoring
+        picks = top_k(scores, ~np.isin(candidates, excluded), 3)
+        return self._format_recommendations(
+            catalog, candidates[picks], dict(zip(candidates.tolist(), total_rewards)), preferred_benefits, credit_score
+        )
+
+    def recommend_batch(self, profiles, chunk_size=1024):
+        """
+        Recommends cards for many profiles, scoring each chunk as a
+        profiles × cards matrix against one catalog snapshot.
+        Args:
+            profiles (iterable): user_data dicts, as accepted by recommend_cards.
+            chunk_size (int): Profiles scored per matrix; bounds memory use.
+        Yields:
+            list | dict: recommend_cards output per profile, in input order,
+                or {"error": ...} for an invalid profile.
+        """
+        catalog = self.catalog
+        columns = catalog.columns
+        profiles = iter(profiles)
+        while True:
+            chunk = list(islice(profiles, chunk_size))
+            if not chunk:
+                return
+
+            # Parse every profile first; invalid ones are reported, not scored
+            results = [None] * len(chunk)
+            terms = []
+            for i, user_data in enumerate(chunk):
+                try:
+                    if not isinstance(user_data, dict):
+                        raise ValueError("Profile must be a JSON object")
+                    terms.append((i, _profile_terms(user_data)))
+                except (ValueError, TypeError, AttributeError) as e:
+                    results[i] = {"error": str(e)}
+
+            if terms:
+                try:
+                    total_rewards, annual_fees = columns.simulate(np.stack([spend_matrix(t[0]) for _, t in terms]))
+                except (ValueError, TypeError, AttributeError):
+                    # A non-numeric spend value or mixed series lengths; score this chunk one by one
+                    for i, _ in terms:
+                        try:
+                            results[i] = self.recommend_cards(chunk[i])
+                        except (ValueError, TypeError, AttributeError) as e:
+                            results[i] = {"error": str(e)}
+                else:
+                    benefit_match = columns.benefit_matches_batch([t[1] for _, t in terms])
+                    eligible = columns.eligible_batch(
+                        [t[4] for _, t in terms], [_existing_names(catalog, t[2]) for _, t in terms]
+                    )
+                    scores = total_rewards + (benefit_match * 1000) - annual_fees
+                    for profile_row, rows in enumerate(top_k_batch(scores, eligible, 3)):
+                        i, (_, preferred_benefits, _, credit_score, _) = terms[profile_row]
+                        results[i] = self._format_recommendations(
+                            catalog, rows, total_rewards[profile_row], preferred_benefits, credit_score
+                        )
+
+            yield from results
+
+    def _format_recommendations(self, catalog, rows, total_rewards, preferred_benefits, credit_score):
+        """
+        Builds the recommend_cards output for the selected catalog rows.
+        total_rewards maps each of those rows to its annual points (an array or dict).
+        """
         output = []
-        for rec in recommendations:
-            card = rec["card"]
+        preferred = set(preferred_benefits)
+        for row in rows:
+            card = catalog.cards[row]
+            # In the card's own benefit order, so output is the same in every process
+            matched = [benefit for benefit in dict.fromkeys(card["benefits"]) if benefit in preferred]
             reasons = [
-                f"Matches your preference for {', '.join(set(card['benefits']) & set(preferred_benefits)) or 'multiple benefits'}",
+                f"Matches your preference for {', '.join(matched) or 'multiple benefits'}",
                 f"High rewards on {max(card['rewards'], key=card['rewards'].get)} spending"
             ]
             if credit_score == "unknown":
@@ -72,11 +229,12 @@ class CardLogic:
                 "name": card["name"],
                 "image": card["image"],
                 "reasons": reasons,
-                "reward": f"You could earn Rs. {int(rec['total_rewards'])}/year in rewards."
+                "reward": f"You could earn Rs. {int(total_rewards[row] / 100)}/year in rewards."  # Points to INR (simplified)
             })
 
         return output
 
+    @timed_method
     def lookup_card(self, card_name):
         """
         Looks up details for a specific card.
@@ -85,11 +243,13 @@ class CardLogic:
         Returns:
             dict: Card details or None if not found.
         """
-        for card in self.card_db:
-            if card["name"].lower() == card_name.lower():
-                return card
-        return None
+        catalog = self.catalog
+        row = catalog.resolve(card_name)
+        card = catalog.cards[row] if row is not None else None
+        # A plain copy: catalog records are shared (and lazily decoded when memory-mapped)
+        return dict(card) if card is not None else None
 
+    @timed_method
     def count_cards(self):
         """
         Returns the total number of cards in the database.
@@ -98,6 +258,7 @@ class CardLogic:
         """
         return len(self.card_db)
 
+    @timed_method
     def compare_cards(self, card_name1, card_name2):
         """
         Compares two cards by benefits, rewards, and fees.
@@ -107,10 +268,13 @@ class CardLogic:
         Returns:
             dict: Comparison details or error message.
         """
-        card1 = self.lookup_card(card_name1)
-        card2 = self.lookup_card(card_name2)
-        if not card1 or not card2:
+        catalog = self.catalog
+        row1 = catalog.resolve(card_name1)
+        row2 = catalog.resolve(card_name2)
+        if row1 is None or row2 is None:
             return {"error": "One or both cards not found."}
+        card1 = catalog.cards[row1]
+        card2 = catalog.cards[row2]
 
         comparison = {
             "card1": card1["name"],
@@ -130,26 +294,88 @@ class CardLogic:
         }
         return comparison
 
+    @timed_method
     def simulate_rewards(self, card_name, spending_habits):
         """
         Simulates annual rewards for a card based on spending habits.
         Args:
             card_name (str): Name of the card.
-            spending_habits (dict): Spending amounts for fuel, travel, groceries, dining.
+            spending_habits (dict): Monthly spending for fuel, travel, groceries, dining;
+                each a number or a list of monthly amounts.
         Returns:
             dict: Simulated rewards or error message.
         """
-        card = self.lookup_card(card_name)
-        if not card:
+        catalog = self.catalog
+        row = catalog.resolve(card_name)
+        if row is None:
             return {"error": "Card not found."}
 
-        total_rewards = (
-            spending_habits.get("fuel", 0) * card["rewards"]["fuel"] +
-            spending_habits.get("travel", 0) * card["rewards"]["travel"] +
-            spending_habits.get("groceries", 0) * card["rewards"]["groceries"] +
-            spending_habits.get("dining", 0) * card["rewards"]["dining"]
-        ) * 12  # Annual rewards
-        return {
+        spend = _cache_spend(spending_habits) if self.cache is not None else None
+        if spend is None:
+            return self._simulate(catalog, row, spending_habits)
+        key = self.cache.make_key("simulate", catalog.version, catalog.cards[row]["name"], spend)
+        return self.cache.get_or_compute(key, lambda: self._simulate(catalog, row, spending_habits))
+
+    def _simulate(self, catalog, row, spending_habits):
+        card = catalog.cards[row]
+        total_rewards, annual_fees = catalog.columns.simulate(spend_matrix(spending_habits), rows=[row])  # Annual rewards
+        result = {
             "card_name": card["name"],
-            "annual_rewards": f"Rs. {int(total_rewards / 100)}"  # Convert points to INR
-        }
\ No newline at end of file
+            "annual_rewards": f"Rs. {int(total_rewards[0] / 100)}"  # Convert points to INR
+        }
+        if annual_fees[0] != card["annual_fee"]:
+            result["annual_fee"] = f"Rs. {int(annual_fees[0])} (waived on your spending)"
+        return result
+
+    @timed_method
+    def optimize_wallet(self, user_data, candidate=None):
+        """
+        Chooses which card to use for each spending category, across the user's
+        existing cards plus an optional candidate card.
+        Args:
+            user_data (dict): Contains spending_habits and existing_cards.
+            candidate (str): Name of a card the user is considering.
+        Returns:
+            dict: Card per category, annual rewards and fees, the candidate's
+                added value, or error message.
+        """
+        catalog = self.catalog
+        existing_cards = user_data.get("existing_cards", [])
+        if isinstance(existing_cards, str):
+            existing_cards = [existing_cards]
+
+        rows = []
+        unknown = []
+        for name in existing_cards:
+            row = catalog.resolve(name)
+            if row is None:
+                if name.lower() != "none":
+                    unknown.append(name)
+            elif row not in rows:
+                rows.append(row)
+        held = len(rows)
+        if candidate:
+            row = catalog.resolve(candidate)
+            if row is None:
+                return {"error": "Card not found."}
+            if row not in rows:
+                rows.append(row)
+        if not rows:
+            return {"error": "No known cards to choose from."}
+
+        series = spend_matrix(user_data.get("spending_habits", {}))
+        best = optimize_wallet(catalog.columns, rows, series)
+        result = {
+            "card_per_category": {
+                category: catalog.cards[rows[position]]["name"]
+                for category, position in zip(REWARD_CATEGORIES, best["assignment"])
+            },
+            "annual_rewards": f"Rs. {int((best['points'].sum() + best['bonus'].sum()) / 100)}",  # Convert points to INR
+            "annual_fees": f"Rs. {int(best['fees'].sum())}",
+        }
+        if candidate and held < len(rows):
+            current = optimize_wallet(catalog.columns, rows[:held], series)["value"] if held else 0.0
+            result["candidate_gain"] = f"Rs. {int(best['value'] - current)}/year"
+        if unknown:
+            result["unknown_cards"] = unknown
+        return result
@@ -0,0 +1,398 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from services import catalog_binary, recommend_table
+from services.scoring import CardColumns
+from services.text_index import AhoCorasick, TrigramIndex, normalize_name
+
+CARDS_PATH = os.path.join("data", "cards.json")
+
+# A fuzzy match resolves a card name only if it scores at least this much
+# and beats the next card by at least FUZZY_MARGIN (otherwise it is ambiguous)
+FUZZY_MIN_SCORE = 0.6
+FUZZY_MARGIN = 0.1
+
+logger = logging.getLogger(__name__)
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+class CardCatalog:
+    """
+    Read-only, indexed view over the card database.
+    Built once per process and shared by CardLogic and every card tool.
+    A new instance is published on reload; existing instances never change,
+    so a request holding one always sees a consistent snapshot.
+    """
+
+    def __init__(self, cards, version=None, mtime=None, columns=None):
+        # A compiled catalog's lazy record sequence is kept as is; lists are frozen
+        self.cards = cards if isinstance(cards, (tuple, catalog_binary.BinaryCards)) else tuple(cards)
+        # Content hash; results cached against one version are never served for another
+        self.version = version or hashlib.sha256(json.dumps(self.cards, sort_keys=True).encode()).hexdigest()[:16]
+        self.mtime = mtime
+
+        # Indexes map to row numbers (records are resolved on access).
+        # Case-insensitive name index: first entry wins, matching the old linear scan
+        names, issuers, benefits = _index_fields(self.cards)
+        self.by_name = {}
+        self.by_issuer = {}
+        self.by_benefit = {}
+        for row, (name, issuer, card_benefits) in enumerate(zip(names, issuers, benefits)):
+            self.by_name.setdefault(name.lower(), row)
+            self.by_issuer.setdefault(issuer.lower(), []).append(row)
+            for benefit in card_benefits:
+                self.by_benefit.setdefault(benefit, []).append(row)
+
+        # Numeric columns for vectorized recommendation scoring
+        self.columns = columns if columns is not None else CardColumns(self.cards)
+
+        self._name_matcher = None
+        self._name_matcher_lock = threading.Lock()
+        self._resolver = None
+        self._resolver_lock = threading.Lock()
+        self._recommend_table = None
+        self._recommend_table_loaded = False
+        self._recommend_table_lock = threading.Lock()
+
+    @property
+    def name_matcher(self):
+        """
+        Matcher for card and issuer mentions in free text, built on first use
+        (reload_catalog builds it before publishing, off the request path).
+        """
+        if self._name_matcher is None:
+            with self._name_matcher_lock:
+                if self._name_matcher is None:
+                    self._name_matcher = AhoCorasick(self._mention_patterns())
+        return self._name_matcher
+
+    @property
+    def resolver(self):
+        """
+        (alias table, trigram index, row per index entry) for resolve() and match(),
+        built on first use like name_matcher.
+        """
+        if self._resolver is None:
+            with self._resolver_lock:
+                if self._resolver is None:
+                    self._resolver = self._build_resolver()
+        return self._resolver
+
+    @property
+    def recommend_table(self):
+        """
+        Precomputed recommendation candidates for this catalog version
+        (services.recommend_table), loaded on first use; None if there is none.
+        """
+        if not self._recommend_table_loaded:
+            with self._recommend_table_lock:
+                if not self._recommend_table_loaded:
+                    self._recommend_table = recommend_table.load_table(self.version)
+                    self._recommend_table_loaded = True
+        return self._recommend_table
+
+    def warm(self):
+        """
+        Builds the lazily-built indexes now, so no request has to.
+        """
+        self.name_matcher
+        self.resolver
+        self.recommend_table
+
+    @classmethod
+    def from_file(cls, path=CARDS_PATH):
+        """
+        Loads and indexes a catalog from a cards.json file.
+        Args:
+            path (str): Path to the JSON card database.
+        Returns:
+            CardCatalog: Indexed catalog.
+        """
+        mtime = os.stat(path).st_mtime_ns
+        with open(path, "rb") as f:
+            raw = f.read()
+        return cls.from_bytes(raw, mtime=mtime)
+
+    @classmethod
+    def from_binary(cls, path=catalog_binary.CARDS_BINARY_PATH, mtime=None):
+        """
+        Loads a catalog compiled by services.catalog_binary via mmap.
+        Scoring columns are used in place and cards are decoded lazily,
+        so nothing is parsed up front and pages are shared between workers.
+        """
+        catalog_file = catalog_binary.BinaryCatalogFile(path)
+        cards = catalog_binary.BinaryCards(catalog_file)
+        return cls(
+            cards,
+            version=catalog_file.version,
+            mtime=mtime,
+            columns=catalog_file.columns(cards.field_values("name")),
+        )
+
+    @classmethod
+    def load(cls, path=CARDS_PATH):
+        """
+        Loads the catalog for a cards.json path, preferring its compiled form
+        (data/cards.bin next to it) when it was compiled from this JSON as it is now.
+        Set CATALOG_BINARY=0 to always parse the JSON.
+        """
+        mtime = os.stat(path).st_mtime_ns
+        binary_path = os.path.splitext(path)[0] + ".bin"
+        if os.getenv("CATALOG_BINARY", "1") != "0" and catalog_binary.is_fresh(binary_path, path):
+            try:
+                return cls.from_binary(binary_path, mtime=mtime)
+            except (OSError, ValueError, KeyError):
+                logger.exception("Could not load %s; falling back to %s", binary_path, path)
+        return cls.from_file(path)
+
+    @classmethod
+    def from_bytes(cls, raw, mtime=None):
+        """
+        Builds a catalog from the raw contents of a cards.json file.
+        The version is a short content hash, so identical files share a version.
+        """
+        version = hashlib.sha256(raw).hexdigest()[:16]
+        return cls(json.loads(raw), version=version, mtime=mtime)
+
+    def _issuer_prefixes(self):
+        """
+        The word prefix every card of an issuer shares (e.g. "sbi" for
+        "State Bank of India"), per lowercase issuer; None if there is none.
+        """
+        names = {row: name for name, row in self.by_name.items()}
+        prefixes = {}
+        for issuer, rows in self.by_issuer.items():
+            words = [names.get(row, self.cards[row]["name"].lower()).split() for row in rows]
+            prefix = []
+            for column in zip(*words):
+                if len(set(column)) != 1:
+                    break
+                prefix.append(column[0])
+            prefixes[issuer] = " ".join(prefix) if prefix and all(len(name) > len(prefix) for name in words) else None
+        return prefixes
+
+    def _mention_patterns(self):
+        """
+        Phrases that refer to a card or an issuer: full card names, issuer names,
+        and the word prefix every card of an issuer shares (e.g. "sbi" for
+        "State Bank of India"). Card names win over issuer phrases.
+        """
+        patterns = {}
+        for issuer, prefix in self._issuer_prefixes().items():
+            patterns[issuer] = ("issuer", issuer)
+            if prefix:
+                patterns.setdefault(prefix, ("issuer", issuer))
+        for name, row in self.by_name.items():
+            patterns[name] = ("card", row)
+        return patterns
+
+    def _build_resolver(self):
+        """
+        Alias table and trigram index over card names and aliases. Aliases are
+        the name without its issuer prefix ("magnus"), with the full issuer name
+        instead ("american express platinum"), and any "aliases" listed for the
+        card in cards.json. An alias shared by several cards resolves to none.
+        """
+        aliases = {}
+        indexed = {}
+
+        def add(alias, row, index=True):
+            if alias and aliases.setdefault(alias, row) != row:
+                aliases[alias] = None
+            if index and alias:
+                indexed[alias] = aliases[alias]
+
+        prefixes = {issuer: normalize_name(prefix) for issuer, prefix in self._issuer_prefixes().items() if prefix}
+        issuer_names = {issuer: normalize_name(issuer) for issuer in self.by_issuer}
+        normalized = {row: normalize_name(name) for name, row in self.by_name.items()}
+        _, issuers, _ = _index_fields(self.cards)
+        for row, name in normalized.items():
+            add(name, row)
+            issuer = issuers[row].lower()
+            prefix = prefixes.get(issuer)
+            if prefix and name.startswith(prefix + " "):
+                suffix = name[len(prefix) + 1:]
+                add(suffix, row)
+                # Exact-only; indexing it as well would mostly repeat the name's trigrams
+                add(f"{issuer_names[issuer]} {suffix}", row, index=False)
+        for row, card_aliases in _extra_values(self.cards, "aliases").items():
+            for alias in card_aliases:
+                add(normalize_name(alias), row)
+        # Exact names always win over another card's alias
+        for row, name in normalized.items():
+            aliases[name] = indexed[name] = row
+
+        entries = [alias for alias, row in indexed.items() if aliases[alias] is not None]
+        return aliases, TrigramIndex(entries), [aliases[alias] for alias in entries]
+
+    def match(self, card_name, limit=5):
+        """
+        Cards whose name or alias resembles card_name, best first.
+        Args:
+            card_name (str): Name as typed (any case, partial or misspelt).
+            limit (int): Most cards to return.
+        Returns:
+            list: (row, score) tuples; scores are in [0, 1].
+        """
+        _, index, entry_rows = self.resolver
+        best = {}
+        # Several entries can point at one card; keep each card's best
+        for entry, score in index.search(card_name, limit=limit * 4):
+            row = entry_rows[entry]
+            if score > best.get(row, -1.0):
+                best[row] = score
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def resolve(self, card_name):
+        """
+        Row of the card a name refers to: an exact (case-insensitive) name, then
+        an alias, then a confident, unambiguous fuzzy match.
+        Args:
+            card_name (str): Name as typed.
+        Returns:
+            int: Catalog row, or None if no card matches clearly.
+        """
+        row = self.row(card_name)
+        if row is not None:
+            return row
+        aliases, _, _ = self.resolver
+        normalized = normalize_name(card_name)
+        if normalized in aliases:
+            return aliases[normalized]
+        matches = self.match(card_name, limit=2)
+        if matches and matches[0][1] >= FUZZY_MIN_SCORE:
+            if len(matches) == 1 or matches[0][1] - matches[1][1] >= FUZZY_MARGIN:
+                return matches[0][0]
+        return None
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def row(self, card_name):
+        """
+        Returns the row of the card with the given name (case-insensitive) or None.
+        """
+        return self.by_name.get(card_name.lower())
+
+    def get(self, card_name):
+        """
+        Returns the card with the given name (case-insensitive) or None.
+        """
+        row = self.row(card_name)
+        return self.cards[row] if row is not None else None
+
+    def cards_by_issuer(self, issuer):
+        """
+        Returns all cards from an issuer (case-insensitive).
+        """
+        return tuple(self.cards[row] for row in self.by_issuer.get(issuer.lower(), ()))
+
+    def cards_with_benefit(self, benefit):
+        """
+        Returns all cards offering a benefit (e.g., 'cashback').
+        """
+        return tuple(self.cards[row] for row in self.by_benefit.get(benefit, ()))
+
+
+def _index_fields(cards):
+    """
+    Names, issuers and benefit lists in row order; bulk-decoded for compiled catalogs.
+    """
+    if isinstance(cards, catalog_binary.BinaryCards):
+        return cards.field_values("name"), cards.field_values("issuer"), cards.field_values("benefits")
+    return (
+        [card["name"] for card in cards],
+        [card["issuer"] for card in cards],
+        [card["benefits"] for card in cards],
+    )
+
+
+def _extra_values(cards, key):
+    """
+    Row -> value of an optional card field, for the cards that have it.
+    """
+    if isinstance(cards, catalog_binary.BinaryCards):
+        return cards.extra_values(key)
+    return {row: card[key] for row, card in enumerate(cards) if card.get(key)}
+
+
+def get_catalog():
+    """
+    Returns the current process-wide card catalog, loading it on first use.
+    Never re-reads the file once loaded; see reload_catalog().
+    Returns:
+        CardCatalog: Current catalog snapshot.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CardCatalog.load()
+    return _catalog
+
+
+def reload_catalog(force=False, path=CARDS_PATH):
+    """
+    Rebuilds the catalog if cards.json changed and atomically publishes it.
+    The file is only re-read when its mtime moved (or force is set), and the
+    new catalog is only published when the content hash differs.
+    Args:
+        force (bool): Re-read the file even if its mtime is unchanged.
+        path (str): Path to the JSON card database.
+    Returns:
+        bool: True if a new catalog version was published.
+    """
+    global _catalog
+    # Not get_catalog(): with nothing loaded yet, only path is read (not the default file)
+    current = _catalog
+    mtime = os.stat(path).st_mtime_ns
+    if current is not None and not force and mtime == current.mtime:
+        return False
+
+    # Load and index outside the lock; readers keep using the old snapshot
+    catalog = CardCatalog.load(path)
+    if current is not None and catalog.version == current.version:
+        current.mtime = mtime
+        return False
+
+    catalog.warm()
+    with _catalog_lock:
+        _catalog = catalog
+    logger.info("Card catalog reloaded: version %s, %d cards", catalog.version, len(catalog))
+    return True
+
+
+class CatalogWatcher(threading.Thread):
+    """
+    Daemon thread that polls cards.json and reloads the catalog on change,
+    so request threads never pay the parse cost.
+    """
+
+    def __init__(self, interval=5.0, path=CARDS_PATH):
+        super().__init__(name="catalog-watcher", daemon=True)
+        self.interval = interval
+        self.path = path
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            get_catalog().warm()
+        except Exception:
+            logger.exception("Card catalog load failed")
+        while not self._stopped.wait(self.interval):
+            try:
+                reload_catalog(path=self.path)
+            except Exception:
+                # Keep serving the last good catalog (e.g., half-written or invalid JSON)
+                logger.exception("Card catalog reload failed")
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,436 @@
+"""
+Compiled, memory-mapped form of data/cards.json.
+
+cards.json stays the source of truth; `python -m services.catalog_binary` compiles it
+into data/cards.bin, which is only used while that JSON file is unchanged (same size
+and mtime as when compiled). Layout (little-endian): an 8-byte magic, a uint32 header
+length, a small JSON header (version, source, field order, section table), then 64-byte aligned
+sections: fixed-width numeric columns (fees, reward rates, min credit score, benefit
+bitmask), uint32 string-ID columns (name, issuer, image, link, extras), ragged
+uint32 lists (benefits, perks), per-card value kinds (absent, int or float) and one
+interned UTF-8 string table. A value that does not fit its column (a null link, say)
+is kept in the card's JSON extras, so every card decodes to exactly what cards.json holds.
+
+Numeric sections are used in place via np.frombuffer over an mmap, so workers share
+the pages and loading does no parsing; cards are decoded field by field on access.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from services.rewards import RewardRules
+from services.scoring import REWARD_CATEGORIES, CardColumns
+
+MAGIC = b"CCATBIN2"
+ALIGNMENT = 64
+CARDS_BINARY_PATH = os.path.join("data", "cards.bin")
+
+NUMERIC_FIELDS = ("joining_fee", "annual_fee", "min_credit_score")
+STRING_FIELDS = ("name", "issuer", "image", "affiliate_link")
+LIST_FIELDS = ("benefits", "perks")
+COLUMN_FIELDS = NUMERIC_FIELDS + STRING_FIELDS + LIST_FIELDS
+COLUMN_INDEX = {field: i for i, field in enumerate(COLUMN_FIELDS)}
+# What CardCatalog and CardColumns read from every card, as for the JSON path
+REQUIRED_FIELDS = ("name", "issuer", "benefits", "rewards", "annual_fee", "min_credit_score")
+NO_STRING = 0xFFFFFFFF
+# Per-card kind of each column value (and reward rate)
+ABSENT, STORED, STORED_FLOAT = 0, 1, 2
+
+
+def compile_catalog(json_path, binary_path):
+    """
+    Compiles a cards.json file into the binary catalog format.
+    Args:
+        json_path (str): Source JSON card database.
+        binary_path (str): Output file (written atomically).
+    Returns:
+        int: Number of cards compiled.
+    """
+    with open(json_path, "rb") as f:
+        source = os.fstat(f.fileno())
+        raw = f.read()
+    cards = json.loads(raw)
+
+    # Every card needs what the JSON path reads (CardCatalog indexes, CardColumns),
+    # in a form the columns can hold
+    for card in cards:
+        missing = [field for field in REQUIRED_FIELDS if field not in card]
+        if missing:
+            raise ValueError(f"Card {card.get('name')!r} has no {', '.join(missing)}")
+        invalid = [field for field in REQUIRED_FIELDS if field != "rewards" and _kind(field, card[field]) == ABSENT]
+        invalid += [
+            f"{category} reward rate" for category, rate in card["rewards"].items()
+            if _kind("rewards", rate) == ABSENT
+        ]
+        if invalid:
+            raise ValueError(f"Card {card['name']!r} has an invalid {', '.join(invalid)}")
+        missing = [category for category in REWARD_CATEGORIES if category not in card["rewards"]]
+        if missing:
+            raise ValueError(f"Card {card['name']!r} has no reward rate for {', '.join(missing)}")
+
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    categories = list(REWARD_CATEGORIES)
+    for card in cards:
+        for category in card["rewards"]:
+            if category not in categories:
+                categories.append(category)
+
+    benefit_bits = {}
+    for card in cards:
+        for benefit in card["benefits"]:
+            benefit_bits.setdefault(benefit, 1 << len(benefit_bits))
+
+    sections = {}
+    kinds = np.array(
+        [[_kind(field, card[field]) if field in card else ABSENT for field in COLUMN_FIELDS] for card in cards],
+        dtype=np.uint8,
+    ).reshape(len(cards), len(COLUMN_FIELDS))
+    sections["kinds"] = kinds
+    for field in NUMERIC_FIELDS:
+        column = kinds[:, COLUMN_INDEX[field]]
+        sections[field] = np.array(
+            [card[field] if kind != ABSENT else np.nan for card, kind in zip(cards, column)], dtype=np.float64
+        )
+    sections["rewards"] = np.array(
+        [[card["rewards"].get(category, np.nan) for category in categories] for card in cards],
+        dtype=np.float64,
+    ).reshape(len(cards), len(categories))
+    sections["reward_kinds"] = np.array(
+        [
+            [_kind("rewards", card["rewards"][category]) if category in card["rewards"] else ABSENT
+             for category in categories]
+            for card in cards
+        ],
+        dtype=np.uint8,
+    ).reshape(len(cards), len(categories))
+    sections["benefit_mask"] = np.array(
+        [sum(benefit_bits[benefit] for benefit in set(card["benefits"])) for card in cards], dtype=np.int64
+    )
+    for field in STRING_FIELDS:
+        column = kinds[:, COLUMN_INDEX[field]]
+        sections[field] = np.array(
+            [intern(card[field]) if kind != ABSENT else NO_STRING for card, kind in zip(cards, column)],
+            dtype=np.uint32,
+        )
+    for field in LIST_FIELDS:
+        column = kinds[:, COLUMN_INDEX[field]]
+        offsets = [0]
+        items = []
+        for card, kind in zip(cards, column):
+            if kind != ABSENT:
+                items += [intern(item) for item in card[field]]
+            offsets.append(len(items))
+        sections[f"{field}_offsets"] = np.array(offsets, dtype=np.uint32)
+        sections[f"{field}_items"] = np.array(items, dtype=np.uint32)
+    # Fields outside the known schema, and values that do not fit their column,
+    # round-trip as a per-card JSON object
+    extras = []
+    for card, card_kinds in zip(cards, kinds):
+        extra = {
+            key: value for key, value in card.items()
+            if key != "rewards" and (key not in COLUMN_INDEX or card_kinds[COLUMN_INDEX[key]] == ABSENT)
+        }
+        extras.append(intern(json.dumps(extra)) if extra else NO_STRING)
+    sections["extras"] = np.array(extras, dtype=np.uint32)
+    encoded = [value.encode() for value in strings]
+    sections["string_offsets"] = np.cumsum([0] + [len(value) for value in encoded], dtype=np.uint64)
+    sections["string_data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    header = {
+        "version": hashlib.sha256(raw).hexdigest()[:16],
+        # Identifies the JSON file this was compiled from (see is_fresh)
+        "source": {"size": source.st_size, "mtime_ns": source.st_mtime_ns},
+        "count": len(cards),
+        "categories": categories,
+        "benefits": list(benefit_bits),
+        "field_order": list(cards[0]) if cards else list(COLUMN_FIELDS + ("rewards",)),
+        "sections": {},
+    }
+    # Section offsets depend on the header length, so lay out until it is stable
+    header_size = 0
+    while True:
+        offset = _align(len(MAGIC) + 4 + header_size)
+        for name, array in sections.items():
+            header["sections"][name] = [offset, array.dtype.str, list(array.shape)]
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header).encode()
+        if len(header_bytes) == header_size:
+            break
+        header_size = len(header_bytes)
+
+    tmp_path = f"{binary_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for name, array in sections.items():
+            f.write(b"\0" * (header["sections"][name][0] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, binary_path)
+    return len(cards)
+
+
+def read_header(path):
+    """
+    The JSON header of a compiled catalog, without mapping its sections.
+    Raises:
+        OSError, ValueError: Missing file or not a compiled catalog.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 4)
+        if len(prefix) < len(MAGIC) + 4 or prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled card catalog")
+        (header_size,) = struct.unpack_from("<I", prefix, len(MAGIC))
+        return json.loads(f.read(header_size))
+
+
+def is_fresh(binary_path, json_path):
+    """
+    True if the compiled catalog exists and was compiled from json_path as it is
+    now: the source size and mtime recorded at compile time must match the file's.
+    """
+    try:
+        source = read_header(binary_path).get("source")
+        current = os.stat(json_path)
+    except (OSError, ValueError):
+        return False
+    return source == {"size": current.st_size, "mtime_ns": current.st_mtime_ns}
+
+
+class BinaryCatalogFile:
+    """
+    A memory-mapped compiled catalog. Numeric sections are zero-copy NumPy views.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled card catalog")
+        (header_size,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mmap[start:start + header_size])
+        self.version = self.header["version"]
+        self.count = self.header["count"]
+        self.categories = self.header["categories"]
+        self.sections = {}
+        for name, (offset, dtype, shape) in self.header["sections"].items():
+            count = int(np.prod(shape)) if shape else 1
+            self.sections[name] = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset).reshape(shape)
+        self._string_offsets = self.sections["string_offsets"]
+        self._string_start = self.header["sections"]["string_data"][0]
+
+    def string(self, string_id):
+        if string_id == NO_STRING:
+            return None
+        begin = self._string_start + int(self._string_offsets[string_id])
+        end = self._string_start + int(self._string_offsets[string_id + 1])
+        return self._mmap[begin:end].decode()
+
+    def string_list(self, field, row):
+        offsets = self.sections[f"{field}_offsets"]
+        items = self.sections[f"{field}_items"][offsets[row]:offsets[row + 1]]
+        return [self.string(int(item)) for item in items]
+
+    def kind(self, field, row):
+        """
+        ABSENT, STORED or STORED_FLOAT: how a card's value of a column field is stored.
+        """
+        return int(self.sections["kinds"][row, COLUMN_INDEX[field]])
+
+    def number(self, field, row):
+        value = float(self.sections[field][row])
+        return value if self.kind(field, row) == STORED_FLOAT else int(value)
+
+    def strings(self, string_ids):
+        """
+        Bulk-decodes many string IDs, each distinct string once (repeated values
+        such as issuers and benefits then share one str object).
+        """
+        offsets = self._string_offsets.tolist()
+        data = self._mmap[self._string_start:self._string_start + offsets[-1]]
+        decoded = {NO_STRING: None}
+        for string_id in set(string_ids) - decoded.keys():
+            decoded[string_id] = data[offsets[string_id]:offsets[string_id + 1]].decode()
+        return [decoded[string_id] for string_id in string_ids]
+
+    def columns(self, names):
+        """
+        CardColumns over the mapped arrays (rewards are a view when the stored
+        category order starts with REWARD_CATEGORIES, which compile_catalog ensures).
+        Args:
+            names (list): Card names in row order.
+        """
+        rewards = self.sections["rewards"][:, :len(REWARD_CATEGORIES)]
+        benefit_bits = {benefit: 1 << bit for bit, benefit in enumerate(self.header["benefits"])}
+        # reward_rules live in the per-card extras
+        rules = extra_values(self, "reward_rules")
+        return CardColumns.from_arrays(
+            rewards,
+            self.sections["annual_fee"],
+            self.sections["min_credit_score"],
+            benefit_bits,
+            self.sections["benefit_mask"],
+            names,
+            rules=RewardRules(list(rules), list(rules.values()), rewards, REWARD_CATEGORIES) if rules else None,
+        )
+
+
+class BinaryCard(Mapping):
+    """
+    Read-only card record backed by a BinaryCatalogFile; fields are decoded on access.
+    Use dict(card) for a plain (JSON-serializable) copy.
+    """
+
+    __slots__ = ("_file", "_row")
+
+    def __init__(self, catalog_file, row):
+        self._file = catalog_file
+        self._row = row
+
+    def __getitem__(self, key):
+        file, row = self._file, self._row
+        if key in COLUMN_INDEX and file.kind(key, row) != ABSENT:
+            if key in STRING_FIELDS:
+                return file.string(int(file.sections[key][row]))
+            if key in NUMERIC_FIELDS:
+                return file.number(key, row)
+            return file.string_list(key, row)
+        if key == "rewards":
+            rates = file.sections["rewards"][row].tolist()
+            kinds = file.sections["reward_kinds"][row].tolist()
+            return {
+                category: rate if kind == STORED_FLOAT else int(rate)
+                for category, rate, kind in zip(file.categories, rates, kinds) if kind != ABSENT
+            }
+        # Unknown fields, and values kept out of their column
+        extras = self._extras()
+        if key in extras:
+            return extras[key]
+        raise KeyError(key)
+
+    def _extras(self):
+        raw = self._file.string(int(self._file.sections["extras"][self._row]))
+        return json.loads(raw) if raw else {}
+
+    def __iter__(self):
+        for key in self._file.header["field_order"]:
+            if key in self:
+                yield key
+        for key in self._extras():
+            if key not in self._file.header["field_order"]:
+                yield key
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"BinaryCard({dict(self)!r})"
+
+
+class BinaryCards(Sequence):
+    """
+    Sequence of BinaryCard records, one per row of a compiled catalog.
+    """
+
+    def __init__(self, catalog_file):
+        self._file = catalog_file
+        self._field_values = {}
+
+    def __len__(self):
+        return self._file.count
+
+    def field_values(self, field):
+        """
+        All values of a string or list field in row order, decoded in bulk (cached);
+        None where a card's value is not in the column.
+        """
+        if field not in self._field_values:
+            file = self._file
+            if field in STRING_FIELDS:
+                values = file.strings(file.sections[field].tolist())
+            elif field in LIST_FIELDS:
+                offsets = file.sections[f"{field}_offsets"].tolist()
+                items = file.strings(file.sections[f"{field}_items"].tolist())
+                stored = file.sections["kinds"][:, COLUMN_INDEX[field]].tolist()
+                values = [
+                    items[begin:end] if kind != ABSENT else None
+                    for begin, end, kind in zip(offsets, offsets[1:], stored)
+                ]
+            else:
+                raise KeyError(field)
+            self._field_values[field] = values
+        return self._field_values[field]
+
+    def extra_values(self, key):
+        """
+        Row -> value of an extra (non-schema) field, for the cards that have it.
+        """
+        return extra_values(self._file, key)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        row = int(row)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return BinaryCard(self._file, row)
+
+
+def extra_values(catalog_file, key):
+    """
+    Values of a field outside the known schema, for the cards that have it.
+    Only cards with extras are decoded.
+    Returns:
+        dict: Row -> value.
+    """
+    values = {}
+    extras = catalog_file.sections["extras"]
+    for row in np.flatnonzero(extras != NO_STRING).tolist():
+        value = json.loads(catalog_file.string(int(extras[row]))).get(key)
+        if value:
+            values[row] = value
+    return values
+
+
+def _kind(field, value):
+    """
+    How a value is stored in its column: STORED, STORED_FLOAT (a float number),
+    or ABSENT when the column cannot hold it (it is kept in the card's extras).
+    """
+    if field in NUMERIC_FIELDS or field == "rewards":
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return ABSENT
+        return STORED_FLOAT if isinstance(value, float) else STORED
+    if field in STRING_FIELDS:
+        return STORED if isinstance(value, str) else ABSENT
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return STORED
+    return ABSENT
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "cards.json")
+    target = sys.argv[2] if len(sys.argv) > 2 else CARDS_BINARY_PATH
+    print(f"Compiled {compile_catalog(source, target)} cards from {source} into {target}")
@@ -0,0 +1,266 @@
+import contextvars
+import cProfile
+import functools
+import io
+import logging
+import math
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers local work (sub-millisecond) up to slow Assistants runs
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+class _Family:
+    """
+    A named metric with one child per label-value combination.
+    """
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _label_text(self, key, extra=()):
+        pairs = list(zip(self.labels, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{label}="{_escape(value)}"' for label, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines += self._render_child(key, child)
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._children.get(self._key(labels), 0)
+
+    def _render_child(self, key, value):
+        return [f"{self.name}{self._label_text(key)} {_number(value)}"]
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = {"counts": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    child["counts"][i] += 1
+                    break
+            child["count"] += 1
+            child["sum"] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the with-block, in seconds (also when it raises).
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, child["counts"]):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._label_text(key, [('le', _number(bound))])} {cumulative}")
+        lines.append(f"{self.name}_bucket{self._label_text(key, [('le', '+Inf')])} {child['count']}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {_number(child['sum'])}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {child['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide set of counters and histograms, rendered in the Prometheus
+    text exposition format. Each worker process keeps its own values.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+REGISTRY = MetricsRegistry()
+
+CHAT_TURN_SECONDS = REGISTRY.histogram(
+    "chat_turn_seconds", "Chat turn latency, by how the turn was answered (intent, cache, assistant or error)",
+    ("path", "mode"),
+)
+CHAT_STAGE_SECONDS = REGISTRY.histogram(
+    "chat_stage_seconds", "Time spent in each stage of an assistant chat turn", ("stage",),
+)
+OPENAI_API_CALLS = REGISTRY.counter("openai_api_calls_total", "OpenAI API calls made by the assistant", ("call",))
+OPENAI_CALLS_PER_TURN = REGISTRY.histogram(
+    "openai_api_calls_per_turn", "OpenAI API calls per assistant chat turn", buckets=COUNT_BUCKETS,
+)
+RUN_POLL_ITERATIONS = REGISTRY.histogram(
+    "assistant_run_poll_iterations", "Run status polls per wait for a run", buckets=COUNT_BUCKETS,
+)
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Result and response cache lookups", ("cache", "outcome"))
+TOOL_CALL_SECONDS = REGISTRY.histogram("tool_call_seconds", "Assistant tool call latency", ("tool",))
+TOOL_CALL_ERRORS = REGISTRY.counter("tool_call_errors_total", "Assistant tool calls that raised", ("tool",))
+CARD_LOGIC_SECONDS = REGISTRY.histogram("card_logic_seconds", "CardLogic method latency", ("method",))
+
+# Chat turn being measured in this thread or task (None outside a turn)
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+
+class _Turn:
+    def __init__(self, mode):
+        self.mode = mode
+        self.path = "assistant"
+        self.api_calls = 0
+
+
+@contextmanager
+def chat_turn(mode="sync"):
+    """
+    Times one chat turn and counts the OpenAI calls made during it.
+    The caller sets turn.path to "intent" or "cache" when no run was needed;
+    turns that raise are recorded with path "error".
+    Yields:
+        _Turn: The turn being measured.
+    """
+    turn = _Turn(mode)
+    token = _current_turn.set(turn)
+    started = time.perf_counter()
+    try:
+        yield turn
+    except Exception:
+        turn.path = "error"
+        raise
+    finally:
+        _current_turn.reset(token)
+        CHAT_TURN_SECONDS.observe(time.perf_counter() - started, path=turn.path, mode=turn.mode)
+        if turn.path in ("assistant", "error"):
+            OPENAI_CALLS_PER_TURN.observe(turn.api_calls)
+
+
+def stage(name):
+    """
+    Context manager timing one stage of a chat turn (chat_stage_seconds).
+    """
+    return CHAT_STAGE_SECONDS.time(stage=name)
+
+
+def api_call(call):
+    """
+    Counts one OpenAI API call, globally and towards the current turn.
+    """
+    OPENAI_API_CALLS.inc(call=call)
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.api_calls += 1
+
+
+def timed_method(function):
+    """
+    Decorator recording a method's latency in card_logic_seconds, labelled with its name.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with CARD_LOGIC_SECONDS.time(method=function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+def dump_profile(profile, label, directory):
+    """
+    Writes a finished cProfile run to <directory>/<timestamp>-<label>.prof
+    (open with pstats or snakeviz) and logs its top functions.
+    Args:
+        profile (cProfile.Profile): Disabled profiler.
+        label (str): Short name for the profiled work (e.g. the route).
+        directory (str): Output directory, created if missing.
+    Returns:
+        str: Path of the written file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    safe_label = "".join(char if char.isalnum() else "_" for char in label).strip("_") or "request"
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**9:09d}-{safe_label}.prof")
+    profile.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(20)
+    logger.info("Profile for %s written to %s\n%s", label, path, summary.getvalue())
+    return path
+
+
+def new_profile():
+    """
+    A started cProfile.Profile (see dump_profile).
+    """
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
@@ -0,0 +1,260 @@
+"""
+Precomputed candidate sets for recommend_cards.
+
+The profile space is bucketed by monthly spend band per category, preferred
+benefit set and credit-score tier. For every bucket the table keeps each card
+that could reach the top TABLE_DEPTH anywhere inside it: scores only grow with
+spend, so a card's score over a bucket lies between its scores at the bucket's
+lowest and highest corner. Re-ranking a bucket's candidates exactly gives the
+same top 3 as scoring the whole catalog, as long as the user's existing cards
+remove at most TABLE_DEPTH - 3 of them. Inputs outside the table (spend above
+the last band edge, series that cross bands, too many existing cards, buckets
+with more than MAX_TABLE_CANDIDATES candidates) are scored in full.
+
+    python -m services.recommend_table [cards.json] [output.npz]
+"""
+import logging
+import os
+import sys
+
+import numpy as np
+
+from services.scoring import REWARD_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+RECOMMEND_TABLE_PATH = os.path.join("data", "recommend_table.npz")
+
+# Monthly spend band edges (INR), shared by every category; spend at or above
+# the last edge is outside the table
+SPEND_EDGES = (0, 500, 1000, 2000, 3500, 5000, 7500, 10000, 15000, 20000, 30000, 50000)
+
+# Candidates per bucket cover the top 3 plus this many excluded existing cards
+TABLE_DEPTH = 6
+
+# Buckets whose candidate set would be larger than this are left out of the
+# table (scored in full), which bounds both table size and lookup cost
+MAX_TABLE_CANDIDATES = 256
+
+# Catalogs with more distinct benefits get no table (2 ** benefits sets per bucket)
+MAX_TABLE_BENEFITS = 6
+
+# Scores at the corners are compared with this relative slack, so float rounding
+# in multi-month series can never drop a card that belongs in the top 3
+SCORE_TOLERANCE = 1e-9
+
+# Benefit match weight, as in CardLogic._recommend
+BENEFIT_WEIGHT = 1000
+
+
+class RecommendationTable:
+    """
+    Candidate catalog rows per (spend bucket, benefit set, score tier).
+    Neighbouring buckets mostly share a candidate set, so each distinct set is
+    stored once (in CSR form) and buckets refer to it by number.
+    Args:
+        version (str): Catalog version the table was built for.
+        edges (ndarray): Spend band edges.
+        tiers (ndarray): Sorted distinct min_credit_score values of the catalog.
+        benefits (list): Benefit names; bit i of a benefit set is benefits[i].
+        depth (int): Rank each bucket's candidates are guaranteed to cover.
+        bucket_sets (ndarray): Candidate set number of every bucket (-1: not in the table).
+        offsets (ndarray): Set i is rows[offsets[i]:offsets[i + 1]].
+        rows (ndarray): Candidate catalog rows, ascending within a set.
+    """
+
+    def __init__(self, version, edges, tiers, benefits, depth, bucket_sets, offsets, rows):
+        self.version = version
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.tiers = np.asarray(tiers, dtype=np.float64)
+        self.benefits = list(benefits)
+        self.depth = int(depth)
+        self.bucket_sets = np.asarray(bucket_sets)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self._bands = len(self.edges) - 1
+        self._benefit_sets = 1 << len(self.benefits)
+
+    @classmethod
+    def build(cls, columns, version, edges=SPEND_EDGES, depth=TABLE_DEPTH,
+              max_candidates=MAX_TABLE_CANDIDATES, chunk_cells=1 << 22):
+        """
+        Scores every card at the corners of every bucket and keeps, per bucket,
+        the cards whose best score reaches the depth-th best worst score.
+        Args:
+            columns (CardColumns): Catalog columns.
+            version (str): Catalog version.
+            edges (sequence): Increasing spend band edges, starting at 0.
+            depth (int): Rank to cover (3 recommendations plus excluded cards).
+            max_candidates (int): Largest candidate set stored for a bucket.
+            chunk_cells (int): Spend buckets x cards scored at once; bounds memory use.
+        Returns:
+            RecommendationTable: The table.
+        Raises:
+            ValueError: A catalog the corner bounds don't hold for (negative rates or
+                bonuses) or with more than MAX_TABLE_BENEFITS benefits.
+        """
+        _check_monotone(columns)
+        edges = np.asarray(edges, dtype=np.float64)
+        if len(edges) < 2 or edges[0] != 0 or np.any(np.diff(edges) <= 0):
+            raise ValueError("Spend edges must start at 0 and increase")
+        benefits = sorted(columns.benefit_bits, key=columns.benefit_bits.get)
+        if len(benefits) > MAX_TABLE_BENEFITS:
+            raise ValueError(f"Too many distinct benefits for a table ({len(benefits)} > {MAX_TABLE_BENEFITS})")
+
+        n = len(columns)
+        bands = len(edges) - 1
+        tiers, tier_of_card = np.unique(columns.min_credit_score, return_inverse=True)
+        benefit_sets = 1 << len(benefits)
+        # Tier t covers the cards with min_credit_score <= tiers[t - 1] (tier 0: none),
+        # i.e. the card groups 0..t-1 of equal min_credit_score
+        groups = [np.flatnonzero(tier_of_card == group) for group in range(len(tiers))]
+        eligible = [np.zeros(n, dtype=bool)] + [columns.min_credit_score <= tier for tier in tiers]
+        matches = np.zeros((benefit_sets, n))
+        for benefit_set in range(benefit_sets):
+            for i, benefit in enumerate(benefits):
+                if benefit_set >> i & 1:
+                    matches[benefit_set] += (columns.benefit_mask & columns.benefit_bits[benefit]) != 0
+
+        # Band index per category of every spend bucket, in ravel order
+        grid = np.indices((bands,) * len(REWARD_CATEGORIES)).reshape(len(REWARD_CATEGORIES), -1).T
+        bucket_sets = np.full((len(grid), benefit_sets, len(eligible)), -1, dtype=np.int32)
+        set_numbers = {}  # Packed candidate mask -> set number
+        sets = []
+        chunk = max(1, chunk_cells // max(n, 1))
+        for start in range(0, len(grid), chunk):
+            cells = grid[start:start + chunk]
+            low_points, low_fees = columns.simulate(edges[cells][:, None, :])
+            high_points, high_fees = columns.simulate(edges[cells + 1][:, None, :])
+            for benefit_set in range(benefit_sets):
+                bonus = matches[benefit_set] * BENEFIT_WEIGHT
+                lower = (low_points + bonus) - low_fees
+                upper = (high_points + bonus) - high_fees
+                # Best `depth` lower bounds per card group; a tier's threshold is the
+                # depth-th best among its groups
+                tops = [
+                    np.partition(lower[:, rows], len(rows) - depth, axis=1)[:, -depth:] if len(rows) > depth
+                    else lower[:, rows]
+                    for rows in groups
+                ]
+                for tier, mask in enumerate(eligible):
+                    tier_tops = np.concatenate(tops[:tier], axis=1) if tier else np.zeros((len(cells), 0))
+                    if tier_tops.shape[1] > depth:
+                        threshold = np.partition(tier_tops, tier_tops.shape[1] - depth, axis=1)[:, -depth]
+                        threshold = threshold - SCORE_TOLERANCE * (np.abs(threshold) + 1)
+                        keep = mask & (upper >= threshold[:, None])
+                    else:
+                        keep = np.broadcast_to(mask, upper.shape)
+                    stored = np.flatnonzero(keep.sum(axis=1) <= max_candidates)
+                    if not len(stored):
+                        continue
+                    packed, inverse = np.unique(np.packbits(keep[stored], axis=1), axis=0, return_inverse=True)
+                    numbers = np.empty(len(packed), dtype=np.int32)
+                    for i, key in enumerate(packed):
+                        number = set_numbers.setdefault(key.tobytes(), len(sets))
+                        if number == len(sets):
+                            sets.append(np.flatnonzero(np.unpackbits(key, count=n)).astype(np.int32))
+                        numbers[i] = number
+                    bucket_sets[start + stored, benefit_set, tier] = numbers[inverse.ravel()]
+
+        offsets = np.concatenate([[0], np.cumsum([len(rows) for rows in sets])])
+        rows = np.concatenate(sets) if sets else np.zeros(0, dtype=np.int32)
+        return cls(version, edges, tiers, benefits, depth, bucket_sets.ravel(), offsets, rows)
+
+    @classmethod
+    def load(cls, path=RECOMMEND_TABLE_PATH):
+        """
+        Reads a table written by save().
+        Raises:
+            OSError, ValueError, KeyError: Missing or malformed file.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                str(data["version"]), data["edges"], data["tiers"], data["benefits"].tolist(),
+                int(data["depth"]), data["bucket_sets"], data["offsets"], data["rows"],
+            )
+
+    def save(self, path=RECOMMEND_TABLE_PATH):
+        # Written next to the target and renamed, so readers never see a partial file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez_compressed(
+                f, version=np.array(self.version), edges=self.edges, tiers=self.tiers,
+                benefits=np.array(self.benefits, dtype=str), depth=np.array(self.depth),
+                bucket_sets=self.bucket_sets.astype(np.int16 if len(self.offsets) <= 1 << 15 else np.int32),
+                offsets=self.offsets, rows=self.rows.astype(np.int32),
+            )
+        os.replace(temp_path, path)
+
+    def candidates(self, series, preferred_benefits, min_score):
+        """
+        Candidate rows for a profile.
+        Args:
+            series (ndarray): Monthly spend, shape (months, 4).
+            preferred_benefits (list): Benefit names (unknown names never match).
+            min_score (float): The user's minimum credit score.
+        Returns:
+            ndarray: Catalog rows covering the profile's top `depth`, or None when
+                the spend is outside the table.
+        """
+        low = np.searchsorted(self.edges, series.min(axis=0), side="right") - 1
+        high = np.searchsorted(self.edges, series.max(axis=0), side="right") - 1
+        if np.any(low != high) or np.any(low < 0) or np.any(high >= self._bands):
+            return None
+        cell = int(np.ravel_multi_index(low, (self._bands,) * len(REWARD_CATEGORIES)))
+        preferred = set(preferred_benefits)
+        benefit_set = sum(1 << i for i, benefit in enumerate(self.benefits) if benefit in preferred)
+        tier = int(np.searchsorted(self.tiers, min_score, side="right"))
+        number = self.bucket_sets[(cell * self._benefit_sets + benefit_set) * (len(self.tiers) + 1) + tier]
+        if number < 0:
+            return None
+        return self.rows[self.offsets[number]:self.offsets[number + 1]]
+
+
+def _check_monotone(columns):
+    """
+    Corner bounds need scores that never drop as spend grows.
+    """
+    rules = columns.rules
+    negative = np.any(columns.rewards < 0)
+    if rules is not None:
+        negative = negative or np.any(rules.rates < 0) or np.any(rules.caps < 0) or np.any(rules.milestone_bonus < 0)
+    if negative:
+        raise ValueError("Recommendation tables need non-negative reward rates, caps and bonuses")
+
+
+def load_table(version, path=RECOMMEND_TABLE_PATH):
+    """
+    The table at path if it was built for this catalog version.
+    Set RECOMMEND_TABLE=0 to never use one.
+    Returns:
+        RecommendationTable: The table, or None if disabled, missing, unreadable or stale.
+    """
+    if os.getenv("RECOMMEND_TABLE", "1") == "0" or not os.path.exists(path):
+        return None
+    try:
+        table = RecommendationTable.load(path)
+    except (OSError, ValueError, KeyError):
+        logger.exception("Could not load recommendation table %s", path)
+        return None
+    if table.version != version:
+        logger.info("Ignoring recommendation table %s built for catalog %s", path, table.version)
+        return None
+    return table
+
+
+if __name__ == "__main__":
+    from services.catalog import CardCatalog
+
+    source = sys.argv[1] if len(sys.argv) > 1 else os.path.join("data", "cards.json")
+    target = sys.argv[2] if len(sys.argv) > 2 else RECOMMEND_TABLE_PATH
+    catalog = CardCatalog.load(source)
+    table = RecommendationTable.build(catalog.columns, catalog.version)
+    table.save(target)
+    stored = table.bucket_sets[table.bucket_sets >= 0]
+    sizes = np.diff(table.offsets)[stored]
+    print(
+        f"Wrote {target} for catalog {catalog.version} ({len(catalog)} cards): "
+        f"{len(stored)} of {len(table.bucket_sets)} buckets stored as {len(table.offsets) - 1} distinct "
+        f"candidate sets, {sizes.mean() if len(sizes) else 0:.1f} candidates per stored bucket on average"
+    )
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from services.metrics import CACHE_REQUESTS
+from services.sqlite_util import SqliteConnections
+
+
+class MemoryBackend:
+    """
+    Per-process LRU with expiry. Values are stored as JSON strings, so callers
+    always get a fresh copy they can safely mutate.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """
+    On-disk cache shared by every worker on the host (WAL mode, one connection per thread).
+    Least recently used entries beyond max_entries are trimmed on write.
+    """
+
+    def __init__(self, max_entries, path):
+        self.max_entries = max_entries
+        self.db = SqliteConnections(path)
+        with self.db.connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at)")
+
+    def get(self, key, now):
+        conn = self.db.connect()
+        row = conn.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        conn.execute("UPDATE results SET used_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value, expires_at):
+        conn = self.db.connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+            (key, value, expires_at, now),
+        )
+        if self.db.purge_due():
+            conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        return self.db.connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """
+    Bounded, TTL'd cache for CardLogic results, keyed by a canonical hash of the inputs.
+    Callers include the catalog version in the key parts, so a catalog reload
+    invalidates every entry without an explicit flush.
+    Args:
+        backend: MemoryBackend or SqliteBackend.
+        ttl (float): Seconds an entry stays valid.
+        name (str): Label of this cache in the cache_requests_total metric.
+    """
+
+    def __init__(self, backend, ttl=3600, name="result"):
+        self.backend = backend
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, prefix="RESULT_CACHE", max_entries=10000, ttl=3600):
+        """
+        Builds a cache from <prefix>_* environment variables: <prefix>_BACKEND
+        ('memory', 'sqlite' or 'off'), <prefix>_SIZE, <prefix>_TTL and
+        <prefix>_PATH (sqlite file).
+        Args:
+            prefix (str): Environment variable prefix.
+            max_entries (int): Default size bound.
+            ttl (float): Default entry lifetime in seconds.
+        Returns:
+            ResultCache: Configured cache, or None if disabled.
+        """
+        backend = os.getenv(f"{prefix}_BACKEND", "memory")
+        max_entries = int(os.getenv(f"{prefix}_SIZE", str(max_entries)))
+        ttl = float(os.getenv(f"{prefix}_TTL", str(ttl)))
+        if backend == "off" or max_entries <= 0:
+            return None
+        name = prefix.lower().removesuffix("_cache")
+        if backend == "sqlite":
+            path = os.getenv(f"{prefix}_PATH", f".{prefix.lower()}.sqlite3")
+            return cls(SqliteBackend(max_entries, path), ttl, name)
+        return cls(MemoryBackend(max_entries), ttl, name)
+
+    @staticmethod
+    def make_key(*parts):
+        """
+        Canonical key for JSON-serializable parts (dict order doesn't matter).
+        """
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached result for key, or computes, stores and returns it.
+        Args:
+            key (str): Key from make_key().
+            compute (callable): Produces a JSON-serializable result on a miss.
+        Returns:
+            Result (a fresh copy on every call).
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        self.set(key, result)
+        return result
+
+    def get(self, key):
+        """
+        Returns the cached result for key (a fresh copy), or None on a miss.
+        """
+        cached = self.backend.get(key, time.time())
+        if cached is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache=self.name, outcome="miss")
+            return None
+        self.hits += 1
+        CACHE_REQUESTS.inc(cache=self.name, outcome="hit")
+        return json.loads(cached)
+
+    def set(self, key, result):
+        """
+        Stores a JSON-serializable result under key for ttl seconds.
+        """
+        self.backend.set(key, json.dumps(result), time.time() + self.ttl)
+
+    def stats(self):
+        """
+        Hit/miss counters and current size.
+        Returns:
+            dict: {"hits", "misses", "hit_rate", "size"}.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.backend),
+        }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+_result_cache_ready = False
+
+
+def get_result_cache():
+    """
+    Returns the process-wide result cache (None when RESULT_CACHE_BACKEND=off).
+    """
+    global _result_cache, _result_cache_ready
+    if not _result_cache_ready:
+        with _result_cache_lock:
+            if not _result_cache_ready:
+                _result_cache = ResultCache.from_env()
+                _result_cache_ready = True
+    return _result_cache
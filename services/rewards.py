@@ -0,0 +1,161 @@
+import numpy as np
+
+# Wallets up to this size are searched exhaustively (cards ** categories assignments);
+# larger ones send each category to the card that earns most on it
+MAX_WALLET_SEARCH = 6
+
+# Reward points per rupee, as in the recommendation output (simplified)
+POINTS_PER_RUPEE = 100
+
+
+class RewardRules:
+    """
+    Reward rules of the cards that define "reward_rules" in cards.json, as padded
+    arrays for vectorized simulation. Cards without rules earn their flat rate.
+
+    Schema (all keys optional):
+        "reward_rules": {
+            "tiers": {"dining": [[0, 2], [10000, 5]]},   # [monthly spend from, points/INR]
+            "caps": {"dining": 1500},                    # max points per month
+            "milestones": [[100000, 2000]],              # [annual spend, bonus points]
+            "fee_waiver": 200000                         # annual spend waiving the annual fee
+        }
+    Tier rates apply to the part of the month's spend above each threshold and
+    replace the card's flat rate for that category.
+    Args:
+        rows (list): Catalog rows that have rules.
+        rules (list): The "reward_rules" object of each of those rows.
+        rewards (ndarray): Flat rates of every catalog row, shape (cards, categories).
+        categories (tuple): Category order of the rewards columns.
+    """
+
+    def __init__(self, rows, rules, rewards, categories):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        # Catalog row -> position in the rule arrays (-1: no rules)
+        self.position = np.full(len(rewards), -1, dtype=np.int64)
+        self.position[self.rows] = np.arange(len(self.rows))
+
+        parsed = [_parse_rules(rule, rewards[row], categories) for row, rule in zip(self.rows, rules)]
+        tiers = max((len(bands) for card_tiers, _, _, _ in parsed for bands in card_tiers), default=1)
+        milestones = max((len(card_milestones) for _, _, card_milestones, _ in parsed), default=0)
+        shape = (len(parsed), len(categories))
+
+        # Padding tiers start at +inf, so they never earn anything
+        self.lower = np.full(shape + (tiers,), np.inf)
+        self.rates = np.zeros(shape + (tiers,))
+        self.caps = np.full(shape, np.inf)
+        self.milestone_spend = np.full((len(parsed), milestones), np.inf)
+        self.milestone_bonus = np.zeros((len(parsed), milestones))
+        self.fee_waiver = np.full(len(parsed), np.inf)
+        for i, (card_tiers, caps, card_milestones, fee_waiver) in enumerate(parsed):
+            for c, bands in enumerate(card_tiers):
+                for k, (start, rate) in enumerate(bands):
+                    self.lower[i, c, k] = start
+                    self.rates[i, c, k] = rate
+            self.caps[i] = caps
+            for j, (spend, bonus) in enumerate(card_milestones):
+                self.milestone_spend[i, j] = spend
+                self.milestone_bonus[i, j] = bonus
+            self.fee_waiver[i] = fee_waiver
+        self.upper = np.concatenate([self.lower[..., 1:], np.full(shape + (1,), np.inf)], axis=-1)
+
+    @classmethod
+    def from_cards(cls, cards, rewards, categories):
+        """
+        Collects the rules of a card list.
+        Returns:
+            RewardRules | None: None if no card defines rules.
+        """
+        found = [(row, card["reward_rules"]) for row, card in enumerate(cards) if card.get("reward_rules")]
+        if not found:
+            return None
+        rows, rules = zip(*found)
+        return cls(rows, rules, rewards, categories)
+
+    def category_points(self, series, positions):
+        """
+        Annual points per category under tiers and monthly caps.
+        Args:
+            series (ndarray): Monthly spend, shape (..., months, categories).
+            positions (ndarray): Rule-array positions of the cards to simulate.
+        Returns:
+            ndarray: Shape (..., cards, categories).
+        """
+        spend = series[..., :, None, :, None]
+        band = np.maximum(np.minimum(spend, self.upper[positions]) - self.lower[positions], 0)
+        monthly = np.minimum((band * self.rates[positions]).sum(axis=-1), self.caps[positions])
+        return monthly.sum(axis=-3) * (12 / series.shape[-2])
+
+    def spend_terms(self, annual_spend, positions):
+        """
+        Milestone bonus points and whether the annual fee is waived.
+        Args:
+            annual_spend (ndarray): Annual spend on each card, shape (..., cards).
+            positions (ndarray): Rule-array positions of those cards.
+        Returns:
+            tuple: (bonus points, fee waived), both shaped like annual_spend.
+        """
+        reached = annual_spend[..., None] >= self.milestone_spend[positions]
+        bonus = (reached * self.milestone_bonus[positions]).sum(axis=-1)
+        return bonus, annual_spend >= self.fee_waiver[positions]
+
+
+def _parse_rules(rule, flat_rates, categories):
+    """
+    Validates one card's reward_rules.
+    Returns:
+        tuple: (tiers per category, caps per category, milestones, fee waiver spend).
+    """
+    unknown = (set(rule.get("tiers", {})) | set(rule.get("caps", {}))) - set(categories)
+    if unknown:
+        raise ValueError(f"Unknown reward categories in reward_rules: {sorted(unknown)}")
+
+    tiers = []
+    for category, flat_rate in zip(categories, flat_rates):
+        bands = [(float(start), float(rate)) for start, rate in rule.get("tiers", {}).get(category, [[0, flat_rate]])]
+        if not bands or bands[0][0] != 0 or any(a[0] >= b[0] for a, b in zip(bands, bands[1:])):
+            raise ValueError(f"Tiers for {category!r} must start at 0 and increase")
+        tiers.append(bands)
+    caps = [float(rule.get("caps", {}).get(category, np.inf)) for category in categories]
+    milestones = sorted((float(spend), float(bonus)) for spend, bonus in rule.get("milestones", []))
+    fee_waiver = float(rule.get("fee_waiver", np.inf))
+    return tiers, caps, milestones, fee_waiver
+
+
+def optimize_wallet(columns, rows, series):
+    """
+    Chooses which wallet card to use for each spend category.
+    All card-per-category assignments are scored at once, so milestone bonuses
+    and fee waivers that depend on a card's total spend are taken into account.
+    Args:
+        columns (CardColumns): Catalog columns.
+        rows (list): Catalog rows of the cards in the wallet.
+        series (ndarray): Monthly spend, shape (months, categories).
+    Returns:
+        dict: "assignment" (wallet position per category), "points" (annual points
+            per category), "bonus" and "fees" (per wallet card), and "value"
+            (rewards minus fees, in INR).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    points = columns.category_points(series, rows)  # (cards, categories)
+    cards, categories = points.shape
+    category_spend = series.sum(axis=0) * (12 / len(series))
+
+    if cards <= MAX_WALLET_SEARCH:
+        assignments = np.indices((cards,) * categories).reshape(categories, -1).T
+    else:
+        assignments = points.argmax(axis=0)[None, :]
+    chosen = points[assignments, np.arange(categories)]  # (assignments, categories)
+    card_spend = ((assignments[:, :, None] == np.arange(cards)) * category_spend[:, None]).sum(axis=1)
+    bonus, fees = columns.spend_terms(card_spend, rows)  # (assignments, cards)
+    value = (chosen.sum(axis=1) + bonus.sum(axis=1)) / POINTS_PER_RUPEE - fees.sum(axis=1)
+
+    # First best assignment: ties go to cards listed earlier
+    best = int(np.argmax(value))
+    return {
+        "assignment": assignments[best],
+        "points": chosen[best],
+        "bonus": bonus[best],
+        "fees": fees[best],
+        "value": float(value[best]),
+    }
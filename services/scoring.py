@@ -0,0 +1,283 @@
+import numpy as np
+
+from services.rewards import RewardRules
+
+REWARD_CATEGORIES = ("fuel", "travel", "groceries", "dining")
+
+
+class CardColumns:
+    """
+    Columnar view of a card list for vectorized scoring.
+    Row i always refers to cards[i] of the catalog it was built from.
+    """
+
+    def __init__(self, cards):
+        n = len(cards)
+        self.rewards = np.array(
+            [[card["rewards"][category] for category in REWARD_CATEGORIES] for card in cards],
+            dtype=np.float64,
+        ).reshape(n, len(REWARD_CATEGORIES))
+        self.annual_fee = np.array([card["annual_fee"] for card in cards], dtype=np.float64)
+        self.min_credit_score = np.array([card["min_credit_score"] for card in cards], dtype=np.float64)
+
+        # One bit per distinct benefit in the catalog
+        self.benefit_bits = {}
+        for card in cards:
+            for benefit in card["benefits"]:
+                self.benefit_bits.setdefault(benefit, 1 << len(self.benefit_bits))
+        self.benefit_mask = np.array(
+            [sum(self.benefit_bits[benefit] for benefit in set(card["benefits"])) for card in cards],
+            dtype=np.int64,
+        )
+
+        # Exact-name rows, for excluding a user's existing cards
+        self.rows_by_name = {}
+        for row, card in enumerate(cards):
+            self.rows_by_name.setdefault(card["name"], []).append(row)
+
+        # Caps, tiers, milestones and fee waivers (None if every card is flat-rate)
+        self.rules = RewardRules.from_cards(cards, self.rewards, REWARD_CATEGORIES)
+
+    @classmethod
+    def from_arrays(cls, rewards, annual_fee, min_credit_score, benefit_bits, benefit_mask, names, rules=None):
+        """
+        Builds columns from prebuilt arrays (e.g. memory-mapped from a compiled catalog)
+        without copying them.
+        Args:
+            rewards (ndarray): Shape (cards, 4), REWARD_CATEGORIES order.
+            annual_fee, min_credit_score (ndarray): Shape (cards,), float64.
+            benefit_bits (dict): Benefit name -> bit.
+            benefit_mask (ndarray): Shape (cards,), int64.
+            names (iterable): Card names in row order.
+            rules (RewardRules): Reward rules, if any card has them.
+        Returns:
+            CardColumns: Columns over the given arrays.
+        """
+        columns = cls.__new__(cls)
+        columns.rewards = rewards
+        columns.annual_fee = annual_fee
+        columns.min_credit_score = min_credit_score
+        columns.benefit_bits = dict(benefit_bits)
+        columns.benefit_mask = benefit_mask
+        columns.rows_by_name = {}
+        for row, name in enumerate(names):
+            columns.rows_by_name.setdefault(name, []).append(row)
+        columns.rules = rules
+        return columns
+
+    def __len__(self):
+        return len(self.annual_fee)
+
+    def annual_rewards(self, spend):
+        """
+        Annual reward points for every card, for a steady monthly spend.
+        Args:
+            spend (array): Monthly spend per category, shape (4,) or (profiles, 4).
+        Returns:
+            ndarray: Shape (cards,) or (profiles, cards).
+        """
+        return self.simulate(np.asarray(spend, dtype=np.float64)[..., None, :])[0]
+
+    def simulate(self, series, rows=None):
+        """
+        Annual reward points and annual fees over a spend series.
+        A series of one month is a steady spend; longer ones are annualized.
+        Args:
+            series (array): Monthly spend, shape (months, 4) or (profiles, months, 4).
+            rows (ndarray): Catalog rows to simulate (default: every card).
+        Returns:
+            tuple: (points, fees), shape (cards,) or (profiles, cards); fees may be
+                the plain annual_fee column when no card waives its fee.
+        """
+        series = np.asarray(series, dtype=np.float64)
+        rewards = self.rewards if rows is None else self.rewards[rows]
+        fees = self.annual_fee if rows is None else self.annual_fee[rows]
+        scale = 12 / series.shape[-2]
+        spend = series.sum(axis=-2)[..., None, :]
+        # Flat rates: same operation order as the scalar formula, so results are bit-identical
+        points = (
+            spend[..., 0] * rewards[:, 0] +
+            spend[..., 1] * rewards[:, 1] +
+            spend[..., 2] * rewards[:, 2] +
+            spend[..., 3] * rewards[:, 3]
+        ) * scale
+        if self.rules is None:
+            return points, fees
+
+        # Cards with rules, as output columns and rule-array positions
+        if rows is None:
+            targets, positions = self.rules.rows, np.arange(len(self.rules.rows))
+        else:
+            positions = self.rules.position[rows]
+            targets = np.flatnonzero(positions >= 0)
+            positions = positions[targets]
+        if len(targets):
+            # Everything is spent on the card being simulated
+            annual_spend = series.sum(axis=(-2, -1)) * scale
+            card_spend = np.broadcast_to(annual_spend[..., None], annual_spend.shape + targets.shape)
+            bonus, waived = self.rules.spend_terms(card_spend, positions)
+            points[..., targets] = self.rules.category_points(series, positions).sum(axis=-1) + bonus
+            fees = np.array(np.broadcast_to(fees, points.shape))
+            fees[..., targets] = np.where(waived, 0, fees[..., targets])
+        return points, fees
+
+    def category_points(self, series, rows):
+        """
+        Annual points per category for some cards, with tiers and caps applied.
+        Args:
+            series (array): Monthly spend, shape (..., months, 4).
+            rows (ndarray): Catalog rows.
+        Returns:
+            ndarray: Shape (..., len(rows), 4).
+        """
+        series = np.asarray(series, dtype=np.float64)
+        points = series.sum(axis=-2)[..., None, :] * self.rewards[rows] * (12 / series.shape[-2])
+        if self.rules is not None:
+            positions = self.rules.position[rows]
+            has_rules = positions >= 0
+            if has_rules.any():
+                points[..., has_rules, :] = self.rules.category_points(series, positions[has_rules])
+        return points
+
+    def spend_terms(self, annual_spend, rows):
+        """
+        Milestone bonus points and annual fees (after waivers) for some cards.
+        Args:
+            annual_spend (ndarray): Annual spend on each card, shape (..., len(rows)).
+            rows (ndarray): Catalog rows.
+        Returns:
+            tuple: (bonus points, fees), both shaped like annual_spend.
+        """
+        bonus = np.zeros(annual_spend.shape)
+        fees = np.array(np.broadcast_to(self.annual_fee[rows], annual_spend.shape))
+        if self.rules is not None:
+            positions = self.rules.position[rows]
+            has_rules = positions >= 0
+            if has_rules.any():
+                rule_bonus, waived = self.rules.spend_terms(annual_spend[..., has_rules], positions[has_rules])
+                bonus[..., has_rules] = rule_bonus
+                fees[..., has_rules] = np.where(waived, 0, fees[..., has_rules])
+        return bonus, fees
+
+    def benefit_matches(self, preferred_benefits, rows=None):
+        """
+        Number of preferred benefits each card offers.
+        Args:
+            preferred_benefits (list): Benefit names; unknown names never match.
+            rows (ndarray): Catalog rows to check (default: every card).
+        Returns:
+            ndarray: Shape (cards,) or (len(rows),).
+        """
+        benefit_mask = self.benefit_mask if rows is None else self.benefit_mask[rows]
+        matches = np.zeros(len(benefit_mask), dtype=np.int64)
+        for benefit in set(preferred_benefits):
+            bit = self.benefit_bits.get(benefit)
+            if bit is not None:
+                matches += (benefit_mask & bit) != 0
+        return matches
+
+    def benefit_matches_batch(self, preferred_benefits_list):
+        """
+        Number of preferred benefits each card offers, for many profiles.
+        Args:
+            preferred_benefits_list (list): One benefit list per profile.
+        Returns:
+            ndarray: Shape (profiles, cards).
+        """
+        profile_mask = np.array(
+            [sum(self.benefit_bits.get(benefit, 0) for benefit in set(preferred)) for preferred in preferred_benefits_list],
+            dtype=np.int64,
+        )
+        matches = np.zeros((len(profile_mask), len(self)), dtype=np.int64)
+        for bit in self.benefit_bits.values():
+            matches += ((profile_mask & bit) != 0)[:, None] & ((self.benefit_mask & bit) != 0)[None, :]
+        return matches
+
+    def eligible(self, min_score, existing_cards=()):
+        """
+        Boolean mask of cards the user qualifies for and does not already hold.
+        """
+        mask = self.min_credit_score <= min_score
+        for name in existing_cards:
+            rows = self.rows_by_name.get(name)
+            if rows:
+                mask[rows] = False
+        return mask
+
+    def eligible_batch(self, min_scores, existing_cards_list):
+        """
+        Eligibility mask for many profiles, shape (profiles, cards).
+        """
+        mask = self.min_credit_score[None, :] <= np.asarray(min_scores, dtype=np.float64)[:, None]
+        for profile_row, existing_cards in enumerate(existing_cards_list):
+            for name in existing_cards:
+                rows = self.rows_by_name.get(name)
+                if rows:
+                    mask[profile_row, rows] = False
+        return mask
+
+
+def spend_vector(spending_habits):
+    """
+    Monthly spend per category in REWARD_CATEGORIES order (missing = 0).
+    """
+    return [spending_habits.get(category, 0) for category in REWARD_CATEGORIES]
+
+
+def spend_matrix(spending_habits):
+    """
+    Monthly spend series, shape (months, 4). A number is the same every month;
+    a list gives one amount per month (all lists must have the same length).
+    Raises:
+        ValueError: Mismatched or empty series.
+        TypeError: A non-numeric amount.
+    """
+    values = spend_vector(spending_habits)
+    lengths = {len(value) for value in values if isinstance(value, (list, tuple))}
+    if len(lengths) > 1:
+        raise ValueError("Monthly spending series must all cover the same number of months")
+    months = lengths.pop() if lengths else 1
+    if months == 0:
+        raise ValueError("Monthly spending series must not be empty")
+    series = [list(value) if isinstance(value, (list, tuple)) else [value] * months for value in values]
+    for amount in (amount for column in series for amount in column):
+        if not isinstance(amount, (int, float)):
+            raise TypeError(f"Spending amounts must be numbers, got {amount!r}")
+    return np.array(series, dtype=np.float64).T
+
+
+def top_k(scores, mask, k):
+    """
+    Row indices of the k best eligible scores, highest first.
+    Ties keep catalog order, matching a stable descending sort.
+    Uses partial selection, so cost stays linear in the catalog size.
+    Args:
+        scores (ndarray): Score per card.
+        mask (ndarray): Boolean eligibility per card.
+        k (int): Number of rows to return.
+    Returns:
+        ndarray: Selected row indices.
+    """
+    rows = np.flatnonzero(mask)
+    if len(rows) > k:
+        candidate_scores = scores[rows]
+        kth_best = np.partition(candidate_scores, len(rows) - k)[len(rows) - k]
+        # Keep everything tied with the k-th best so tie-breaking stays exact
+        rows = rows[candidate_scores >= kth_best]
+    order = np.lexsort((rows, -scores[rows]))
+    return rows[order[:k]]
+
+
+def top_k_batch(scores, mask, k):
+    """
+    Row-wise top_k over a (profiles, cards) score matrix.
+    Returns:
+        list: One array of selected card rows per profile.
+    """
+    if scores.shape[1] <= k:
+        return [top_k(row_scores, row_mask, k) for row_scores, row_mask in zip(scores, mask)]
+    masked = np.where(mask, scores, -np.inf)
+    kth_best = np.partition(masked, scores.shape[1] - k, axis=1)[:, scores.shape[1] - k]
+    # Narrow every profile to its tied-with-k-th candidates, then break ties exactly
+    candidates = mask & (masked >= kth_best[:, None])
+    return [top_k(row_scores, row_candidates, k) for row_scores, row_candidates in zip(scores, candidates)]
@@ -0,0 +1,41 @@
+import itertools
+import sqlite3
+import threading
+
+
+class SqliteConnections:
+    """
+    Per-thread connections to a SQLite file shared by every worker on the host
+    (WAL mode, so readers never block the writer), plus a write counter that
+    tells the owner when to run its housekeeping (purging expired rows).
+    Used by the SQLite result cache and session store.
+    Args:
+        path (str): Database file.
+        purge_every (int): Writes between housekeeping runs.
+    """
+
+    def __init__(self, path, purge_every=100):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = itertools.count(1)
+
+    def connect(self):
+        """
+        This thread's connection (autocommit), opened on first use.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def purge_due(self):
+        """
+        Counts one write.
+        Returns:
+            bool: True every purge_every writes; purge occasionally rather than on every write.
+        """
+        return next(self._writes) % self.purge_every == 0
@@ -0,0 +1,151 @@
+import re
+from collections import deque
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every known phrase in a text in one pass,
+    independent of how many phrases there are.
+    Args:
+        patterns (dict): Lowercase phrase -> value returned on a match.
+    """
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # (phrase length, value) for phrases ending at each state
+
+        for phrase, value in patterns.items():
+            state = 0
+            for char in phrase:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append((len(phrase), value))
+
+        # Breadth-first failure links; each state inherits the outputs of its fallback
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find_all(self, text):
+        """
+        Every occurrence of every phrase in text (case-sensitive; lowercase the text first).
+        Returns:
+            list: (start, end, value) tuples.
+        """
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._out[state]:
+                matches.append((i + 1 - length, i + 1, value))
+        return matches
+
+    def find_words(self, text):
+        """
+        Whole-word matches, leftmost-longest and non-overlapping
+        (so "hdfc regalia" wins over "hdfc" inside it).
+        Args:
+            text (str): Lowercase text.
+        Returns:
+            list: (start, end, value) tuples in text order.
+        """
+        candidates = [
+            (start, end, value)
+            for start, end, value in self.find_all(text)
+            if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+        ]
+        candidates.sort(key=lambda match: (match[0], -match[1]))
+        selected = []
+        last_end = 0
+        for start, end, value in candidates:
+            if start >= last_end:
+                selected.append((start, end, value))
+                last_end = end
+        return selected
+
+
+def normalize_name(text):
+    """
+    Lowercase words separated by single spaces, punctuation dropped ("HDFC-Regalia!" -> "hdfc regalia").
+    """
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def _trigrams(text):
+    # Padded so word starts and ends count ("  hd", ... "ia ")
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Fuzzy matcher for short names. An inverted index maps each character trigram
+    to the names containing it, so a query only touches the postings of its own
+    trigrams.
+    Args:
+        names (list): Names to index, already normalized (see normalize_name);
+            matches refer to positions in this list.
+    """
+
+    def __init__(self, names):
+        grams = []
+        sizes = np.empty(len(names), dtype=np.int64)
+        for i, name in enumerate(names):
+            name_grams = _trigrams(name)
+            sizes[i] = len(name_grams)
+            grams.extend(name_grams)
+
+        # Postings in CSR form: entries of trigram g are entries[starts[g]:starts[g + 1]]
+        self._vocabulary = {gram: code for code, gram in enumerate(set(grams))}
+        codes = np.fromiter(map(self._vocabulary.__getitem__, grams), dtype=np.int64, count=len(grams))
+        order = np.argsort(codes, kind="stable")
+        self._entries = np.repeat(np.arange(len(names)), sizes)[order]
+        self._starts = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(self._vocabulary)))])
+        self._sizes = sizes
+
+    def search(self, query, limit=5):
+        """
+        Best-matching names for a query.
+        The score averages the Dice similarity of the two trigram sets with the
+        share of the query's trigrams found in the name, so partial names
+        ("magnus" for "Axis Magnus") still rank high.
+        Args:
+            query (str): Text to match (any case).
+            limit (int): Most matches to return.
+        Returns:
+            list: (position, score) tuples, best first; scores are in [0, 1].
+        """
+        grams = _trigrams(normalize_name(query))
+        codes = [self._vocabulary[gram] for gram in grams if gram in self._vocabulary]
+        if not codes:
+            return []
+        hits = np.concatenate([self._entries[self._starts[code]:self._starts[code + 1]] for code in codes])
+        # Count shared trigrams over the hit postings only, never the whole index
+        ids, common = np.unique(hits, return_counts=True)
+        dice = 2 * common / (len(grams) + self._sizes[ids])
+        scores = (dice + common / len(grams)) / 2
+        if len(ids) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[best], scores[best]
+        order = np.lexsort((ids, -scores))
+        return [(int(ids[i]), float(scores[i])) for i in order]
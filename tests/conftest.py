@@ -0,0 +1,23 @@
+import pytest
+
+from services.card_logic import CardLogic
+from services.catalog import CardCatalog
+
+
+@pytest.fixture
+def card_logic_for(monkeypatch):
+    """
+    Builds an uncached CardLogic without the recommendation table, so every
+    result comes from full scoring. Pass a card list (or CardCatalog) to score
+    against it instead of data/cards.json.
+    """
+    monkeypatch.setenv("RECOMMEND_TABLE", "0")
+    monkeypatch.setattr("services.card_logic.get_result_cache", lambda: None)
+
+    def build(cards=None):
+        if cards is not None:
+            catalog = cards if isinstance(cards, CardCatalog) else CardCatalog(cards)
+            monkeypatch.setattr("services.card_logic.get_catalog", lambda: catalog)
+        return CardLogic()
+
+    return build
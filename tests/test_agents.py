@@ -0,0 +1,110 @@
+"""
+The sync and asyncio assistants against the in-process fake Assistants API:
+same replies, API calls and session state for the same conversation.
+"""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from agents import base_agent
+from agents.async_agent import AsyncCreditCardAssistant
+from agents.base_agent import FALLBACK_REPLY, MAX_TOOL_ROUNDS, CreditCardAssistant
+from agents.session import ChatSession
+from benchmarks.fake_openai import FakeAssistantsClient
+
+
+def awaitable(namespace):
+    """The fake client's call tree with every call made awaitable, as AsyncOpenAI's are."""
+    calls = {}
+    for name, value in vars(namespace).items():
+        if isinstance(value, SimpleNamespace):
+            calls[name] = awaitable(value)
+        else:
+            async def call(*args, _call=value, **kwargs):
+                return _call(*args, **kwargs)
+            calls[name] = call
+    return SimpleNamespace(**calls)
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("RESPONSE_CACHE_BACKEND", "memory")
+    monkeypatch.setattr(base_agent, "RUN_POLL_INITIAL", 0)
+
+
+def sync_assistant(fake):
+    assistant = CreditCardAssistant(assistant_id="asst_test")
+    assistant.client = fake
+    return assistant.process_message
+
+
+def async_assistant(fake):
+    assistant = AsyncCreditCardAssistant(assistant_id="asst_test", client=SimpleNamespace(beta=awaitable(fake.beta)))
+    return lambda message, session: asyncio.run(assistant.process_message(message, session))
+
+
+def conversation(make_assistant):
+    fake = FakeAssistantsClient(latency=0, polls=1)
+    process_message = make_assistant(fake)
+    first, second = ChatSession("first"), ChatSession("second")
+    replies = [
+        process_message("describe SBI Elite", first),  # Intent, kept until the thread exists
+        process_message("hi", second),  # Opener, answered by a run and cached
+        process_message("hi", ChatSession("third")),  # Served from the response cache
+        process_message("which card suits me?", first),  # Run with one tool round
+        process_message("how many cards do you have", first),  # Intent, added to the thread
+    ]
+    state = [(session.pending_messages, session.last_run_id, session.user_data) for session in (first, second)]
+    return replies, dict(fake.calls), state
+
+
+def test_sync_and_async_turns_match():
+    replies, calls, state = conversation(sync_assistant)
+
+    assert replies[1:4] == ["Here are your cards."] * 3
+    assert replies[0].startswith("**SBI Elite**")
+    assert replies[4].startswith("We currently have")
+    assert calls["create_thread"] == 2
+    assert calls["create_message"] == 2  # The count turn, added after "which card" created the thread
+    assert conversation(async_assistant) == (replies, calls, state)
+
+
+@pytest.mark.parametrize("make_assistant", [sync_assistant, async_assistant])
+def test_tool_rounds_are_capped(make_assistant):
+    fake = FakeAssistantsClient(latency=0, polls=0, tool_rounds=MAX_TOOL_ROUNDS + 1)
+    with pytest.raises(RuntimeError, match="tool rounds"):
+        make_assistant(fake)("which card suits me?", ChatSession("capped"))
+    assert fake.calls["cancel_run"] == 1
+
+
+@pytest.mark.parametrize("make_assistant", [sync_assistant, async_assistant])
+def test_slow_run_times_out(make_assistant, monkeypatch):
+    monkeypatch.setattr(base_agent, "RUN_TIMEOUT", 0)
+    fake = FakeAssistantsClient(latency=0, polls=5)
+    with pytest.raises(TimeoutError):
+        make_assistant(fake)("which card suits me?", ChatSession("slow"))
+    assert fake.calls["cancel_run"] == 1
+
+
+@pytest.mark.parametrize("make_assistant", [sync_assistant, async_assistant])
+def test_run_without_reply_falls_back(make_assistant):
+    fake = FakeAssistantsClient(latency=0, polls=0, tool_rounds=0)
+    fake.beta.threads.messages.list = lambda **kwargs: SimpleNamespace(data=[])
+    session = ChatSession("empty")
+    assert make_assistant(fake)("hi", session) == FALLBACK_REPLY
+    assert session.last_run_id is not None
+
+
+def test_pinned_assistant_with_another_spec_is_reported(monkeypatch, caplog):
+    monkeypatch.setenv("OPENAI_ASSISTANT_ID", "asst_pinned")
+    fake = FakeAssistantsClient(latency=0)
+    with caplog.at_level(logging.WARNING, logger=base_agent.__name__):
+        assert base_agent.resolve_assistant_id(fake) == "asst_pinned"
+        assert not caplog.records
+
+        fake.beta.assistants.retrieve = lambda assistant_id: SimpleNamespace(id=assistant_id, metadata={})
+        assert base_agent.resolve_assistant_id(fake) == "asst_pinned"
+    assert "out of date" in caplog.text
@@ -0,0 +1,81 @@
+"""
+Offline re-scoring: chunks scored through recommend_batch against per-record
+recommend_cards, and the latency reservoir.
+"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_cards
+from services import batch_eval
+from services.scoring import REWARD_CATEGORIES
+
+
+@pytest.fixture
+def card_logic(card_logic_for, monkeypatch):
+    card_logic = card_logic_for(make_cards(200, 0))
+    monkeypatch.setattr(batch_eval, "_card_logic", card_logic)
+    return card_logic
+
+
+def test_chunk_matches_per_record_scoring(card_logic):
+    rng = random.Random(0)
+    names = [card["name"] for card in card_logic.catalog.cards]
+    lines = []
+    for i in range(300):
+        profile = {
+            "spending_habits": {category: rng.randrange(0, 30000, 500) for category in REWARD_CATEGORIES},
+            "existing_cards": [rng.choice(names)],
+        }
+        lines.append(json.dumps({"id": i, "user_data": profile}))
+    lines[7] = "not json"
+    lines[8] = json.dumps({"id": 8})
+    lines[9] = json.dumps({"id": 9, "profile": {"spending_habits": {"dining": "lots"}}})
+    lines[10] = json.dumps({"id": 10, "profile": {"spending_habits": {"dining": 1}, "preferred_benefits": 3}})
+
+    records = batch_eval.score_chunk(100, lines)
+
+    assert [record["index"] for record in records] == list(range(100, 400))
+    assert all(record["elapsed_ms"] >= 0 for record in records)
+    assert [i for i, record in enumerate(records) if "error" in record] == [7, 8, 9, 10]
+    for line, record in zip(lines[11:], records[11:]):
+        profile = json.loads(line)["user_data"]
+        expected = card_logic.recommend_cards(profile)
+        assert record["recommendations"] == expected
+        assert record["simulations"] == [
+            card_logic.simulate_rewards(card["name"], profile["spending_habits"]) for card in expected
+        ]
+
+
+def test_failed_batch_is_rescored_per_record(card_logic, monkeypatch):
+    def fail(profiles, chunk_size):
+        raise TypeError("batch failed")
+
+    monkeypatch.setattr(card_logic, "recommend_batch", fail)
+    lines = [
+        json.dumps({"spending_habits": {"dining": 5000}}),
+        json.dumps({"spending_habits": {"dining": 5000}, "existing_cards": 1}),
+        json.dumps({"spending_habits": {"travel": 9000}}),
+    ]
+
+    records = batch_eval.score_chunk(0, lines)
+
+    assert "error" in records[1]
+    for i in (0, 2):
+        assert records[i]["recommendations"] == card_logic.recommend_cards(json.loads(lines[i]))
+
+
+def test_reservoir_is_exact_below_its_size_and_bounded_above():
+    rng = random.Random(1)
+    values = [rng.random() for _ in range(500)]
+    reservoir = batch_eval.Reservoir(size=1000)
+    reservoir.extend(values)
+    assert reservoir.percentile(95) == np.percentile(values, 95)
+
+    reservoir = batch_eval.Reservoir(size=100)
+    reservoir.extend(range(10000))
+    assert reservoir.count == 10000
+    assert len(reservoir._sample) == 100
+    assert 3000 < reservoir.percentile(50) < 7000
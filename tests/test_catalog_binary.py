@@ -0,0 +1,109 @@
+"""
+Compiled catalog: used only for the JSON it was compiled from, and the same
+cards and scores as the JSON path.
+"""
+import json
+import os
+
+import pytest
+
+from benchmarks.synthetic import make_cards, write_cards
+from services import catalog_binary
+from services.catalog import CardCatalog
+
+
+@pytest.fixture
+def cards_json(tmp_path):
+    path = tmp_path / "cards.json"
+    write_cards(make_cards(20, 0), path)
+    return str(path)
+
+
+def test_compiled_catalog_matches_json(cards_json):
+    binary_path = os.path.splitext(cards_json)[0] + ".bin"
+    catalog_binary.compile_catalog(cards_json, binary_path)
+    assert catalog_binary.is_fresh(binary_path, cards_json)
+
+    compiled = CardCatalog.load(cards_json)
+    parsed = CardCatalog.from_file(cards_json)
+    assert isinstance(compiled.cards, catalog_binary.BinaryCards)
+    assert compiled.version == parsed.version
+    assert [dict(card) for card in compiled.cards] == list(parsed.cards)
+
+
+def test_round_trip_keeps_each_value_as_written(cards_json):
+    with open(cards_json) as f:
+        cards = json.load(f)
+    cards[0]["affiliate_link"] = None
+    cards[1]["annual_fee"] = 499.5  # The only float fee; every other fee stays an int
+    del cards[2]["joining_fee"]
+    cards[3].pop("perks", None)
+    cards[4]["perks"] = None
+    cards[5]["rewards"]["dining"] = 2.5
+    cards[6]["image"] = ["front.png", "back.png"]
+    cards[7]["aliases"] = ["seven"]
+    write_cards(cards, cards_json)
+    binary_path = os.path.splitext(cards_json)[0] + ".bin"
+    catalog_binary.compile_catalog(cards_json, binary_path)
+
+    compiled = CardCatalog.load(cards_json)
+    parsed = CardCatalog.from_file(cards_json)
+    assert isinstance(compiled.cards, catalog_binary.BinaryCards)
+    assert [dict(card) for card in compiled.cards] == list(parsed.cards) == cards
+    assert [type(card["annual_fee"]) for card in compiled.cards[:3]] == [int, float, int]
+    assert "joining_fee" not in compiled.cards[2]
+    assert compiled.cards[0]["affiliate_link"] is None
+    assert compiled.columns.annual_fee.tolist() == parsed.columns.annual_fee.tolist()
+    assert compiled.columns.rewards.tolist() == parsed.columns.rewards.tolist()
+
+
+@pytest.mark.parametrize("field", ["annual_fee", "min_credit_score", "issuer", "benefits"])
+def test_missing_required_field_fails_to_compile(cards_json, tmp_path, field):
+    # The same fields the JSON path needs
+    with open(cards_json) as f:
+        cards = json.load(f)
+    del cards[3][field]
+    write_cards(cards, cards_json)
+
+    with pytest.raises(KeyError):
+        CardCatalog.from_file(cards_json)
+    with pytest.raises(ValueError, match=field):
+        catalog_binary.compile_catalog(cards_json, str(tmp_path / "cards.bin"))
+
+
+def test_binary_from_another_json_is_not_used(cards_json, tmp_path):
+    # A newer cards.bin compiled from different cards must not replace cards.json
+    other = tmp_path / "other.json"
+    write_cards(make_cards(5, 1), other)
+    binary_path = os.path.splitext(cards_json)[0] + ".bin"
+    catalog_binary.compile_catalog(str(other), binary_path)
+
+    assert not catalog_binary.is_fresh(binary_path, cards_json)
+    catalog = CardCatalog.load(cards_json)
+    assert not isinstance(catalog.cards, catalog_binary.BinaryCards)
+    assert len(catalog) == 20
+
+
+def test_edited_json_invalidates_binary(cards_json):
+    binary_path = os.path.splitext(cards_json)[0] + ".bin"
+    catalog_binary.compile_catalog(cards_json, binary_path)
+    with open(cards_json) as f:
+        cards = json.load(f)
+    cards[0]["annual_fee"] += 1
+    write_cards(cards, cards_json)
+
+    assert not catalog_binary.is_fresh(binary_path, cards_json)
+    assert CardCatalog.load(cards_json).cards[0]["annual_fee"] == cards[0]["annual_fee"]
+
+
+def test_missing_reward_category_fails_to_compile(cards_json, tmp_path):
+    with open(cards_json) as f:
+        cards = json.load(f)
+    del cards[3]["rewards"]["dining"]
+    write_cards(cards, cards_json)
+
+    with pytest.raises(KeyError):
+        CardCatalog.from_file(cards_json)
+    with pytest.raises(ValueError, match="dining"):
+        catalog_binary.compile_catalog(cards_json, str(tmp_path / "cards.bin"))
+    assert not os.path.exists(tmp_path / "cards.bin")
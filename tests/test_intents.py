@@ -0,0 +1,52 @@
+"""
+Local routing of count, lookup and compare questions: exact phrasings are
+answered from the catalog, anything else falls back to the assistant (None).
+"""
+import pytest
+
+from agents.intents import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("message,title", [
+    ("Compare HDFC Regalia and Axis Magnus", "**HDFC Regalia vs Axis Magnus**"),
+    ("compare the hdfc regalia credit card with axis magnus?", "**HDFC Regalia vs Axis Magnus**"),
+    ("Difference between SBI Elite and the Amex Platinum", "**SBI Elite vs Amex Platinum**"),
+    ("HDFC Infinia vs. ICICI Emeralde", "**HDFC Infinia vs ICICI Emeralde**"),
+    ("axis neo versus icici coral card", "**Axis Neo vs ICICI Coral**"),
+])
+def test_compare_routes_when_the_message_is_just_two_cards(router, message, title):
+    assert router.route(message).startswith(title)
+
+
+@pytest.mark.parametrize("message", [
+    "Is HDFC Regalia better than Axis Magnus for travel, compare",
+    "Compare HDFC Regalia and Axis Magnus for someone who travels a lot",
+    "I have HDFC Regalia, should I get Axis Magnus or compare others?",
+    "HDFC Regalia vs Axis Magnus vs SBI Elite",
+    "compare HDFC Regalia and HDFC Regalia",
+    "compare HDFC Regalia and SBI cards",
+    "which is better, HDFC Regalia or Axis Magnus",
+    "HDFC Regalia and Axis Magnus",
+])
+def test_compare_falls_back_for_anything_else(router, message):
+    assert router.route(message) is None
+
+
+def test_count_and_lookup_route(router):
+    assert router.route("How many cards do you have?").startswith("We currently have **21**")
+    assert router.route("how many SBI cards").startswith("We have **4** State Bank of India cards")
+    assert router.route("Tell me about the HDFC Regalia credit card").startswith("**HDFC Regalia** (HDFC Bank)")
+
+
+@pytest.mark.parametrize("message", [
+    "how many cards should I have",
+    "I already have HDFC Regalia, what is the best card for travel?",
+    "tell me about HDFC Regalia vs Axis Magnus lounge access",
+])
+def test_count_and_lookup_fall_back_for_anything_else(router, message):
+    assert router.route(message) is None
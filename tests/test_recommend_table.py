@@ -0,0 +1,118 @@
+"""
+The precomputed recommendation table against full-catalog scoring, over every
+bucket of a small table, with spends on band edges and existing cards excluded.
+"""
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_cards
+from services.card_logic import _existing_names, _profile_terms
+from services.catalog import CardCatalog
+from services.recommend_table import RecommendationTable
+from services.scoring import REWARD_CATEGORIES, spend_matrix
+
+# Few bands keep the exhaustive walk over buckets quick
+EDGES = (0, 2000, 10000, 50000)
+
+REWARD_RULES = (
+    {"tiers": {"dining": [[0, 2], [10000, 5]]}, "caps": {"dining": 1500}, "milestones": [[100000, 2000]], "fee_waiver": 200000},
+    {"caps": {"fuel": 100}},
+    {"milestones": [[50000, 20000]], "fee_waiver": 60000},
+)
+
+
+def make_catalog(with_rules):
+    cards = make_cards(40, 7)
+    if with_rules:
+        for card, rules in zip(cards, REWARD_RULES):
+            card["reward_rules"] = rules
+    # Cards scoring alike, so ties have to break the same way
+    cards += [dict(card, name=f"{card['name']} Twin") for card in cards[:4]]
+    return CardCatalog(cards)
+
+
+def band_spend(rng, band):
+    # On the lower edge, just under the upper edge, or inside the band
+    low, high = EDGES[band], EDGES[band + 1]
+    return rng.choice((low, high - 1, rng.randrange(low, high)))
+
+
+def compare(card_logic, catalog, table, user_data):
+    """
+    Table and full-scoring results for a profile (the table's is None when it falls back).
+    """
+    spending_habits, preferred_benefits, existing_cards, credit_score, min_score = _profile_terms(user_data)
+    existing_cards = _existing_names(catalog, existing_cards)
+    series = spend_matrix(spending_habits)
+    from_table = card_logic._recommend_from_table(
+        catalog, table, series, preferred_benefits, existing_cards, credit_score, min_score
+    )
+    full = card_logic._recommend(catalog, spending_habits, preferred_benefits, existing_cards, credit_score, min_score)
+    return from_table, full
+
+
+@pytest.mark.parametrize("with_rules", [False, True])
+def test_every_bucket_matches_full_scoring(card_logic_for, with_rules):
+    card_logic = card_logic_for()
+    catalog = make_catalog(with_rules)
+    assert catalog.recommend_table is None
+    table = RecommendationTable.build(catalog.columns, catalog.version, edges=EDGES)
+    names = [card["name"] for card in catalog.cards]
+    benefit_sets = [
+        list(benefits) for size in range(len(table.benefits) + 1)
+        for benefits in itertools.combinations(table.benefits, size)
+    ]
+    # One credit score per tier: below every card's minimum, then each minimum
+    credit_scores = [str(int(table.tiers[0]) - 50)] + [str(int(tier)) for tier in table.tiers]
+    rng = random.Random(with_rules)
+
+    buckets = 0
+    for bands in itertools.product(range(len(EDGES) - 1), repeat=len(REWARD_CATEGORIES)):
+        for benefits, credit_score in itertools.product(benefit_sets, credit_scores):
+            user_data = {
+                "spending_habits": {category: band_spend(rng, band) for category, band in zip(REWARD_CATEGORIES, bands)},
+                "preferred_benefits": benefits,
+                "existing_cards": rng.sample(names, rng.choice((0, 1, 3))),
+                "credit_score": credit_score,
+            }
+            from_table, full = compare(card_logic, catalog, table, user_data)
+            assert from_table is not None, user_data
+            assert from_table == full, user_data
+            buckets += 1
+    assert buckets == len(table.bucket_sets)
+
+
+def test_outside_the_table_falls_back(card_logic_for):
+    card_logic = card_logic_for()
+    catalog = make_catalog(with_rules=False)
+    table = RecommendationTable.build(catalog.columns, catalog.version, edges=EDGES)
+    names = [card["name"] for card in catalog.cards]
+    inside = {"fuel": 100, "travel": 2500, "groceries": 6000, "dining": 30000}
+    fallbacks = [
+        {"spending_habits": dict(inside, dining=EDGES[-1])},  # On the last edge
+        {"spending_habits": dict(inside, travel=[500, 2500])},  # Months in different bands
+        {"spending_habits": inside, "existing_cards": names[:4]},  # More excluded cards than the depth covers
+    ]
+    for user_data in fallbacks:
+        from_table, full = compare(card_logic, catalog, table, user_data)
+        assert from_table is None
+        assert len(full) == 3
+
+
+def test_monthly_series_within_a_band(card_logic_for):
+    card_logic = card_logic_for()
+    catalog = make_catalog(with_rules=True)
+    table = RecommendationTable.build(catalog.columns, catalog.version, edges=EDGES)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        bands = rng.integers(0, len(EDGES) - 1, len(REWARD_CATEGORIES))
+        spending = {
+            category: [int(value) for value in rng.integers(EDGES[band], EDGES[band + 1], 6)]
+            for category, band in zip(REWARD_CATEGORIES, bands)
+        }
+        from_table, full = compare(card_logic, catalog, table, {"spending_habits": spending, "preferred_benefits": ["cashback"]})
+        assert from_table is not None
+        assert from_table == full
@@ -0,0 +1,165 @@
+"""
+Reward rules (tiers, caps, milestones, fee waivers) and the wallet optimizer,
+against hand-computed expectations. Rates are points per rupee; 100 points = Rs. 1.
+"""
+import pytest
+
+from services import rewards
+from services.rewards import optimize_wallet
+from services.scoring import spend_matrix
+
+
+def card(name, rates, annual_fee=0, reward_rules=None):
+    rates = {"fuel": 1, "travel": 1, "groceries": 1, "dining": 1, **rates}
+    result = {
+        "name": name,
+        "issuer": "Test Bank",
+        "image": "https://example.com/card.png",
+        "joining_fee": annual_fee,
+        "annual_fee": annual_fee,
+        "benefits": ["cashback"],
+        "rewards": rates,
+        "min_credit_score": 650,
+    }
+    if reward_rules is not None:
+        result["reward_rules"] = reward_rules
+    return result
+
+
+CARDS = [
+    # Dining: 2 points/INR up to Rs. 10,000 a month, 5 above it, at most 30,000 points a month
+    card("Tiered Dining", {"dining": 1}, reward_rules={
+        "tiers": {"dining": [[0, 2], [10000, 5]]},
+        "caps": {"dining": 30000},
+    }),
+    # 2 points/INR on travel; 5,000 points at Rs. 50,000 and 20,000 more at Rs. 100,000 a year
+    card("Milestone Travel", {"travel": 2}, reward_rules={
+        "milestones": [[100000, 20000], [50000, 5000]],
+    }),
+    # Rs. 2,500 fee, waived from Rs. 200,000 of annual spend
+    card("Fee Waiver", {}, annual_fee=2500, reward_rules={"fee_waiver": 200000}),
+    # Flat card for the wallet: 2 points/INR on dining
+    card("Dining Plus", {"dining": 2}),
+    # 80,000 bonus points once Rs. 120,000 a year goes on it
+    card("Big Milestone", {}, reward_rules={"milestones": [[120000, 80000]]}),
+]
+
+
+@pytest.fixture
+def card_logic(card_logic_for):
+    return card_logic_for(CARDS)
+
+
+def row(card_logic, name):
+    return card_logic.catalog.resolve(name)
+
+
+def test_tiers_then_monthly_cap(card_logic):
+    columns = card_logic.catalog.columns
+    dining = row(card_logic, "Tiered Dining")
+
+    # Rs. 8,000: all in the first tier, 16,000 points a month
+    points = columns.category_points(spend_matrix({"dining": 8000}), [dining])
+    assert points[0].tolist() == [0, 0, 0, 16000 * 12]
+    # Rs. 12,000: 10,000 * 2 + 2,000 * 5 = 30,000, exactly the cap
+    assert card_logic.simulate_rewards("Tiered Dining", {"dining": 12000}) == {
+        "card_name": "Tiered Dining", "annual_rewards": "Rs. 3600",
+    }
+    # Rs. 15,000: 20,000 + 25,000 = 45,000, capped at 30,000
+    assert card_logic.simulate_rewards("Tiered Dining", {"dining": 15000})["annual_rewards"] == "Rs. 3600"
+    # Caps apply per month: (16,000 + 30,000) over two months, annualized
+    assert card_logic.simulate_rewards("Tiered Dining", {"dining": [8000, 15000]})["annual_rewards"] == "Rs. 2760"
+    # Other categories keep the flat rate: Rs. 1,000 of fuel a month at 1 point/INR
+    assert card_logic.simulate_rewards("Tiered Dining", {"fuel": 1000, "dining": 8000})["annual_rewards"] == "Rs. 2040"
+
+
+def test_milestones_reached_over_a_multi_month_series(card_logic):
+    # Rs. 5,000 a month for six months, then Rs. 15,000: Rs. 120,000 in the year,
+    # past both milestones only after the seventh month
+    series = [5000] * 6 + [15000] * 6
+    # 120,000 * 2 + 5,000 + 20,000 points
+    assert card_logic.simulate_rewards("Milestone Travel", {"travel": series})["annual_rewards"] == "Rs. 2650"
+    # Rs. 96,000: only the first milestone (192,000 + 5,000 points)
+    assert card_logic.simulate_rewards("Milestone Travel", {"travel": [8000] * 12})["annual_rewards"] == "Rs. 1970"
+    # Rs. 48,000: none
+    assert card_logic.simulate_rewards("Milestone Travel", {"travel": [4000] * 12})["annual_rewards"] == "Rs. 960"
+    # Spend in every category counts towards the milestones
+    assert card_logic.simulate_rewards(
+        "Milestone Travel", {"travel": 2500, "groceries": 2500}
+    )["annual_rewards"] == "Rs. 950"  # 30,000 * 2 + 30,000 * 1 + 5,000
+
+
+def test_fee_waived_at_the_spend_threshold(card_logic):
+    columns = card_logic.catalog.columns
+    fee_row = row(card_logic, "Fee Waiver")
+
+    _, fees = columns.simulate(spend_matrix({"groceries": [16000] * 11 + [23999]}), rows=[fee_row])
+    assert fees.tolist() == [2500]  # Rs. 199,999
+    _, fees = columns.simulate(spend_matrix({"groceries": [16000] * 11 + [24000]}), rows=[fee_row])
+    assert fees.tolist() == [0]  # Rs. 200,000
+    assert card_logic.simulate_rewards("Fee Waiver", {"groceries": 20000}) == {
+        "card_name": "Fee Waiver",
+        "annual_rewards": "Rs. 2400",
+        "annual_fee": "Rs. 0 (waived on your spending)",
+    }
+    assert "annual_fee" not in card_logic.simulate_rewards("Fee Waiver", {"groceries": 10000})
+
+
+# Rs. 5,000 a month each on travel and dining
+WALLET_SPEND = {"fuel": 0, "travel": 5000, "groceries": 0, "dining": 5000}
+
+
+def test_wallet_search_takes_milestones_into_account(card_logic):
+    columns = card_logic.catalog.columns
+    rows = [row(card_logic, "Big Milestone"), row(card_logic, "Dining Plus")]
+
+    # Everything on Big Milestone: 120,000 + 80,000 points = Rs. 2,000
+    best = optimize_wallet(columns, rows, spend_matrix(WALLET_SPEND))
+    assert best["assignment"].tolist() == [0, 0, 0, 0]
+    assert best["value"] == 2000
+    assert best["bonus"].tolist() == [80000, 0]
+
+
+def test_greedy_wallet_picks_the_best_card_per_category(card_logic, monkeypatch):
+    monkeypatch.setattr(rewards, "MAX_WALLET_SEARCH", 0)
+    columns = card_logic.catalog.columns
+    rows = [row(card_logic, "Big Milestone"), row(card_logic, "Dining Plus")]
+
+    # Dining on Dining Plus (120,000 points); travel ties and stays on the first card,
+    # which then misses its milestone: Rs. 1,800
+    best = optimize_wallet(columns, rows, spend_matrix(WALLET_SPEND))
+    assert best["assignment"].tolist() == [0, 0, 0, 1]
+    assert best["value"] == 1800
+    assert best["bonus"].tolist() == [0, 0]
+
+
+def test_candidate_gain(card_logic, monkeypatch):
+    user_data = {"spending_habits": WALLET_SPEND, "existing_cards": ["Dining Plus", "Unknown Card"]}
+
+    # Dining Plus alone earns 60,000 + 120,000 points = Rs. 1,800; with the candidate,
+    # travel and dining move to it (categories without spend stay on the held card)
+    result = card_logic.optimize_wallet(user_data, candidate="Big Milestone")
+    assert result == {
+        "card_per_category": {
+            "fuel": "Dining Plus", "travel": "Big Milestone", "groceries": "Dining Plus", "dining": "Big Milestone",
+        },
+        "annual_rewards": "Rs. 2000",
+        "annual_fees": "Rs. 0",
+        "candidate_gain": "Rs. 200/year",
+        "unknown_cards": ["Unknown Card"],
+    }
+
+    # Per category, Big Milestone never beats Dining Plus, so the greedy path gains nothing
+    monkeypatch.setattr(rewards, "MAX_WALLET_SEARCH", 0)
+    result = card_logic.optimize_wallet(user_data, candidate="Big Milestone")
+    assert result["candidate_gain"] == "Rs. 0/year"
+    assert result["card_per_category"]["dining"] == "Dining Plus"
+
+
+def test_wallet_fees_and_errors(card_logic):
+    result = card_logic.optimize_wallet({"spending_habits": {"groceries": 1000}, "existing_cards": ["Fee Waiver"]})
+    assert result["annual_fees"] == "Rs. 2500"
+    assert card_logic.optimize_wallet({"spending_habits": {}, "existing_cards": ["none"]}) == {
+        "error": "No known cards to choose from."
+    }
+    assert card_logic.optimize_wallet({"spending_habits": {}}, candidate="No Such Card") == {"error": "Card not found."}
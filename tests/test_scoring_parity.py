@@ -0,0 +1,135 @@
+"""
+Vectorized recommendation scoring (CardColumns + top_k) against the original
+per-card loop, on seeded random catalogs and profiles.
+"""
+import random
+
+import pytest
+
+from benchmarks.synthetic import BENEFITS, CREDIT_SCORES, make_cards
+from services.scoring import REWARD_CATEGORIES
+
+
+def baseline_recommend(cards, user_data):
+    """
+    The scalar scoring loop recommend_cards replaced: names and reward lines of the top 3.
+    """
+    monthly_income = user_data.get("monthly_income", 0)
+    spending_habits = user_data.get("spending_habits", {})
+    preferred_benefits = user_data.get("preferred_benefits", [])
+    existing_cards = user_data.get("existing_cards", [])
+    credit_score = user_data.get("credit_score", "unknown")
+
+    if credit_score != "unknown":
+        min_score = int(credit_score.split("–")[0]) if "–" in credit_score else int(credit_score)
+    else:
+        min_score = 750
+    filtered_cards = [card for card in cards if card["min_credit_score"] <= min_score]
+    filtered_cards = [card for card in filtered_cards if card["name"] not in existing_cards]
+
+    recommendations = []
+    for card in filtered_cards:
+        total_rewards = sum(spending_habits.get(category, 0) * card["rewards"][category] for category in REWARD_CATEGORIES) * 12
+        benefit_match = len(set(card["benefits"]) & set(preferred_benefits))
+        # Computed but never applied in the original, so income does not affect ranking
+        fee_score = 0 if card["annual_fee"] <= (monthly_income * 0.1) else -1000  # noqa: F841
+        score = total_rewards + (benefit_match * 1000) - card["annual_fee"]
+        recommendations.append((card, score, total_rewards / 100))
+
+    recommendations = sorted(recommendations, key=lambda rec: rec[1], reverse=True)[:3]
+    return [(card["name"], f"You could earn Rs. {int(rewards)}/year in rewards.") for card, _, rewards in recommendations]
+
+
+def make_profile(rng, cards):
+    low = rng.choice(CREDIT_SCORES)
+    return {
+        "monthly_income": rng.choice((0, 30000, 50000, 250000)),
+        "spending_habits": {category: rng.randrange(0, 40000, 500) for category in REWARD_CATEGORIES},
+        "preferred_benefits": rng.sample(BENEFITS, rng.randint(0, 3)),
+        "existing_cards": [rng.choice(cards)["name"] for _ in range(rng.choice((0, 0, 1, 2, 3)))] or ["none"],
+        "credit_score": rng.choice(("unknown", str(low), f"{low}–{low + 100}", "720")),
+    }
+
+
+def recommended(card_logic, user_data):
+    return [(card["name"], card["reward"]) for card in card_logic.recommend_cards(user_data)]
+
+
+@pytest.mark.parametrize("size,seed", [(21, 0), (200, 1), (2000, 2)])
+def test_random_profiles_match_baseline(card_logic_for, size, seed):
+    cards = make_cards(size, seed)
+    card_logic = card_logic_for(cards)
+    rng = random.Random(seed)
+    for _ in range(300):
+        profile = make_profile(rng, cards)
+        assert recommended(card_logic, profile) == baseline_recommend(cards, profile), profile
+
+
+def test_ties_break_in_catalog_order(card_logic_for):
+    # Identical copies score the same; the original stable sort keeps catalog order
+    base = make_cards(4, 3)
+    cards = [dict(card, name=f"{card['name']} Copy {copy}") for copy in range(3) for card in base]
+    card_logic = card_logic_for(cards)
+    rng = random.Random(3)
+    for _ in range(100):
+        profile = make_profile(rng, cards)
+        assert recommended(card_logic, profile) == baseline_recommend(cards, profile), profile
+
+    zero_spend = {"spending_habits": {category: 0 for category in REWARD_CATEGORIES}, "credit_score": "900"}
+    assert recommended(card_logic, zero_spend) == baseline_recommend(cards, zero_spend)
+
+
+def test_existing_cards_are_excluded(card_logic_for):
+    cards = make_cards(50, 4)
+    card_logic = card_logic_for(cards)
+    profile = {"spending_habits": {"fuel": 5000, "travel": 20000, "groceries": 8000, "dining": 6000}, "credit_score": "900"}
+    top = [name for name, _ in recommended(card_logic, profile)]
+    for held in range(1, 4):
+        profile["existing_cards"] = top[:held]
+        names = [name for name, _ in recommended(card_logic, profile)]
+        assert not set(names) & set(top[:held])
+        assert recommended(card_logic, profile) == baseline_recommend(cards, profile)
+
+
+def test_credit_score_and_income_filters(card_logic_for):
+    cards = make_cards(300, 5)
+    card_logic = card_logic_for(cards)
+    min_scores = {card["name"]: card["min_credit_score"] for card in cards}
+    spending = {"fuel": 3000, "travel": 10000, "groceries": 7000, "dining": 4000}
+    for credit_score, limit in (("650", 650), ("700–800", 700), ("unknown", 750), ("800", 800)):
+        rankings = set()
+        for income in (0, 20000, 1000000):
+            profile = {"monthly_income": income, "spending_habits": spending, "credit_score": credit_score}
+            result = recommended(card_logic, profile)
+            assert result == baseline_recommend(cards, profile)
+            assert all(min_scores[name] <= limit for name, _ in result)
+            rankings.add(tuple(result))
+        # Income is not scored
+        assert len(rankings) == 1
+
+
+def test_batch_isolates_malformed_profiles(card_logic_for):
+    cards = make_cards(100, 6)
+    card_logic = card_logic_for(cards)
+    rng = random.Random(6)
+    profiles = [make_profile(rng, cards) for _ in range(9)]
+    malformed = {
+        2: {"preferred_benefits": None},  # Treated as no preference
+        4: {"preferred_benefits": "cashback"},
+        5: {"existing_cards": {"name": "x"}},
+        7: {"preferred_benefits": [["lounge_access"]]},
+    }
+    for i, fields in malformed.items():
+        profiles[i] = {**profiles[i], **fields}
+
+    results = list(card_logic.recommend_batch(profiles))
+
+    assert len(results) == len(profiles)
+    for i, result in enumerate(results):
+        if i in (4, 5, 7):
+            assert "error" in result
+        else:
+            assert result == card_logic.recommend_cards(profiles[i])
+    assert [name for name, _ in recommended(card_logic, profiles[2])] == [
+        name for name, _ in baseline_recommend(cards, {**profiles[2], "preferred_benefits": []})
+    ]
@@ -0,0 +1,111 @@
+"""
+Sessions shared through a store: a conversation continues, updates and resets
+across SessionManager instances (standing in for workers).
+"""
+import time
+
+import pytest
+
+from agents.session import SessionManager, new_session_id
+from agents.session_store import LocalRedis, MemoryStore, RedisStore, SqliteStore
+
+
+@pytest.fixture(params=["redis", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "redis":
+        return RedisStore(LocalRedis())
+    return SqliteStore(str(tmp_path / "sessions.sqlite3"))
+
+
+def test_conversation_continues_on_another_worker(store):
+    worker1, worker2 = SessionManager(store=store), SessionManager(store=store)
+    session_id = new_session_id()
+
+    session = worker1.get(session_id)
+    session.thread_id = "thread_1"
+    session.user_data["spending_habits"] = {"fuel": 2000}
+    session.pending_messages.append(("user", "hi"))
+    session.last_run_id = "run_1"
+    worker1.save(session)
+
+    other = worker2.get(session_id)
+    assert other is not session
+    assert other.thread_id == "thread_1"
+    assert other.user_data == {"spending_habits": {"fuel": 2000}}
+    assert other.pending_messages == [("user", "hi")]
+    assert other.last_run_id == "run_1"
+    assert other.revision == session.revision == 1
+
+
+def test_newer_revision_replaces_local_state(store):
+    worker1, worker2 = SessionManager(store=store), SessionManager(store=store)
+    session_id = new_session_id()
+    session = worker1.get(session_id)
+    session.thread_id = "thread_1"
+    worker1.save(session)
+
+    other = worker2.get(session_id)
+    other.user_data["credit_score"] = "750"
+    worker2.save(other)
+    worker2.save(other)
+
+    # worker1's live session is refreshed in place from revision 3
+    assert worker1.get(session_id) is session
+    assert session.revision == 3
+    assert session.user_data == {"credit_score": "750"}
+
+    # Reading the same revision again leaves local state alone
+    session.user_data["monthly_income"] = 50000
+    assert worker1.get(session_id).user_data == {"credit_score": "750", "monthly_income": 50000}
+
+
+def test_reset_reaches_every_worker(store):
+    worker1, worker2 = SessionManager(store=store), SessionManager(store=store)
+    session_id = new_session_id()
+    session = worker1.get(session_id)
+    session.thread_id = "thread_1"
+    session.user_data["preferred_benefits"] = ["cashback"]
+    worker1.save(session)
+    worker2.get(session_id)
+
+    fresh = worker2.reset(session_id)
+    assert fresh.thread_id is None and fresh.user_data == {}
+    assert store.load(session_id) is None
+
+    restarted = worker1.get(session_id)
+    assert restarted.thread_id is None and restarted.user_data == {}
+
+    # A conversation started after the reset (new created_at) replaces the other
+    # worker's state even at a lower revision
+    restarted.thread_id = "thread_2"
+    worker1.save(restarted)
+    assert worker2.get(session_id).thread_id == "thread_2"
+
+
+def test_unsaved_session_is_kept_locally(store):
+    # A session never saved (revision 0) is not dropped just because the store has no record
+    manager = SessionManager(store=store)
+    session_id = new_session_id()
+    session = manager.get(session_id)
+    session.thread_id = "thread_1"
+    assert manager.get(session_id) is session
+
+
+def test_records_expire(store, monkeypatch):
+    manager = SessionManager(store=store, ttl=60)
+    session_id = new_session_id()
+    session = manager.get(session_id)
+    session.thread_id = "thread_1"
+    manager.save(session)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert store.load(session_id) is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(max_entries=2)
+    store.save("a", b"1", 60)
+    store.save("b", b"2", 60)
+    store.load("a")
+    store.save("c", b"3", 60)
+    assert store.load("a") == b"1" and store.load("b") is None and store.load("c") == b"3"